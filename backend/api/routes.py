@@ -3,37 +3,38 @@ API Routes for RFP Generator
 Implements all endpoints for frontend integration
 """
 
-from fastapi import APIRouter, HTTPException, Response
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 import logging
 import json
 import uuid
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator
 
 from api.schemas import (
     AnalyzeRequest, AnalyzeResponse,
     QuestionRequest, QuestionResponse,
     GenerateRequest, GenerateResponse,
+    JobSubmitResponse, JobStatusResponse,
     RegenerateRequest, RegenerateResponse,
-    ExportRequest, RFPSections,
+    ExportRequest, RFPSections, Section, SectionEvent,
     DiscoverContextRequest, DiscoverContextResponse
 )
-from services.question_generator import QuestionGenerator
-from services.section_generator import SectionGenerator
-from database.db import get_db
+from services.registry import ServiceRegistry
+from database.db import get_db, save_section, update_section
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize services
-question_gen = QuestionGenerator()
-section_gen = SectionGenerator()
+
+def get_services(request: Request) -> ServiceRegistry:
+    """Shared services created once in the server lifespan"""
+    return request.app.state.services
 
 
 @router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze_rfp_request(request: AnalyzeRequest):
+async def analyze_rfp_request(request: AnalyzeRequest, services: ServiceRegistry = Depends(get_services)):
     """
     Analyze initial RFP request and generate follow-up questions
     """
@@ -55,7 +56,7 @@ async def analyze_rfp_request(request: AnalyzeRequest):
             "rfp_type": rfp_type,
             **entities
         }
-        questions = question_gen.generate_questions(request.prompt, context)
+        questions = await services.question_generator.generate_questions(request.prompt, context)
         
         # Save session to database
         db = await get_db()
@@ -93,7 +94,7 @@ async def get_next_question(request: QuestionRequest):
 
 
 @router.post("/discover-context", response_model=DiscoverContextResponse)
-async def discover_rag_context(request: DiscoverContextRequest):
+async def discover_rag_context(request: DiscoverContextRequest, services: ServiceRegistry = Depends(get_services)):
     """
     Search RAG system for relevant historical RFPs before generation
     This step happens after user answers questions
@@ -101,10 +102,7 @@ async def discover_rag_context(request: DiscoverContextRequest):
     logger.info(f"Discovering RAG context for session: {request.session_id}")
     
     try:
-        from services.rag_context_discovery import RAGContextDiscovery
-        
-        discovery = RAGContextDiscovery()
-        result = await discovery.discover_context(request.context)
+        result = await services.context_discovery.discover_context(request.context)
         
         # Update session context with discovered insights
         db = await get_db()
@@ -115,7 +113,9 @@ async def discover_rag_context(request: DiscoverContextRequest):
         row = await cursor.fetchone()
         
         if row:
+            # Keep the user's answers with the session so generation can start from it
             existing_context = json.loads(row['context'])
+            existing_context.update(request.context)
             existing_context['rag_discovery'] = result
             
             await db.execute(
@@ -137,7 +137,7 @@ async def discover_rag_context(request: DiscoverContextRequest):
 
 
 @router.post("/generate", response_model=GenerateResponse)
-async def generate_rfp_sections(request: GenerateRequest):
+async def generate_rfp_sections(request: GenerateRequest, services: ServiceRegistry = Depends(get_services)):
     """
     Generate all 25 RFP sections (NEW + OLD + RULES)
     """
@@ -145,7 +145,7 @@ async def generate_rfp_sections(request: GenerateRequest):
     
     try:
         # Generate all sections
-        sections_dict = section_gen.generate_all_sections(request.context)
+        sections_dict = await services.section_generator.generate_all_sections(request.context)
         
         # Convert to response format
         sections = RFPSections(
@@ -157,11 +157,11 @@ async def generate_rfp_sections(request: GenerateRequest):
         # Save sections to database
         db = await get_db()
         for section in sections_dict["new"]:
-            await _save_section(db, request.session_id, section, "new")
+            await save_section(db, request.session_id, section, "new")
         for section in sections_dict["old"]:
-            await _save_section(db, request.session_id, section, "old")
+            await save_section(db, request.session_id, section, "old")
         for section in sections_dict["rules"]:
-            await _save_section(db, request.session_id, section, "rules")
+            await save_section(db, request.session_id, section, "rules")
         
         await db.commit()
         await db.close()
@@ -176,27 +176,93 @@ async def generate_rfp_sections(request: GenerateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/generate/stream")
+async def stream_rfp_sections(session_id: str, services: ServiceRegistry = Depends(get_services)):
+    """
+    Generate all RFP sections for a stored session as server-sent events.
+    RULES sections are sent immediately, then each NEW/OLD section as soon as
+    it completes; every section is saved as it is sent.
+    """
+    logger.info(f"Streaming RFP sections for session: {session_id}")
+    
+    db = await get_db()
+    cursor = await db.execute(
+        "SELECT context FROM rfp_sessions WHERE id = ?",
+        (session_id,)
+    )
+    row = await cursor.fetchone()
+    if not row:
+        await db.close()
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    context = json.loads(row['context'] or "{}")
+    return _section_stream(services, db, session_id, context)
+
+
+@router.post("/generate/stream")
+async def stream_rfp_sections_with_context(request: GenerateRequest, services: ServiceRegistry = Depends(get_services)):
+    """
+    Streaming variant of /generate for clients that send the context in the body
+    """
+    logger.info(f"Streaming RFP sections for session: {request.session_id}")
+    
+    db = await get_db()
+    return _section_stream(services, db, request.session_id, request.context)
+
+
+@router.post("/jobs/generate", response_model=JobSubmitResponse, status_code=202)
+async def submit_generation_job(request: GenerateRequest, services: ServiceRegistry = Depends(get_services)):
+    """
+    Queue generation of all RFP sections as a background job. Poll
+    /jobs/{job_id} for status and the sections saved so far.
+    """
+    logger.info(f"Queueing RFP generation job for session: {request.session_id}")
+    
+    try:
+        job_id = await services.job_queue.submit(request.session_id, request.context)
+        return JobSubmitResponse(job_id=job_id, session_id=request.session_id, status="queued")
+        
+    except Exception as e:
+        logger.error(f"Error queueing generation job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_generation_job(job_id: str, services: ServiceRegistry = Depends(get_services)):
+    """
+    Status of a background generation job with its partial results
+    """
+    job = await services.job_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
 @router.post("/regenerate", response_model=RegenerateResponse)
-async def regenerate_section(request: RegenerateRequest):
+async def regenerate_section(request: RegenerateRequest, services: ServiceRegistry = Depends(get_services)):
     """
     Regenerate a single section with additional context
     """
     logger.info(f"Regenerating section: {request.section_name} (iteration {request.iteration})")
     
     try:
+        section_gen = services.section_generator
+        
         # Determine section type
         if request.section_name in section_gen.NEW_SECTIONS:
-            section = section_gen.generate_new_section(
+            section = await section_gen.generate_new_section(
                 section_name=request.section_name,
                 context=request.context,
                 iteration=request.iteration,
-                additional_context=request.additional_context
+                additional_context=request.additional_context,
+                use_cache=False
             )
         elif request.section_name in section_gen.OLD_SECTIONS:
-            section = section_gen.generate_old_section(
+            section = await section_gen.generate_old_section(
                 section_name=request.section_name,
                 context=request.context,
-                iteration=request.iteration
+                iteration=request.iteration,
+                use_cache=False
             )
         else:
             # RULES sections can't be regenerated
@@ -204,18 +270,7 @@ async def regenerate_section(request: RegenerateRequest):
         
         # Update section in database
         db = await get_db()
-        await db.execute(
-            """UPDATE sections 
-               SET content = ?, ai_eval = ?, regen_count = ?
-               WHERE session_id = ? AND name = ?""",
-            (
-                section["content"],
-                json.dumps(section.get("aiEval", {})),
-                request.iteration,
-                request.session_id,
-                request.section_name
-            )
-        )
+        await update_section(db, request.session_id, section, request.iteration)
         await db.commit()
         await db.close()
         
@@ -226,6 +281,62 @@ async def regenerate_section(request: RegenerateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/regenerate/stream")
+async def regenerate_section_stream(request: RegenerateRequest, services: ServiceRegistry = Depends(get_services)):
+    """
+    Regenerate a single section, streaming completion tokens as server-sent
+    events. The evaluation runs after the completion ends and is sent as a
+    final "score" event; the section is saved once, at the end.
+    """
+    logger.info(f"Streaming regeneration of section: {request.section_name} (iteration {request.iteration})")
+    
+    section_gen = services.section_generator
+    if request.section_name not in section_gen.NEW_SECTIONS + section_gen.OLD_SECTIONS:
+        raise HTTPException(status_code=400, detail="RULES sections cannot be regenerated")
+    
+    async def events() -> AsyncIterator[str]:
+        try:
+            section = None
+            async for kind, payload in section_gen.stream_section(
+                section_name=request.section_name,
+                context=request.context,
+                iteration=request.iteration,
+                additional_context=request.additional_context
+            ):
+                if kind == "token":
+                    yield _sse("token", json.dumps({"content": payload}))
+                else:
+                    section = payload
+            
+            db = await get_db()
+            try:
+                await update_section(db, request.session_id, section, request.iteration)
+                await db.commit()
+            finally:
+                await db.close()
+            
+            yield _sse("score", Section.model_validate(section).model_dump_json(by_alias=True))
+        except Exception as e:
+            logger.error(f"Error regenerating section: {e}")
+            yield _sse("error", json.dumps({"detail": str(e)}))
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/response-cache/stats")
+async def get_response_cache_stats(services: ServiceRegistry = Depends(get_services)):
+    """
+    Section response cache size and hit/draft/miss counts
+    """
+    if services.response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **services.response_cache.stats()}
+
+
 @router.get("/export")
 async def export_rfp(session_id: str):
     """
@@ -343,17 +454,48 @@ def _classify_rfp_type(prompt: str) -> str:
         return 'Service_Agreement'  # Default
 
 
-async def _save_section(db, session_id: str, section: Dict[str, Any], source_type: str):
-    """Save section to database"""
-    await db.execute(
-        """INSERT INTO sections (session_id, name, source_type, content, assumptions, ai_eval)
-           VALUES (?, ?, ?, ?, ?, ?)""",
-        (
-            session_id,
-            section["name"],
-            source_type,
-            section["content"],
-            json.dumps(section.get("assumptions", [])),
-            json.dumps(section.get("aiEval", {}))
+def _sse(event: str, data: str) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def _section_stream(services: ServiceRegistry, db, session_id: str, context: Dict[str, Any]) -> StreamingResponse:
+    """SSE response that generates, saves and emits every section of an RFP"""
+    section_gen = services.section_generator
+    
+    def section_event(source_type: str, section: Dict[str, Any]) -> str:
+        payload = SectionEvent(
+            session_id=session_id,
+            source_type=source_type,
+            section=Section.model_validate(section)
         )
+        return _sse("section", payload.model_dump_json(by_alias=True))
+    
+    async def events() -> AsyncIterator[str]:
+        counts = {"new": 0, "old": 0, "rules": 0}
+        try:
+            for section_name in section_gen.RULES_SECTIONS:
+                section = section_gen.get_rules_section(section_name)
+                await save_section(db, session_id, section, "rules")
+                counts["rules"] += 1
+                yield section_event("rules", section)
+            await db.commit()
+            
+            async for source_type, section in section_gen.generate_sections_as_completed(context):
+                await save_section(db, session_id, section, source_type)
+                await db.commit()
+                counts[source_type] += 1
+                yield section_event(source_type, section)
+            
+            yield _sse("done", json.dumps({"session_id": session_id, "counts": counts}))
+        except Exception as e:
+            logger.error(f"Error streaming sections: {e}")
+            yield _sse("error", json.dumps({"detail": str(e)}))
+        finally:
+            await db.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
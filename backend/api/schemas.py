@@ -45,13 +45,13 @@ class RAGSource(BaseModel):
     """RAG source document"""
     doc_name: str = Field(..., alias="docName")
     section: str
-    similarity: float
+    similarity: Optional[float] = None  # None when retrieval had no query embedding
 
 
 class AIEvalScores(BaseModel):
     """AI evaluation scores"""
     coherence: float
-    rag_confidence: float = Field(..., alias="ragConfidence")
+    rag_confidence: Optional[float] = Field(..., alias="ragConfidence")
     format_compliance: float = Field(..., alias="formatCompliance")
     sources: Optional[List[RAGSource]] = None
     latency_ms: Optional[int] = Field(None, alias="latencyMs")
@@ -67,6 +67,7 @@ class Section(BaseModel):
     content: str
     assumptions: Optional[List[str]] = None
     ai_eval: Optional[AIEvalScores] = Field(None, alias="aiEval")
+    cache_status: Optional[str] = Field(None, alias="cacheStatus")  # "hit" or "draft" when served from the response cache
 
     class Config:
         populate_by_name = True
@@ -85,6 +86,37 @@ class GenerateResponse(BaseModel):
     sections: RFPSections
 
 
+class SectionEvent(BaseModel):
+    """Server-sent event payload for one section of a streamed generation"""
+    session_id: str = Field(..., alias="sessionId")
+    source_type: str = Field(..., alias="sourceType")
+    section: Section
+
+    class Config:
+        populate_by_name = True
+
+
+class JobSubmitResponse(BaseModel):
+    """Response from the background generation endpoint"""
+    job_id: str
+    session_id: str
+    status: str
+
+
+class JobStatusResponse(BaseModel):
+    """Status of a background generation job and the sections saved so far"""
+    job_id: str
+    session_id: str
+    status: str  # queued, running, completed or failed
+    completed_sections: int
+    total_sections: int
+    attempts: int
+    error: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    sections: RFPSections
+
+
 class RegenerateRequest(BaseModel):
     """Request to regenerate a section"""
     session_id: str
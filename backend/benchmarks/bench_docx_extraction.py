@@ -0,0 +1,86 @@
+"""
+Benchmark: python-docx vs streaming DOCX text extraction
+
+Usage:
+    python benchmarks/bench_docx_extraction.py --directory Data --repeat 3
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import click
+
+from core.document_processor import DocumentProcessor
+
+ENGINES = ["python-docx", "streaming"]
+
+
+def _measure(processor: DocumentProcessor, file_path: str, repeat: int):
+    """Return (best seconds, peak traced bytes, extracted characters)"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = processor.extract_text_from_docx(file_path)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    processor.extract_text_from_docx(file_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak, len(text)
+
+
+@click.command()
+@click.option(
+    "--directory",
+    "-d",
+    default=str(project_root / "Data"),
+    help="Directory of DOCX files",
+)
+@click.option("--repeat", "-r", default=3, help="Timed runs per file (best is kept)")
+def main(directory, repeat):
+    processors = {engine: DocumentProcessor(extractor=engine) for engine in ENGINES}
+    files = sorted(Path(directory).glob("*.docx"))
+    totals = {engine: [0.0, 0, 0] for engine in ENGINES}
+
+    header = f"{'file':<60}" + "".join(
+        f"{engine + ' ms':>16}{engine + ' MiB':>16}" for engine in ENGINES
+    )
+    print(header)
+    print("-" * len(header))
+
+    for file_path in files:
+        row = f"{file_path.name[:58]:<60}"
+        try:
+            for engine in ENGINES:
+                seconds, peak, chars = _measure(processors[engine], str(file_path), repeat)
+                totals[engine][0] += seconds
+                totals[engine][1] = max(totals[engine][1], peak)
+                totals[engine][2] += chars
+                row += f"{seconds * 1000:>16.1f}{peak / 2**20:>16.2f}"
+        except Exception as e:
+            row += f"  skipped ({e})"
+        print(row)
+
+    print("-" * len(header))
+    for engine in ENGINES:
+        seconds, peak, chars = totals[engine]
+        print(
+            f"{engine:<12} total {seconds * 1000:>9.1f} ms  "
+            f"max peak {peak / 2**20:>7.2f} MiB  {chars:>10} chars"
+        )
+
+    baseline = totals["python-docx"][0]
+    streaming = totals["streaming"][0]
+    if streaming > 0:
+        print(f"speedup: {baseline / streaming:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: recall and latency of quantized first-pass search with float32 rerank
+
+Indexes synthetic clustered embeddings (unit-normalized, like
+text-embedding-3-small output) and queries them with a held-out set drawn
+from the same clusters but never indexed. For every quantization mode it
+reports the resident index size, p50/p99 query latency and recall@k against
+exact float32 search.
+
+Usage:
+    python benchmarks/bench_quantization.py --vectors 20000 --dim 1536
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import click
+import numpy as np
+
+from rag_engine.numpy_index import QUANTIZATION_MODES, NumpyVectorIndex
+
+
+def clustered_vectors(rng, centers, count, spread):
+    """Points scattered around random cluster centers"""
+    assignment = rng.integers(0, len(centers), size=count)
+    dim = centers.shape[1]
+    noise = rng.standard_normal((count, dim), dtype=np.float32) * (spread / np.sqrt(dim))
+    points = centers[assignment] + noise
+    return (points / np.linalg.norm(points, axis=1, keepdims=True)).astype(np.float32)
+
+
+@click.command()
+@click.option("--vectors", "-n", default=20000, help="Number of indexed vectors")
+@click.option("--dim", "-d", default=1536, help="Embedding dimension")
+@click.option("--queries", "-q", default=200, help="Held-out queries")
+@click.option("--top-k", "-k", default=10, help="Results per query")
+@click.option("--clusters", default=200, help="Number of synthetic topics")
+@click.option("--spread", default=1.0, help="Within-topic noise relative to the center")
+@click.option("--rerank-factor", "-r", multiple=True, type=int, default=[4, 10], help="Candidates rescored per result")
+@click.option("--seed", default=11, help="Random seed")
+def main(vectors, dim, queries, top_k, clusters, spread, rerank_factor, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    data = clustered_vectors(rng, centers, vectors, spread)
+    held_out = clustered_vectors(rng, centers, queries, spread)
+
+    ids = [f"doc-{i}" for i in range(vectors)]
+    metadatas = [{"group": i % 4} for i in range(vectors)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        exact_index = NumpyVectorIndex(str(Path(workdir) / "exact"), quantization="none")
+        exact_index.upsert(ids, data, metadatas)
+
+        scenarios = {"no filter": None, "filter 1/4": {"group": 1}}
+        exact = {
+            name: [[hit["id"] for hit in exact_index.query(q, top_k, where)] for q in held_out]
+            for name, where in scenarios.items()
+        }
+
+        print(f"{'mode':<8}{'rerank':>7}{'resident MiB':>14}{'scenario':>12}{'p50 ms':>9}{'p99 ms':>9}{'recall@k':>10}")
+        for mode in QUANTIZATION_MODES:
+            factors = [1] if mode == "none" else rerank_factor
+            for factor in factors:
+                index = NumpyVectorIndex(str(Path(workdir) / f"{mode}-{factor}"), quantization=mode, rerank_factor=factor)
+                index.upsert(ids, data, metadatas)
+                resident = index.memory_usage()["resident_bytes"] / 2**20
+
+                for name, where in scenarios.items():
+                    index.query(held_out[0], top_k, where)  # warm up
+                    latencies, recalls = [], []
+                    for query, expected in zip(held_out, exact[name]):
+                        started = time.perf_counter()
+                        found = [hit["id"] for hit in index.query(query, top_k, where)]
+                        latencies.append(time.perf_counter() - started)
+                        recalls.append(len(set(found) & set(expected)) / max(len(expected), 1))
+
+                    print(
+                        f"{mode:<8}{factor if mode != 'none' else '-':>7}{resident:>14.1f}{name:>12}"
+                        f"{np.percentile(latencies, 50) * 1000:>9.2f}{np.percentile(latencies, 99) * 1000:>9.2f}"
+                        f"{np.mean(recalls):>10.4f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark: retrieval for a full RFP, sequential search_templates vs search_many
+
+Indexes synthetic section chunks into a temporary store and runs one query per
+OLD section, first as N sequential search_templates calls and then as a single
+search_many call. The embeddings client is replaced by a local stand-in that
+sleeps --embed-latency-ms per request, so the numbers reflect request count
+rather than network conditions.
+
+Usage:
+    python benchmarks/bench_search_many.py --documents 200 --embed-latency-ms 150
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# The store and caches must point at a scratch directory before settings load
+os.environ["CHROMA_PERSIST_DIR"] = tempfile.mkdtemp(prefix="bench_search_many_")
+os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import click
+import numpy as np
+
+from rag_engine.search_engine import SearchEngine
+from services.section_generator import SectionGenerator
+
+OLD_SECTIONS = SectionGenerator.OLD_SECTIONS
+SECTION_WORDS = [
+    "background scope objective utility network",
+    "vendor qualification experience turnover certificate",
+    "proposal format envelope technical commercial bid",
+    "submission deadline portal sealed tender address",
+    "contract terms liquidated damages termination",
+    "insurance policy coverage workmen compensation",
+    "warranty defect liability support period",
+    "references completed projects client certificate",
+]
+
+
+def text_vector(text, dim):
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32).tolist()
+
+
+class SlowEmbeddings:
+    """Stand-in for client.embeddings: fixed latency per request"""
+
+    def __init__(self, latency, dim, counter):
+        self.latency = latency
+        self.dim = dim
+        self.counter = counter
+
+    def create(self, input, model):
+        self.counter["requests"] += 1
+        time.sleep(self.latency)
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=i, embedding=text_vector(text, self.dim))
+            for i, text in enumerate(input)
+        ])
+
+
+class SlowClient:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def with_options(self, **kwargs):
+        return self
+
+
+@click.command()
+@click.option("--documents", "-n", default=200, help="Number of indexed documents")
+@click.option("--chunks", "-c", default=20, help="Chunks per document")
+@click.option("--dim", "-d", default=1536, help="Embedding dimension")
+@click.option("--embed-latency-ms", default=150, help="Simulated latency per embeddings request")
+@click.option("--repeats", "-r", default=10, help="Timed runs per strategy")
+def main(documents, chunks, dim, embed_latency_ms, repeats):
+    counter = {"requests": 0}
+    engine = SearchEngine()
+    engine.embedding_engine.client = SlowClient(SlowEmbeddings(embed_latency_ms / 1000, dim, counter))
+    store = engine.vector_store
+    rng = np.random.default_rng(7)
+
+    started = time.perf_counter()
+    for doc in range(documents):
+        document_id = f"doc-{doc}"
+        store.upsert_documents([{
+            "id": document_id,
+            "content": f"document {doc}",
+            "embedding": rng.standard_normal(dim).tolist(),
+            "metadata": {"filename": f"{document_id}.docx", "client_name": "CESC_Kolkata"},
+        }])
+        batch = []
+        for chunk in range(chunks):
+            section = chunk % len(OLD_SECTIONS)
+            batch.append({
+                "id": f"{document_id}::chunk-{chunk:04d}",
+                "content": f"{OLD_SECTIONS[section]}\n{SECTION_WORDS[section]} clause {chunk}",
+                "embedding": rng.standard_normal(dim).tolist(),
+                "metadata": {
+                    "document_id": document_id,
+                    "section_title": OLD_SECTIONS[section],
+                    "client_name": "CESC_Kolkata",
+                },
+            })
+        store.upsert_chunks(batch)
+    print(f"indexed {documents} documents / {documents * chunks} chunks "
+          f"in {time.perf_counter() - started:.1f}s\n")
+
+    strategies = {
+        "sequential": lambda: [engine.search_templates(q, limit=3) for q in OLD_SECTIONS],
+        "search_many": lambda: engine.search_many(OLD_SECTIONS, limit=3),
+    }
+    print(f"{'strategy':<14}{'p50 ms':>10}{'p99 ms':>10}{'embed requests/run':>20}")
+    for name, run in strategies.items():
+        run()  # warm up
+        counter["requests"] = 0
+        latencies = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            run()
+            latencies.append(time.perf_counter() - started)
+        print(f"{name:<14}{np.percentile(latencies, 50) * 1000:>10.1f}"
+              f"{np.percentile(latencies, 99) * 1000:>10.1f}{counter['requests'] / repeats:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
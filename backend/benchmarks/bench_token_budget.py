@@ -0,0 +1,104 @@
+"""
+Benchmark: tokens used vs tokens available, legacy character cuts vs token budgets
+
+For every document in the corpus this compares how many tokens of content the
+embedding and summarizer calls actually send, before (fixed character limits)
+and after (tokenizer-accurate budgets).
+
+Usage:
+    python benchmarks/bench_token_budget.py --directory Data
+"""
+
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import click
+
+from config.settings import settings
+from core.document_processor import DocumentProcessor
+from core.summarizer import PROMPT_OVERHEAD_TOKENS
+from utils.token_budget import count_tokens, get_tokenizer, truncate_to_tokens
+
+
+def legacy_truncate(content: str, max_length: int) -> str:
+    """The previous DocumentSummarizer._truncate_content"""
+    if len(content) <= max_length:
+        return content
+    truncated = content[:max_length]
+    last_sentence = truncated.rfind(".")
+    if last_sentence > max_length * 0.8:
+        return truncated[: last_sentence + 1]
+    return truncated + "..."
+
+
+def summarizer_budget(max_tokens: int, completion_tokens: int) -> int:
+    available = settings.openai_context_tokens - PROMPT_OVERHEAD_TOKENS - completion_tokens
+    return min(max_tokens, available)
+
+
+@click.command()
+@click.option(
+    "--directory",
+    "-d",
+    default=str(project_root / "Data"),
+    help="Directory of DOCX files",
+)
+def main(directory):
+    embedding_model = settings.openai_embedding_model
+    chat_model = settings.openai_model
+    if get_tokenizer(embedding_model) is None:
+        print("warning: tiktoken encoding unavailable, numbers use the fallback estimate\n")
+
+    # call name -> (legacy char limit, token budget, model)
+    calls = {
+        "embedding": (settings.max_tokens * 3, settings.max_tokens, embedding_model),
+        "summary": (3000, summarizer_budget(settings.summary_input_tokens, 500), chat_model),
+        "key_points": (2000, summarizer_budget(settings.key_points_input_tokens, 300), chat_model),
+        "complexity": (1500, summarizer_budget(settings.complexity_input_tokens, 50), chat_model),
+    }
+    totals = {name: {"available": 0, "legacy": 0, "budget": 0, "over": 0} for name in calls}
+
+    processor = DocumentProcessor()
+    files = sorted(Path(directory).glob("*.docx"))
+    print(f"{'file':<50}{'doc tokens':>12}" + "".join(f"{name:>24}" for name in calls))
+
+    started = time.perf_counter()
+    for file_path in files:
+        try:
+            content = processor.extract_text_from_docx(str(file_path))
+        except Exception as e:
+            print(f"{file_path.name[:48]:<50}  skipped ({e})")
+            continue
+
+        row = f"{file_path.name[:48]:<50}{count_tokens(content, chat_model):>12}"
+        for name, (char_limit, token_budget, model) in calls.items():
+            text = content.replace("\n", " ") if name == "embedding" else content
+            doc_tokens = count_tokens(text, model)
+            available = min(doc_tokens, token_budget)
+
+            legacy = count_tokens(legacy_truncate(text, char_limit) if name != "embedding" else text[:char_limit], model)
+            budget = count_tokens(truncate_to_tokens(text, token_budget, model=model), model)
+
+            totals[name]["available"] += available
+            totals[name]["legacy"] += min(legacy, token_budget)
+            totals[name]["budget"] += budget
+            totals[name]["over"] += int(legacy > token_budget)
+            row += f"{legacy:>8} -> {budget:>6}/{available:<6}"
+        print(row)
+
+    print(f"\n{'call':<12}{'available':>12}{'legacy used':>14}{'budget used':>14}{'legacy %':>10}{'budget %':>10}{'legacy over limit':>19}")
+    for name, total in totals.items():
+        available = max(total["available"], 1)
+        print(
+            f"{name:<12}{total['available']:>12}{total['legacy']:>14}{total['budget']:>14}"
+            f"{total['legacy'] / available:>10.1%}{total['budget'] / available:>10.1%}{total['over']:>19}"
+        )
+    print(f"\nelapsed: {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: query latency of ChromaDB (HNSW) vs the in-process NumPy index
+
+Builds a temporary ChromaDB collection and a NumpyVectorIndex over the same
+synthetic vectors and metadata, then times top-k queries with and without a
+metadata filter. Reports p50/p99 latency and top-k overlap with exact search.
+
+Usage:
+    python benchmarks/bench_vector_search.py --vectors 20000 --dim 1536
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import chromadb
+import click
+import numpy as np
+
+from rag_engine.numpy_index import NumpyVectorIndex
+
+CLIENTS = ["CESC_Kolkata", "CPDL", "MPSL", "CDPL"]
+RFP_TYPES = ["EPC_Project", "Supply_Contract", "Service_Agreement", "General_Terms"]
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+def time_queries(search, queries, where):
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(search(query, where))
+        latencies.append(time.perf_counter() - started)
+    return latencies, results
+
+
+@click.command()
+@click.option("--vectors", "-n", default=20000, help="Number of indexed vectors")
+@click.option("--dim", "-d", default=1536, help="Embedding dimension")
+@click.option("--queries", "-q", default=200, help="Number of timed queries")
+@click.option("--top-k", "-k", default=10, help="Results per query")
+@click.option("--seed", default=7, help="Random seed")
+def main(vectors, dim, queries, top_k, seed):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((vectors, dim), dtype=np.float32)
+    ids = [f"doc-{i}" for i in range(vectors)]
+    metadatas = [
+        {"client_name": CLIENTS[i % len(CLIENTS)], "rfp_type": RFP_TYPES[(i // 7) % len(RFP_TYPES)]}
+        for i in range(vectors)
+    ]
+    documents = [f"document {i}" for i in range(vectors)]
+    query_vectors = rng.standard_normal((queries, dim), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        started = time.perf_counter()
+        client = chromadb.PersistentClient(path=str(Path(workdir) / "chroma"))
+        collection = client.create_collection("bench_vectors", metadata={"hnsw:space": "cosine"})
+        batch = client.get_max_batch_size()
+        for start in range(0, vectors, batch):
+            end = start + batch
+            collection.add(
+                ids=ids[start:end],
+                embeddings=embeddings[start:end],
+                metadatas=metadatas[start:end],
+                documents=documents[start:end],
+            )
+        print(f"chroma build: {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        index = NumpyVectorIndex(str(Path(workdir) / "numpy"))
+        index.upsert(ids, embeddings, metadatas)
+        print(f"numpy build:  {time.perf_counter() - started:.1f}s\n")
+
+        def chroma_search(query, where):
+            result = collection.query(
+                query_embeddings=[query],
+                n_results=top_k,
+                where=where,
+                include=["documents", "metadatas", "distances"],
+            )
+            return result["ids"][0]
+
+        def numpy_search(query, where):
+            return [hit["id"] for hit in index.query(query, n_results=top_k, where=where)]
+
+        scenarios = {
+            "no filter": None,
+            "client filter": {"client_name": "CPDL"},
+            "client+type filter": {"$and": [{"client_name": "CPDL"}, {"rfp_type": "Supply_Contract"}]},
+        }
+
+        print(f"{'scenario':<20}{'backend':<8}{'p50 ms':>10}{'p99 ms':>10}{'recall@k':>10}")
+        for name, where in scenarios.items():
+            # Warm up both backends (HNSW load, page cache for the mmap)
+            chroma_search(query_vectors[0], where)
+            numpy_search(query_vectors[0], where)
+
+            numpy_latency, exact = time_queries(numpy_search, query_vectors, where)
+            chroma_latency, approximate = time_queries(chroma_search, query_vectors, where)
+            recall = np.mean(
+                [len(set(a) & set(e)) / max(len(e), 1) for a, e in zip(approximate, exact)]
+            )
+
+            for backend, latency, backend_recall in (
+                ("chroma", chroma_latency, recall),
+                ("numpy", numpy_latency, 1.0),
+            ):
+                print(
+                    f"{name:<20}{backend:<8}{percentile_ms(latency, 50):>10.2f}"
+                    f"{percentile_ms(latency, 99):>10.2f}{backend_recall:>10.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
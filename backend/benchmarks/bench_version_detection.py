@@ -0,0 +1,121 @@
+"""
+Benchmark: version assignment, difflib scan vs MinHash LSH candidates
+
+Registers a synthetic corpus whose file names fall into a few base names,
+then assigns versions to edited copies of registered documents and to
+unrelated new documents. The LSH path looks up candidates by signature band
+in the SQLite registry and computes the exact shingle Jaccard for those only; the difflib path
+compares the new text with every stored document of the same base name,
+as VersionManager did before. The difflib path runs on a sample of the
+queries because it is slow.
+
+Usage:
+    python benchmarks/bench_version_detection.py --documents 10000 --base-names 10
+"""
+
+import difflib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import click
+import numpy as np
+
+from core.minhash import minhash_signature
+from core.version_manager import VersionManager
+
+VOCABULARY = [f"word{i}" for i in range(5000)]
+
+
+def random_text(rng, words):
+    return " ".join(rng.choice(VOCABULARY, size=words))
+
+
+def edit_text(rng, text, fraction):
+    words = text.split(" ")
+    for i in rng.choice(len(words), size=int(len(words) * fraction), replace=False):
+        words[i] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+
+def difflib_version(manager, contents, filenames, content, filename):
+    """The former determine_version: difflib against every same-name document"""
+    base_name = manager.extract_base_name(filename)
+    best_id, best_ratio = None, 0.0
+    for doc_id, other in contents.items():
+        if manager.extract_base_name(filenames[doc_id]) != base_name:
+            continue
+        ratio = difflib.SequenceMatcher(None, content, other).ratio()
+        if ratio > best_ratio:
+            best_id, best_ratio = doc_id, ratio
+    return best_id if best_ratio > 0.80 else None
+
+
+@click.command()
+@click.option("--documents", "-n", default=10000, help="Registered documents")
+@click.option("--base-names", default=10, help="Distinct base file names in the corpus")
+@click.option("--words", default=300, help="Words per document")
+@click.option("--queries", "-q", default=200, help="Documents to assign a version to")
+@click.option("--edit-fraction", default=0.02, help="Share of words changed in edited copies")
+@click.option("--difflib-sample", default=3, help="Queries also run through the difflib scan")
+def main(documents, base_names, words, queries, edit_fraction, difflib_sample):
+    rng = np.random.default_rng(0)
+    contents = {}
+    filenames = {}
+    for i in range(documents):
+        doc_id = f"doc-{i}"
+        contents[doc_id] = random_text(rng, words)
+        filenames[doc_id] = f"Tender {i % base_names}.docx"
+
+    manager = VersionManager(
+        content_loader=contents.get,
+        path=os.path.join(tempfile.mkdtemp(prefix="bench_version_"), "version_registry.sqlite3"),
+    )
+    started = time.perf_counter()
+    signatures = {doc_id: minhash_signature(text) for doc_id, text in contents.items()}
+    signature_seconds = time.perf_counter() - started
+    for doc_id, text in contents.items():
+        manager.register_document(doc_id, filenames[doc_id], text, "v1.0", signature=signatures[doc_id])
+
+    # Half edited copies (expected parent known), half unrelated documents
+    cases = []
+    for i in range(queries):
+        if i % 2 == 0:
+            parent = f"doc-{rng.integers(documents)}"
+            cases.append((edit_text(rng, contents[parent], edit_fraction), filenames[parent], parent))
+        else:
+            cases.append((random_text(rng, words), f"Tender {i % base_names}.docx", None))
+
+    timings = []
+    correct = 0
+    for content, filename, parent in cases:
+        signature = minhash_signature(content)
+        started = time.perf_counter()
+        _, _, found = manager.determine_version(content, filename, signature=signature)
+        timings.append(time.perf_counter() - started)
+        correct += found == parent
+
+    difflib_timings = []
+    for content, filename, parent in cases[:difflib_sample]:
+        started = time.perf_counter()
+        difflib_version(manager, contents, filenames, content, filename)
+        difflib_timings.append(time.perf_counter() - started)
+
+    print(f"corpus: {documents} documents, {base_names} base names, {words} words each")
+    print(f"signatures (extract stage): {signature_seconds / documents * 1000:8.2f} ms per document")
+    print(f"LSH determine_version:      {np.mean(timings) * 1000:8.2f} ms mean, "
+          f"{np.percentile(timings, 99) * 1000:.2f} ms p99 over {len(timings)} files")
+    print(f"difflib scan:               {np.mean(difflib_timings) * 1000:8.2f} ms mean "
+          f"over {len(difflib_timings)} files")
+    print(f"parents found correctly:    {correct}/{len(cases)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Load test: concurrent /api/generate sessions and /health responsiveness
+
+Runs N generation sessions at once while probing /health, and reports the
+wall-clock time per session and for the whole batch plus health-check
+latency. If handlers block the event loop, sessions serialize (batch time
+grows with N) and /health stalls behind them.
+
+By default the app runs in-process and the OpenAI API is replaced by a local
+transport that answers after --llm-latency-ms, so no key or network is
+needed. Pass --url to load-test a running server instead.
+
+Usage:
+    python benchmarks/load_test_api.py --sessions 10 --llm-latency-ms 200
+    python benchmarks/load_test_api.py --url http://localhost:8000 --sessions 4
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import click
+import httpx
+import numpy as np
+
+CONTEXT = {
+    "rfp_type": "Service_Agreement",
+    "service": "Transformer maintenance",
+    "duration": "12 months",
+}
+
+
+def chat_completion(content):
+    return {
+        "id": "chatcmpl-load-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "load-test",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 100, "completion_tokens": 100, "total_tokens": 200},
+    }
+
+
+def completion_chunks(content, latency):
+    """Streamed completion: the content word by word, spread over latency"""
+    words = content.split(" ")
+    delay = latency / len(words)
+    for i, word in enumerate(words):
+        delta = word if i == 0 else " " + word
+        yield delay, {
+            "id": "chatcmpl-load-test",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "load-test",
+            "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+        }
+    yield 0, {
+        "id": "chatcmpl-load-test",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "load-test",
+        "choices": [],
+        "usage": {"prompt_tokens": 100, "completion_tokens": len(words), "total_tokens": 100 + len(words)},
+    }
+
+
+def simulated_openai(latency):
+    """Async transport answering chat completions after a fixed delay"""
+    section_content = "## Section\n\nGenerated content for this section.\n\n- item"
+
+    async def stream(content):
+        for delay, chunk in completion_chunks(content, latency):
+            await asyncio.sleep(delay)
+            yield f"data: {json.dumps(chunk)}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+
+    async def handler(request):
+        body = json.loads(request.content)
+        if body.get("stream"):
+            return httpx.Response(
+                200, headers={"content-type": "text/event-stream"}, content=stream(section_content)
+            )
+        await asyncio.sleep(latency)
+        if body.get("max_tokens") == 10:
+            # Coherence judge
+            return httpx.Response(200, json=chat_completion("8.5"))
+        return httpx.Response(200, json=chat_completion(section_content))
+
+    return httpx.MockTransport(handler)
+
+
+def in_process_app(llm_latency):
+    """The FastAPI app with a temporary store/database and simulated OpenAI"""
+    workdir = tempfile.mkdtemp(prefix="load_test_api_")
+    os.environ["CHROMA_PERSIST_DIR"] = os.path.join(workdir, "chroma")
+    os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+    # Every session shares CONTEXT; cached sections would skip the generation under test
+    os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+    os.environ.setdefault("OPENAI_API_KEY", "load-test")
+
+    import database.db as database
+    import server
+    from services.registry import ServiceRegistry
+
+    database.DB_PATH = Path(workdir) / "rfp_generator.db"
+    services = ServiceRegistry(
+        async_http_client=httpx.AsyncClient(transport=simulated_openai(llm_latency))
+    )
+    services.warmed_up = True
+    server.app.state.services = services
+    return server.app, database.init_database
+
+
+async def run_session(client, index):
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/generate",
+        json={"session_id": f"load-test-{index}", "context": CONTEXT},
+    )
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def probe_health(client, stop, latencies, interval):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def load_test(client, sessions):
+    # One session alone, as the baseline
+    single = await run_session(client, "baseline")
+
+    stop = asyncio.Event()
+    health_latencies = []
+    probe = asyncio.create_task(probe_health(client, stop, health_latencies, 0.05))
+    started = time.perf_counter()
+    durations = await asyncio.gather(*(run_session(client, i) for i in range(sessions)))
+    batch = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    print(f"single session:          {single * 1000:8.0f} ms")
+    print(f"{sessions} concurrent sessions: {batch * 1000:8.0f} ms wall "
+          f"(serialized would be ~{single * sessions * 1000:.0f} ms)")
+    print(f"per-session p50 / max:   {np.percentile(durations, 50) * 1000:8.0f} / "
+          f"{max(durations) * 1000:.0f} ms")
+    print(f"/health p50 / p99 / max: {np.percentile(health_latencies, 50) * 1000:8.1f} / "
+          f"{np.percentile(health_latencies, 99) * 1000:.1f} / "
+          f"{max(health_latencies) * 1000:.1f} ms over {len(health_latencies)} probes")
+
+
+@click.command()
+@click.option("--sessions", "-n", default=10, help="Concurrent generation sessions")
+@click.option("--llm-latency-ms", default=200, help="Simulated latency per OpenAI call (in-process mode)")
+@click.option("--url", default=None, help="Base URL of a running server (skips the in-process app)")
+def main(sessions, llm_latency_ms, url):
+    async def run():
+        if url:
+            async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+                await load_test(client, sessions)
+            return
+        app, init_database = in_process_app(llm_latency_ms / 1000)
+        await init_database()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+            await load_test(client, sessions)
+        await app.state.services.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ import click
 import os
 import sys
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
@@ -12,6 +12,18 @@ from core.document_processor import DocumentProcessor
 from core.metadata_extractor import MetadataExtractor
 from core.version_manager import VersionManager
 from core.summarizer import DocumentSummarizer
+from core.index_manifest import IndexManifest
+from core.ingestion_pipeline import (
+    ENRICHMENT_CALLS,
+    IngestionPipeline,
+    build_final_metadata,
+    can_reuse_enrichment,
+    enrich_document,
+    extract_document,
+    load_parent_enrichment,
+    snapshot_parent_enrichments,
+    write_documents,
+)
 from rag_engine.embedding_engine import EmbeddingEngine
 from rag_engine.vector_store import VectorStore
 from rag_engine.search_engine import SearchEngine
@@ -38,7 +50,15 @@ def cli(debug):
 @click.option("--rfp-type", "-t", help="Filter by RFP type")
 @click.option("--service", "-s", help="Filter by service category")
 @click.option("--equipment", "-e", help="Filter by equipment type")
+@click.option("--term", help="Filter by key term (e.g. \"power transformer\")")
 @click.option("--limit", "-l", default=5, help="Number of results to return")
+@click.option(
+    "--mode",
+    "-m",
+    type=click.Choice(["hybrid", "vector", "keyword"]),
+    default=None,
+    help="Retrieval mode (default: SEARCH_TYPE setting)",
+)
 @click.option("--verbose", "-v", is_flag=True, help="Detailed output")
 @click.option(
     "--output",
@@ -48,7 +68,7 @@ def cli(debug):
     help="Output format",
 )
 @click.option("--debug", is_flag=True, help="Enable debug logging")
-def search(query, client, rfp_type, service, equipment, limit, verbose, output, debug):
+def search(query, client, rfp_type, service, equipment, term, limit, mode, verbose, output, debug):
     """Search for similar RFP templates"""
     try:
         # Enable debug logging if requested
@@ -70,10 +90,12 @@ def search(query, client, rfp_type, service, equipment, limit, verbose, output,
             filters["service_category"] = service
         if equipment:
             filters["equipment_type"] = equipment
+        if term:
+            filters["key_terms"] = {"$contains": " ".join(term.lower().split())}
 
         # Perform search
         results = search_engine.search_templates(
-            query=query, filters=filters, limit=limit
+            query=query, filters=filters, limit=limit, search_type=mode
         )
 
         # Format output
@@ -91,41 +113,67 @@ def search(query, client, rfp_type, service, equipment, limit, verbose, output,
 @cli.command()
 @click.argument("document_path", type=click.Path(exists=True))
 @click.option("--batch", is_flag=True, help="Process all documents in directory")
-def add(document_path, batch):
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    default=settings.ingestion_workers,
+    help="Number of parallel ingestion workers (batch mode)",
+)
+def add(document_path, batch, workers):
     """Add a document to the RAG system"""
     try:
         # Initialize components
         processor = DocumentProcessor()
         metadata_extractor = MetadataExtractor()
-        version_manager = VersionManager()
         summarizer = DocumentSummarizer()
         embedding_engine = EmbeddingEngine()
         vector_store = VectorStore()
+        version_manager = VersionManager(content_loader=vector_store.get_document_content)
+        manifest = IndexManifest()
 
         if batch:
             # Process all documents in directory
             directory = Path(document_path)
             docx_files = list(directory.glob("*.docx"))
+            stale, parents = _stale_manifest_entries(manifest, vector_store, docx_files)
 
             formatter.format_progress_bar(0, len(docx_files), "Processing documents")
 
-            for i, file_path in enumerate(docx_files):
-                _process_single_document(
-                    str(file_path),
-                    processor,
-                    metadata_extractor,
-                    version_manager,
-                    summarizer,
-                    embedding_engine,
-                    vector_store,
-                )
-                formatter.format_progress_bar(
-                    i + 1, len(docx_files), "Processing documents"
-                )
-
-            formatter.format_success(f"Added {len(docx_files)} documents to the system")
+            pipeline = IngestionPipeline(
+                processor,
+                metadata_extractor,
+                version_manager,
+                summarizer,
+                embedding_engine,
+                vector_store,
+                workers=workers,
+            )
+            run = pipeline.run(
+                docx_files,
+                progress_callback=lambda done, total: formatter.format_progress_bar(
+                    done, total, "Processing documents"
+                ),
+                parents=parents,
+                superseded=list(stale.values()),
+            )
+            added_count = _report_pipeline_run(run, manifest)
+            _retire_replaced_documents(
+                manifest,
+                vector_store,
+                version_manager,
+                stale,
+                [
+                    result["file_path"]
+                    for result in run["results"]
+                    if result is not None and not result.get("error")
+                ],
+            )
+
+            formatter.format_success(f"Added {added_count} documents to the system")
         else:
             # Process single document
+            stale, parents = _stale_manifest_entries(manifest, vector_store, [document_path])
             result = _process_single_document(
                 document_path,
                 processor,
@@ -134,9 +182,18 @@ def add(document_path, batch):
                 summarizer,
                 embedding_engine,
                 vector_store,
+                parents=parents,
+                superseded=list(stale.values()),
+            )
+
+            manifest.record(document_path, result["document_id"])
+            _retire_replaced_documents(
+                manifest, vector_store, version_manager, stale, [document_path]
             )
 
             formatter.format_success(f"Added document: {result['document_id']}")
+            if result["reuse"]["documents"]:
+                formatter.format_reuse_stats(result["reuse"])
 
     except Exception as e:
         formatter.format_error(f"Failed to add document: {str(e)}")
@@ -225,6 +282,10 @@ def reset():
         success = vector_store.reset_collection()
 
         if success:
+            manifest = IndexManifest()
+            manifest.clear()
+            manifest.save()
+            VersionManager().reset()
             formatter.format_success("Database reset successfully")
         else:
             formatter.format_error("Failed to reset database")
@@ -234,18 +295,74 @@ def reset():
         sys.exit(1)
 
 
+@cli.command()
+@click.argument("document_ids", nargs=-1)
+@click.option("--client", "-c", help="Delete all documents of a client")
+@click.option("--rfp-type", "-t", help="Delete all documents of an RFP type")
+def delete(document_ids, client, rfp_type):
+    """Delete documents (and their chunks) by ID or metadata filter"""
+    try:
+        filters = {}
+        if client:
+            filters["client_name"] = client
+        if rfp_type:
+            filters["rfp_type"] = rfp_type
+
+        if not document_ids and not filters:
+            formatter.format_error("Give document IDs or a --client/--rfp-type filter")
+            return
+        if filters and not click.confirm(f"Delete all documents matching {filters}?"):
+            return
+
+        where = None
+        if filters:
+            where = (
+                {"$and": [{k: v} for k, v in filters.items()]}
+                if len(filters) > 1
+                else filters
+            )
+
+        vector_store = VectorStore()
+        statuses = vector_store.delete_documents(list(document_ids), where=where)
+
+        deleted = [s["id"] for s in statuses if s["status"] == "deleted"]
+        for status in statuses:
+            if status["status"] == "not_found":
+                formatter.format_error(f"Document {status['id']} not found")
+            elif status["status"] == "error":
+                formatter.format_error(f"Failed to delete {status['id']}: {status['error']}")
+
+        manifest = IndexManifest()
+        manifest.remove_documents(deleted)
+        manifest.save()
+        VersionManager().remove_documents(deleted)
+
+        formatter.format_success(f"Deleted {len(deleted)} documents")
+
+    except Exception as e:
+        formatter.format_error(f"Failed to delete documents: {str(e)}")
+        sys.exit(1)
+
+
 @cli.command()
 @click.option("--directory", "-d", default=".", help="Directory to scan for documents")
-def index(directory):
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    default=settings.ingestion_workers,
+    help="Number of parallel ingestion workers",
+)
+def index(directory, workers):
     """Index all RFP documents in a directory"""
     try:
         # Initialize all components
         processor = DocumentProcessor()
         metadata_extractor = MetadataExtractor()
-        version_manager = VersionManager()
         summarizer = DocumentSummarizer()
         embedding_engine = EmbeddingEngine()
         vector_store = VectorStore()
+        version_manager = VersionManager(content_loader=vector_store.get_document_content)
 
         # Find all DOCX files
         directory_path = Path(directory)
@@ -255,49 +372,53 @@ def index(directory):
             formatter.format_error(f"No DOCX files found in {directory}")
             return
 
-        # Get existing documents to avoid duplicates
-        existing_docs = {}
-        try:
-            all_doc_ids = vector_store.list_all_documents()
-            for doc_id in all_doc_ids:
-                doc_info = vector_store.get_document_by_id(doc_id)
-                if doc_info:
-                    existing_docs[doc_id] = doc_info
-        except:
-            existing_docs = {}
+        # Compare files on disk with the manifest of already indexed files
+        manifest = IndexManifest()
+        if not manifest.exists():
+            _bootstrap_manifest(manifest, vector_store)
+
+        plan = manifest.plan(docx_files, directory)
 
-        formatter.format_progress_bar(0, len(docx_files), "Indexing documents")
+        # Drop vectors of files that were removed or changed since the last run
+        stale_entries = plan["removed"] + plan["modified"]
+        stale_ids = [entry["document_id"] for entry in stale_entries]
+        parents = _delete_stale_documents(vector_store, stale_ids)
+        for entry in stale_entries:
+            manifest.remove(entry["path"])
 
+        files_to_index = plan["new"] + [entry["path"] for entry in plan["modified"]]
         processed_count = 0
-        for i, file_path in enumerate(docx_files):
-            try:
-                # Check if already indexed
-                filename = file_path.name
-                already_indexed = any(
-                    doc.get("metadata", {}).get("filename") == filename
-                    for doc in existing_docs.values()
-                )
-
-                if not already_indexed:
-                    result = _process_single_document(
-                        str(file_path),
-                        processor,
-                        metadata_extractor,
-                        version_manager,
-                        summarizer,
-                        embedding_engine,
-                        vector_store,
-                        existing_docs,
-                    )
-                    processed_count += 1
-
-            except Exception as e:
-                formatter.format_error(f"Failed to process {file_path.name}: {str(e)}")
-
-            formatter.format_progress_bar(i + 1, len(docx_files), "Indexing documents")
+
+        if files_to_index:
+            formatter.format_progress_bar(0, len(files_to_index), "Indexing documents")
+
+            pipeline = IngestionPipeline(
+                processor,
+                metadata_extractor,
+                version_manager,
+                summarizer,
+                embedding_engine,
+                vector_store,
+                workers=workers,
+            )
+            run = pipeline.run(
+                files_to_index,
+                progress_callback=lambda done, total: formatter.format_progress_bar(
+                    done, total, "Indexing documents"
+                ),
+                parents=parents,
+                superseded=stale_ids,
+            )
+            processed_count = _report_pipeline_run(run, manifest)
+
+        # Removed and replaced documents stay in the version lineage but are no longer matched
+        version_manager.remove_documents(stale_ids)
+
+        manifest.save()
 
         formatter.format_success(
-            f"Indexed {processed_count} new documents from {directory}"
+            f"Indexed {processed_count} new or modified documents from {directory} "
+            f"({len(plan['unchanged'])} unchanged, {len(plan['removed'])} removed)"
         )
 
     except Exception as e:
@@ -305,6 +426,98 @@ def index(directory):
         sys.exit(1)
 
 
+def _report_pipeline_run(run: Dict[str, Any], manifest: IndexManifest = None) -> int:
+    """Report per-file failures and stage throughput, return the success count"""
+    succeeded = 0
+    for result in run["results"]:
+        if result is None:
+            continue
+        if result.get("error"):
+            formatter.format_error(
+                f"Failed to process {Path(result['file_path']).name}: {result['error']}"
+            )
+        else:
+            succeeded += 1
+            if manifest is not None:
+                manifest.record(result["file_path"], result["document_id"])
+
+    formatter.format_pipeline_stats(run["stats"], run["elapsed_seconds"])
+    if run["reuse"]["documents"]:
+        formatter.format_reuse_stats(run["reuse"])
+    return succeeded
+
+
+def _bootstrap_manifest(manifest: IndexManifest, vector_store: VectorStore):
+    """Seed a missing manifest from documents indexed before manifests existed"""
+    for document_id, file_path in vector_store.list_document_files().items():
+        if file_path and os.path.exists(file_path):
+            manifest.record(file_path, document_id)
+
+
+def _stale_manifest_entries(
+    manifest: IndexManifest, vector_store: VectorStore, file_paths: List[str]
+) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]:
+    """
+    Document IDs (by normalized path) of files that are about to be re-added,
+    and their reusable enrichment. Nothing is deleted yet: a file that fails
+    to process keeps its old document and manifest entry.
+    """
+    stale = {}
+    for file_path in file_paths:
+        entry = manifest.get(file_path)
+        if entry:
+            stale[manifest.normalize_path(file_path)] = entry["document_id"]
+    return stale, snapshot_parent_enrichments(vector_store, list(stale.values()))
+
+
+def _retire_replaced_documents(
+    manifest: IndexManifest,
+    vector_store: VectorStore,
+    version_manager: VersionManager,
+    stale: Dict[str, str],
+    written_paths: List[str],
+):
+    """
+    Save the manifest with the newly written documents, then delete the
+    documents they replace. Replaced documents stay in the version lineage
+    but are no longer matched.
+    """
+    manifest.save()
+    stale_ids = [
+        stale[path]
+        for path in map(manifest.normalize_path, written_paths)
+        if path in stale
+    ]
+    _delete_documents(vector_store, stale_ids)
+    version_manager.remove_documents(stale_ids)
+
+
+def _delete_stale_documents(
+    vector_store: VectorStore, document_ids: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Delete superseded vectors; fail before re-indexing would duplicate them.
+    Returns their enrichment, which unchanged or slightly edited re-indexed
+    files can reuse.
+    """
+    parents = snapshot_parent_enrichments(vector_store, document_ids)
+    _delete_documents(vector_store, document_ids)
+    return parents
+
+
+def _delete_documents(vector_store: VectorStore, document_ids: List[str]):
+    """Delete documents, raising if any of them could not be deleted"""
+    failed = [
+        status
+        for status in vector_store.delete_documents(document_ids)
+        if status["status"] == "error"
+    ]
+    if failed:
+        raise RuntimeError(
+            f"Could not delete {len(failed)} stale documents: {failed[0]['error']}"
+        )
+
+
 def _process_single_document(
     file_path,
     processor,
@@ -314,75 +527,85 @@ def _process_single_document(
     embedding_engine,
     vector_store,
     existing_docs=None,
+    parents=None,
+    superseded=None,
 ):
     """Process a single document through the complete pipeline"""
 
-    # 1. Extract text and basic metadata
-    doc_data = processor.process_document(file_path)
+    # 1-2. Extract text, section chunks, basic and enhanced metadata
+    extracted = extract_document(file_path, processor, metadata_extractor)
+    doc_data = extracted["doc_data"]
     content = doc_data["content"]
-    filename_metadata = doc_data["filename_metadata"]
+    enhanced_metadata = extracted["enhanced_metadata"]
 
-    # 2. Extract enhanced metadata
-    enhanced_metadata = metadata_extractor.extract_comprehensive_metadata(
-        content, file_path, filename_metadata
-    )
-
-    # 3. Determine version
+    # 3. Generate document ID, determine and register its version
     if existing_docs is None:
         existing_docs = {}
 
-    version, is_duplicate, parent_id = version_manager.determine_version(
-        content, file_path, existing_docs
-    )
-
-    # 4. Generate summary
-    summary = summarizer.generate_summary(content, enhanced_metadata)
-
-    # 5. Extract key points
-    key_points = summarizer.generate_key_points(content, enhanced_metadata)
-
-    # 6. Classify complexity
-    complexity = summarizer.classify_document_complexity(content, enhanced_metadata)
-
-    # 7. Generate document ID
     import uuid
 
     document_id = str(uuid.uuid4())
+    version, is_duplicate, parent_id = version_manager.assign_version(
+        document_id, content, file_path, existing_docs, signature=extracted["minhash"],
+        superseded=superseded
+    )
 
-    # 8. Prepare final metadata (convert lists to strings for ChromaDB compatibility)
-    final_metadata = {
-        **enhanced_metadata,
-        "content_summary": summary,
-        "key_points": ", ".join(key_points)
-        if isinstance(key_points, list)
-        else key_points,
-        "complexity": complexity,
-        "document_version": version,
-        "is_duplicate": is_duplicate,
-        "parent_document_id": parent_id,
-        "word_count": doc_data["stats"]["word_count"],
-        "file_path": file_path,
-        "processing_date": doc_data["processing_timestamp"],
-    }
-
-    # Convert any list values in enhanced_metadata to strings
-    for key, value in final_metadata.items():
-        if isinstance(value, list):
-            final_metadata[key] = ", ".join(str(v) for v in value)
-
-    # 9. Generate embedding
-    embedding = embedding_engine.generate_document_embedding(content, final_metadata)
-
-    # 10. Add to vector store
-    vector_store.add_document(document_id, content, embedding, final_metadata)
+    reuse = {"documents": 0, "llm_calls_avoided": 0, "embeddings_avoided": 0}
+    reused_embeddings = {}
+    try:
+        # 4-6. Generate summary, key points and complexity, or take the parent's
+        parent = None
+        if settings.enrichment_reuse_enabled and is_duplicate and parent_id:
+            parent = (parents or {}).get(parent_id) or load_parent_enrichment(
+                vector_store, parent_id
+            )
+        if parent is not None and can_reuse_enrichment(content, parent):
+            enrichment = parent["enrichment"]
+            reused_embeddings = parent["chunk_embeddings"]
+            reuse["documents"] = 1
+            reuse["llm_calls_avoided"] = ENRICHMENT_CALLS
+        else:
+            enrichment = enrich_document(content, enhanced_metadata, summarizer)
+
+        # 7. Prepare final metadata (convert lists to strings for ChromaDB compatibility)
+        final_metadata = build_final_metadata(
+            enhanced_metadata,
+            enrichment,
+            version,
+            is_duplicate,
+            parent_id,
+            doc_data,
+            file_path,
+        )
 
-    # 11. Register in version manager
-    version_manager.register_document(document_id, file_path, content, version)
+        # 8-9. Embed section chunks and add the document and its chunks to the vector store
+        written = write_documents(
+            embedding_engine,
+            vector_store,
+            [
+                {
+                    "document_id": document_id,
+                    "content": content,
+                    "metadata": final_metadata,
+                    "chunks": extracted["chunks"],
+                    "term_counts": extracted["term_counts"],
+                    "reused_embeddings": reused_embeddings,
+                }
+            ],
+        )
+        reuse["embeddings_avoided"] = written["embeddings_reused"]
+        if written["errors"]:
+            raise RuntimeError(written["errors"][document_id])
+    except Exception:
+        # Never written: drop it from the version registry again
+        version_manager.remove_documents([document_id], keep_history=False)
+        raise
 
     return {
         "document_id": document_id,
         "version": version,
         "is_duplicate": is_duplicate,
+        "reuse": reuse,
     }
 
 
@@ -32,15 +32,22 @@ class OutputFormatter:
         table.add_column("Service", style="yellow", width=20)
 
         if verbose:
+            table.add_column("Best Section", style="cyan", width=20)
             table.add_column("Summary", style="dim", width=40)
 
         for i, result in enumerate(results, 1):
             metadata = result.get("metadata", {})
             similarity = result.get("similarity_score", 0)
+            if result.get("search_type") == "keyword" or similarity is None:
+                # No vector similarity without a query embedding; show BM25 instead
+                keyword_score = (result.get("chunks") or [{}])[0].get("keyword_score", 0)
+                similarity_text = f"bm25 {keyword_score:.1f}"
+            else:
+                similarity_text = f"{similarity:.3f}"
 
             row_data = [
                 str(i),
-                f"{similarity:.3f}",
+                similarity_text,
                 result.get("document_id", "N/A")[:22] + "..."
                 if len(result.get("document_id", "")) > 22
                 else result.get("document_id", "N/A"),
@@ -56,6 +63,9 @@ class OutputFormatter:
             ]
 
             if verbose:
+                chunks = result.get("chunks") or [{}]
+                section = chunks[0].get("section_title") or "-"
+                row_data.append(section[:17] + "..." if len(section) > 17 else section)
                 summary = metadata.get("content_summary", "No summary available")
                 row_data.append(summary[:37] + "..." if len(summary) > 37 else summary)
 
@@ -128,15 +138,40 @@ class OutputFormatter:
         table.add_row(
             "Vector Store",
             "Active" if vector_stats.get("document_count", 0) > 0 else "Empty",
-            f"{vector_stats.get('document_count', 0)} documents in {vector_stats.get('collection_name', 'Unknown')}",
+            f"{vector_stats.get('document_count', 0)} documents ({vector_stats.get('chunk_count', 0)} chunks) in {vector_stats.get('collection_name', 'Unknown')}",
         )
+        if vector_stats.get("backend") == "numpy":
+            table.add_row(
+                "Vector Index",
+                "NumPy",
+                f"Quantization: {vector_stats.get('quantization', 'none')}, resident "
+                f"{vector_stats.get('resident_bytes', 0) / 2**20:.1f} MiB of "
+                f"{vector_stats.get('float32_bytes', 0) / 2**20:.1f} MiB float32",
+            )
+        keyword_stats = vector_stats.get("keyword_index")
+        if keyword_stats:
+            table.add_row(
+                "Keyword Index",
+                "BM25",
+                f"{keyword_stats.get('chunks', 0)} chunks, {keyword_stats.get('terms', 0)} terms",
+            )
+        term_stats = vector_stats.get("term_index")
+        if term_stats:
+            table.add_row(
+                "Key Terms",
+                "TF-IDF",
+                f"{term_stats.get('documents', 0)} documents, {term_stats.get('terms', 0)} terms",
+            )
 
         # Embedding status
         embedding_stats = status.get("embeddings", {})
         table.add_row(
             "Embedding Engine",
             "Ready",
-            f"Model: {embedding_stats.get('model', 'Unknown')}, Cache: {embedding_stats.get('cache_size', 0)} items",
+            f"Model: {embedding_stats.get('model', 'Unknown')}, Cache: {embedding_stats.get('cache_size', 0)} items "
+            f"({embedding_stats.get('cache_bytes', 0) / 2**20:.1f} MiB), "
+            f"hits {embedding_stats.get('cache_hits', 0)} / misses {embedding_stats.get('cache_misses', 0)} "
+            f"({embedding_stats.get('cache_hit_rate', 0):.0%})",
         )
 
         # RAG Engine status
@@ -215,6 +250,37 @@ class OutputFormatter:
 
         self.console.print(table)
 
+    def format_pipeline_stats(
+        self, stats: Dict[str, Dict[str, Any]], elapsed_seconds: float = 0.0
+    ) -> None:
+        """Display per-stage ingestion throughput"""
+
+        table = Table(title=f"Ingestion Pipeline ({elapsed_seconds:.1f}s total)")
+        table.add_column("Stage", style="cyan", width=10)
+        table.add_column("Items", style="white", width=8)
+        table.add_column("Busy (s)", style="yellow", width=10)
+        table.add_column("Wall (s)", style="yellow", width=10)
+        table.add_column("Items/s", style="green", width=10)
+
+        for stage, stage_stats in stats.items():
+            table.add_row(
+                stage,
+                str(stage_stats.get("items", 0)),
+                f"{stage_stats.get('busy_seconds', 0):.2f}",
+                f"{stage_stats.get('wall_seconds', 0):.2f}",
+                f"{stage_stats.get('items_per_second', 0):.2f}",
+            )
+
+        self.console.print(table)
+
+    def format_reuse_stats(self, reuse: Dict[str, int]) -> None:
+        """Display the enrichment reused from duplicates' parents"""
+        self.console.print(
+            f"[cyan]Reused parent enrichment for {reuse.get('documents', 0)} duplicate documents:[/cyan] "
+            f"{reuse.get('llm_calls_avoided', 0)} LLM calls and "
+            f"{reuse.get('embeddings_avoided', 0)} chunk embeddings avoided"
+        )
+
     def format_json_output(self, data: Any, indent: int = 2) -> str:
         """Format data as JSON string"""
         return json.dumps(data, indent=indent, ensure_ascii=False)
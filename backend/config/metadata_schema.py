@@ -133,6 +133,90 @@ EQUIPMENT_TYPE_PATTERNS = {
     "Tower": ["tower", "enhancement"],
 }
 
+# Client name patterns
+CLIENT_PATTERNS = {
+    "CESC_Kolkata": ["cesc kolkata", "cesc"],
+    "CPDL": ["cpdl"],
+    "CESC_Rajasthan": ["cesc rajasthan"],
+    "MPSL": ["mpsl"],
+    "CDPL": ["cdpl"],
+    "General": ["general", "common"],
+}
+
+# Document purpose patterns, checked in order ("supplement" is matched on the filename)
+DOCUMENT_PURPOSE_PATTERNS = {
+    "supplement": ["annexure", "attachment", "supplementary"],
+    "template": ["template", "format", "boilerplate"],
+    "contract": ["contract", "agreement", "terms"],
+    "specification": ["specification", "requirements", "scope"],
+    "requirement": ["tender", "bid", "proposal"],
+}
+
+# Section type patterns, matched against section headings
+SECTION_TYPE_PATTERNS = {
+    "Background": ["background", "introduction", "overview", "preamble", "about"],
+    "Scope_of_Work": ["scope of work", "scope of supply", "scope", "work description"],
+    "Technical_Specification": [
+        "technical specification",
+        "specification",
+        "technical requirement",
+        "technical particulars",
+        "guaranteed technical",
+        "gtp",
+    ],
+    "Deliverables": ["deliverables", "documents to be submitted", "drawings"],
+    "Vendor_Qualifications": [
+        "qualification",
+        "eligibility",
+        "experience",
+        "credentials",
+    ],
+    "Proposal_Format": [
+        "technical bid",
+        "price bid",
+        "bid format",
+        "proforma",
+        "schedule of rates",
+        "bill of quantities",
+        "boq",
+    ],
+    "Submission_Instructions": [
+        "submission",
+        "instruction to bidders",
+        "instructions to bidders",
+        "validity of bid",
+        "emd",
+        "earnest money",
+        "contact person",
+    ],
+    "Evaluation_Criteria": ["evaluation", "selection criteria", "award"],
+    "Payment_Terms": ["payment", "price basis", "prices", "billing", "invoice", "taxes"],
+    "Delivery_Schedule": [
+        "delivery",
+        "completion",
+        "time schedule",
+        "timeline",
+        "milestone",
+    ],
+    "Contract_Terms": [
+        "terms and conditions",
+        "terms & conditions",
+        "general conditions",
+        "contract",
+        "penalty",
+        "liquidated damages",
+        "termination",
+        "arbitration",
+        "force majeure",
+        "security deposit",
+        "bank guarantee",
+    ],
+    "Insurance": ["insurance"],
+    "Warranty": ["warranty", "guarantee period", "defect liability"],
+    "Safety": ["safety", "hse", "gate pass", "ppe", "hazard", "environment"],
+    "References": ["references", "client list", "past performance"],
+}
+
 
 def validate_metadata(metadata: Dict[str, Any]) -> bool:
     """Validate metadata against schema requirements"""
@@ -156,6 +240,17 @@ def get_dynamic_rfp_types() -> List[str]:
     return list(RFP_TYPE_PATTERNS.keys()) + ["Unknown", "Custom"]
 
 
+# Bumped whenever a pattern table changes, so compiled matchers are rebuilt
+_pattern_version = 0
+
+
 def add_custom_rfp_type(rfp_type: str, keywords: List[str], weight: float = 1.0):
     """Add a new custom RFP type for dynamic categorization"""
+    global _pattern_version
     RFP_TYPE_PATTERNS[rfp_type] = {"keywords": keywords, "weight": weight}
+    _pattern_version += 1
+
+
+def get_pattern_version() -> int:
+    """Version of the keyword pattern tables"""
+    return _pattern_version
@@ -4,9 +4,13 @@ from .metadata_schema import (
     DOCUMENT_TYPE_PATTERNS,
     SERVICE_CATEGORY_PATTERNS,
     EQUIPMENT_TYPE_PATTERNS,
+    SECTION_TYPE_PATTERNS,
+    CLIENT_PATTERNS,
+    DOCUMENT_PURPOSE_PATTERNS,
     validate_metadata,
     get_dynamic_rfp_types,
     add_custom_rfp_type,
+    get_pattern_version,
 )
 
 __all__ = [
@@ -15,7 +19,11 @@ __all__ = [
     "DOCUMENT_TYPE_PATTERNS",
     "SERVICE_CATEGORY_PATTERNS",
     "EQUIPMENT_TYPE_PATTERNS",
+    "SECTION_TYPE_PATTERNS",
+    "CLIENT_PATTERNS",
+    "DOCUMENT_PURPOSE_PATTERNS",
     "validate_metadata",
     "get_dynamic_rfp_types",
     "add_custom_rfp_type",
+    "get_pattern_version",
 ]
@@ -9,18 +9,98 @@ class Settings(BaseSettings):
     openai_api_key: str
     openai_embedding_model: str = "text-embedding-3-small"
     openai_model: str = "gpt-3.5-turbo"
+    openai_context_tokens: int = 16385
 
     # ChromaDB Configuration
     chroma_persist_dir: str = "./chroma_data"
     chroma_collection_name: str = "rfp_templates"
+    vector_backend: str = "chroma"  # "chroma" or "numpy" (in-process exact search mirror)
+    vector_quantization: str = "int8"  # numpy backend first pass: "int8", "none" or "binary" (lossy)
+    vector_rerank_factor: int = 10  # candidates rescored in float32 per requested result
 
     # Search Configuration
     max_search_results: int = 10
     similarity_threshold: float = 0.0
 
     # Processing Configuration
-    batch_size: int = 5
+    batch_size: int = 100  # max inputs per embeddings request
     max_tokens: int = 8191
+    embedding_max_request_tokens: int = 300000
+    embedding_max_concurrency: int = 4
+    embedding_max_retries: int = 3
+
+    # Summarizer input budgets (tokens of document content per call)
+    summary_input_tokens: int = 12000
+    key_points_input_tokens: int = 6000
+    complexity_input_tokens: int = 3000
+
+    # Embedding Cache Configuration
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = ""  # defaults to <chroma_persist_dir>/embedding_cache.sqlite3
+    embedding_cache_max_mb: int = 1024
+
+    # Ingestion Pipeline Configuration
+    docx_extractor: str = "python-docx"  # "python-docx" or "streaming"
+    ingestion_workers: int = 4
+    vector_write_batch_size: int = 64
+    vector_max_batch_size: int = 5000  # used when ChromaDB cannot report its own limit
+
+    # Version Detection Configuration
+    version_registry_path: str = ""  # defaults to <chroma_persist_dir>/version_registry.sqlite3
+    shingle_words: int = 3  # words per shingle for near-duplicate detection
+    minhash_permutations: int = 128
+    minhash_bands: int = 32  # LSH bands; must divide minhash_permutations
+    version_minor_similarity: float = 0.85  # shingle Jaccard at or above which a same-name document is a minor revision
+    version_major_similarity: float = 0.55  # below this it is a new document despite the name
+    enrichment_reuse_enabled: bool = True  # duplicates take their parent's summary, key points, complexity and embeddings
+    enrichment_reuse_max_change: float = 0.05  # largest share of a revision's shingles not in its parent for reuse
+
+    # Chunking Configuration
+    chunk_max_tokens: int = 400
+    chunk_overlap_tokens: int = 50
+    search_chunks_per_document: int = 3  # best chunks returned per matching document
+    search_chunk_candidates: int = 50  # chunks fetched from the index before grouping
+
+    # Hybrid Search Configuration
+    search_type: str = "hybrid"  # "hybrid", "vector" or "keyword"
+    keyword_index_enabled: bool = True
+    keyword_index_path: str = ""  # defaults to <chroma_persist_dir>/keyword_index.sqlite3
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+    hybrid_vector_weight: float = 1.0
+    hybrid_keyword_weight: float = 1.0
+    rrf_k: int = 60  # reciprocal rank fusion constant
+    search_embedding_timeout: float = 5.0  # seconds before hybrid search falls back to keywords
+
+    # Key Term Configuration
+    key_terms_enabled: bool = True
+    key_term_index_path: str = ""  # defaults to <chroma_persist_dir>/term_index.sqlite3
+    key_terms_per_document: int = 15  # top TF-IDF terms stored in the key_terms metadata
+    key_term_max_ngram: int = 2  # longest phrase counted as a term
+
+    # API Service Configuration
+    openai_max_connections: int = 20  # pooled HTTP connections shared by all services
+    openai_timeout: float = 60.0
+    vector_store_workers: int = 8  # threads for blocking vector store / embedding calls from the API
+    warm_up_on_startup: bool = True
+    openai_requests_per_minute: int = 0  # client-side limit for the API's OpenAI calls; 0 = unlimited
+    openai_burst_requests: int = 10
+
+    # Section Generation Configuration
+    generation_max_concurrency: int = 6  # sections generated at once per request
+    generation_deadline_seconds: float = 120.0  # sections unfinished by then use the fallback
+    old_section_passages: int = 4  # retrieved past-tender passages per OLD section prompt
+    old_section_passage_tokens: int = 400  # each passage is truncated to this many tokens
+    generation_job_workers: int = 2  # background generation jobs run at once (POST /api/jobs/generate)
+    generation_job_deadline_seconds: float = 0.0  # per generation round of a background job; 0 = no deadline
+    generation_job_section_attempts: int = 3  # rounds a job retries failed sections before it fails
+
+    # Section Response Cache Configuration
+    response_cache_enabled: bool = True
+    response_cache_path: str = ""  # defaults to <chroma_persist_dir>/response_cache.sqlite3
+    response_cache_ttl_seconds: int = 7 * 24 * 3600
+    response_cache_max_entries: int = 5000  # least recently used entries are evicted beyond this
+    response_cache_draft_similarity: float = 0.95  # context similarity at which a cached section is offered as a draft
 
     # Logging
     log_level: str = "INFO"
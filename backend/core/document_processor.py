@@ -1,8 +1,13 @@
 from docx import Document
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import logging
 from datetime import datetime
+from config.settings import settings
+from core.docx_stream import DocxBlock, iter_docx_blocks
 
 logger = logging.getLogger(__name__)
 
@@ -10,36 +15,65 @@ logger = logging.getLogger(__name__)
 class DocumentProcessor:
     """Handles extraction and processing of DOCX documents"""
 
-    def __init__(self):
+    def __init__(self, extractor: Optional[str] = None):
         self.supported_extensions = [".docx", ".doc"]
+        # "python-docx" (full object model) or "streaming" (iterparse over document.xml)
+        self.extractor = extractor or settings.docx_extractor
 
     def extract_text_from_docx(self, file_path: str) -> str:
         """Extract full text content from DOCX file"""
-        try:
-            doc = Document(file_path)
-            full_text = []
-
-            # Extract text from paragraphs
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    full_text.append(para.text.strip())
+        return "\n".join(block.text for block in self.extract_blocks(file_path))
 
-            # Extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = []
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            row_text.append(cell.text.strip())
-                    if row_text:
-                        full_text.append(" | ".join(row_text))
+    def extract_blocks(self, file_path: str) -> List[DocxBlock]:
+        """Extract paragraphs (with style and numbering) and table rows, in document order"""
+        if self.extractor == "streaming":
+            try:
+                return list(iter_docx_blocks(file_path))
+            except Exception as e:
+                logger.error(f"Error extracting text from {file_path}: {str(e)}")
+                raise
 
-            return "\n".join(full_text)
+        try:
+            doc = Document(file_path)
+            blocks = []
+
+            # Walk the body so tables stay between the paragraphs around them
+            for element in doc.element.body.iterchildren():
+                if element.tag == qn("w:p"):
+                    para = Paragraph(element, doc)
+                    if para.text.strip():
+                        blocks.append(
+                            DocxBlock(
+                                "paragraph",
+                                para.text.strip(),
+                                para.style.name if para.style is not None else None,
+                                self._numbering_level(para),
+                            )
+                        )
+                elif element.tag == qn("w:tbl"):
+                    for row in Table(element, doc).rows:
+                        row_text = []
+                        for cell in row.cells:
+                            if cell.text.strip():
+                                row_text.append(cell.text.strip())
+                        if row_text:
+                            blocks.append(DocxBlock("table_row", " | ".join(row_text)))
+
+            return blocks
 
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {str(e)}")
             raise
 
+    @staticmethod
+    def _numbering_level(para) -> Optional[int]:
+        """List numbering level of a python-docx paragraph, if it is numbered"""
+        pPr = para._p.pPr
+        if pPr is None or pPr.numPr is None:
+            return None
+        ilvl = pPr.numPr.ilvl
+        return ilvl.val if ilvl is not None else 0
+
     def extract_filename_metadata(self, file_path: str) -> Dict[str, str]:
         """Extract metadata from filename patterns"""
         filename = os.path.basename(file_path)
@@ -97,8 +131,9 @@ class DocumentProcessor:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        # Extract text content
-        content = self.extract_text_from_docx(file_path)
+        # Extract text content (blocks keep headings for section-aware chunking)
+        blocks = self.extract_blocks(file_path)
+        content = "\n".join(block.text for block in blocks)
 
         # Extract filename metadata
         filename_metadata = self.extract_filename_metadata(file_path)
@@ -108,6 +143,7 @@ class DocumentProcessor:
 
         return {
             "content": content,
+            "blocks": blocks,
             "file_path": file_path,
             "filename_metadata": filename_metadata,
             "stats": stats,
@@ -0,0 +1,144 @@
+"""
+Streaming DOCX text extraction.
+
+Reads word/document.xml straight from the zip archive with incremental
+iterparse instead of building the python-docx object model. Paragraphs and
+table rows are yielded in document order; merged cells are emitted once.
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Iterator, List, NamedTuple, Optional
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+_BODY = W_NS + "body"
+_PARAGRAPH = W_NS + "p"
+_TABLE = W_NS + "tbl"
+_ROW = W_NS + "tr"
+_CELL = W_NS + "tc"
+_TEXT = W_NS + "t"
+_TAB = W_NS + "tab"
+_BREAKS = (W_NS + "br", W_NS + "cr")
+_PARAGRAPH_STYLE = W_NS + "pStyle"
+_NUMBERING_LEVEL = W_NS + "ilvl"
+_NUMBERING = W_NS + "numPr"
+_VERTICAL_MERGE = W_NS + "vMerge"
+_VAL = W_NS + "val"
+
+
+class DocxBlock(NamedTuple):
+    """A paragraph or table row in document order"""
+
+    kind: str  # "paragraph" or "table_row"
+    text: str
+    style: Optional[str] = None  # paragraph style ID, e.g. "Heading1"
+    num_level: Optional[int] = None  # list numbering level if the paragraph is numbered
+
+
+class _ParagraphState:
+    __slots__ = ("parts", "style", "num_level")
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.style: Optional[str] = None
+        self.num_level: Optional[int] = None
+
+
+class _CellState:
+    __slots__ = ("paragraphs", "merged_continuation")
+
+    def __init__(self):
+        self.paragraphs: List[str] = []
+        self.merged_continuation = False
+
+
+def iter_docx_blocks(file_path: str) -> Iterator[DocxBlock]:
+    """Yield paragraphs and de-duplicated table rows from a DOCX file"""
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open("word/document.xml") as xml_file:
+            yield from _iter_blocks(xml_file)
+
+
+def _iter_blocks(xml_file) -> Iterator[DocxBlock]:
+    paragraphs: List[_ParagraphState] = []
+    cells: List[_CellState] = []
+    rows: List[List[str]] = []
+    table_depth = 0
+    depth = 0
+    body = None
+    body_depth = -1
+
+    for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+        tag = elem.tag
+
+        if event == "start":
+            depth += 1
+            if tag == _PARAGRAPH:
+                paragraphs.append(_ParagraphState())
+            elif tag == _CELL:
+                cells.append(_CellState())
+            elif tag == _ROW:
+                rows.append([])
+            elif tag == _TABLE:
+                table_depth += 1
+            elif tag == _BODY:
+                body = elem
+                body_depth = depth
+            continue
+
+        depth -= 1
+
+        if tag == _TEXT:
+            if paragraphs and elem.text:
+                paragraphs[-1].parts.append(elem.text)
+        elif tag == _TAB:
+            if paragraphs:
+                paragraphs[-1].parts.append("\t")
+        elif tag in _BREAKS:
+            if paragraphs:
+                paragraphs[-1].parts.append("\n")
+        elif tag == _PARAGRAPH_STYLE:
+            if paragraphs:
+                paragraphs[-1].style = elem.get(_VAL)
+        elif tag == _NUMBERING_LEVEL:
+            if paragraphs and elem.get(_VAL, "").isdigit():
+                paragraphs[-1].num_level = int(elem.get(_VAL))
+        elif tag == _NUMBERING:
+            if paragraphs and paragraphs[-1].num_level is None:
+                paragraphs[-1].num_level = 0
+        elif tag == _VERTICAL_MERGE:
+            # <w:vMerge/> or val="continue" marks a cell covered by the one above
+            if cells and elem.get(_VAL, "continue") == "continue":
+                cells[-1].merged_continuation = True
+        elif tag == _PARAGRAPH:
+            paragraph = paragraphs.pop()
+            text = "".join(paragraph.parts)
+            if cells and table_depth > 0:
+                cells[-1].paragraphs.append(text)
+            elif text.strip():
+                yield DocxBlock(
+                    "paragraph", text.strip(), paragraph.style, paragraph.num_level
+                )
+            elem.clear()
+        elif tag == _CELL:
+            cell = cells.pop()
+            text = "\n".join(cell.paragraphs).strip()
+            if rows and text and not cell.merged_continuation:
+                row = rows[-1]
+                # Horizontally repeated content counts once
+                if not row or row[-1] != text:
+                    row.append(text)
+            elem.clear()
+        elif tag == _ROW:
+            row = rows.pop()
+            if row:
+                yield DocxBlock("table_row", " | ".join(row))
+            elem.clear()
+        elif tag == _TABLE:
+            table_depth -= 1
+            elem.clear()
+
+        # Release finished top-level blocks so memory stays flat
+        if body is not None and depth == body_depth:
+            body.clear()
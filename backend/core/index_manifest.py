@@ -0,0 +1,162 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when a change to the ingestion pipeline requires re-processing every file
+PIPELINE_VERSION = "2"
+
+
+class IndexManifest:
+    """Persistent record of indexed files used for incremental re-indexing"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(
+            settings.chroma_persist_dir, "index_manifest.json"
+        )
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def exists(self) -> bool:
+        """Whether a manifest has been written before"""
+        return os.path.exists(self.path)
+
+    def load(self):
+        """Load manifest entries from disk"""
+        if not self.exists():
+            self.entries = {}
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = data.get("files", {})
+        except Exception as e:
+            logger.error(f"Error loading index manifest {self.path}: {e}")
+            self.entries = {}
+
+    def save(self):
+        """Atomically write manifest entries to disk"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "pipeline_version": PIPELINE_VERSION,
+                    "updated_at": str(datetime.now()),
+                    "files": self.entries,
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Forget all indexed files"""
+        self.entries = {}
+
+    @staticmethod
+    def normalize_path(file_path: str) -> str:
+        return os.path.abspath(str(file_path))
+
+    @classmethod
+    def _within(cls, scope: str, path: str) -> bool:
+        """Whether path lies under scope (False for paths on another drive)"""
+        try:
+            return os.path.commonpath([scope, path]) == scope
+        except ValueError:
+            # Different drives, or a relative key from an older manifest
+            scope, path = cls.normalize_path(scope), cls.normalize_path(path)
+            try:
+                return os.path.commonpath([scope, path]) == scope
+            except ValueError:
+                return False
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """SHA-256 of the raw file bytes"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(self.normalize_path(file_path))
+
+    def record(self, file_path: str, document_id: str):
+        """Record a successfully indexed file"""
+        path = self.normalize_path(file_path)
+        stat = os.stat(path)
+        self.entries[path] = {
+            "path": path,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "content_hash": self.file_hash(path),
+            "document_id": document_id,
+            "pipeline_version": PIPELINE_VERSION,
+        }
+
+    def remove(self, file_path: str) -> Optional[Dict[str, Any]]:
+        return self.entries.pop(self.normalize_path(file_path), None)
+
+    def remove_documents(self, document_ids: List[str]) -> List[Dict[str, Any]]:
+        """Forget the files indexed as the given documents"""
+        ids = set(document_ids)
+        removed = [entry for entry in self.entries.values() if entry.get("document_id") in ids]
+        for entry in removed:
+            self.entries.pop(entry["path"], None)
+        return removed
+
+    def plan(self, file_paths: List[str], scope_dir: str) -> Dict[str, List]:
+        """
+        Compare files on disk with the manifest
+
+        Returns:
+            {"new": [path], "modified": [entry], "unchanged": [path], "removed": [entry]}
+        """
+        plan = {"new": [], "modified": [], "unchanged": [], "removed": []}
+        seen = set()
+
+        for file_path in file_paths:
+            path = self.normalize_path(file_path)
+            seen.add(path)
+            entry = self.entries.get(path)
+
+            if entry is None:
+                plan["new"].append(path)
+                continue
+
+            if entry.get("pipeline_version") != PIPELINE_VERSION:
+                plan["modified"].append(entry)
+                continue
+
+            stat = os.stat(path)
+            if (
+                stat.st_size == entry.get("size")
+                and stat.st_mtime_ns == entry.get("mtime_ns")
+            ):
+                plan["unchanged"].append(path)
+                continue
+
+            # Stat changed (e.g. touched or copied) - fall back to the content hash
+            if self.file_hash(path) == entry.get("content_hash"):
+                entry["size"] = stat.st_size
+                entry["mtime_ns"] = stat.st_mtime_ns
+                plan["unchanged"].append(path)
+            else:
+                plan["modified"].append(entry)
+
+        scope = self.normalize_path(scope_dir)
+        for path, entry in self.entries.items():
+            if path in seen:
+                continue
+            if self._within(scope, path) and not os.path.exists(path):
+                plan["removed"].append(entry)
+
+        return plan
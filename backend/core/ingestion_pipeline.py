@@ -0,0 +1,589 @@
+"""
+Staged ingestion pipeline for bulk indexing of RFP documents.
+
+Stages:
+    1. extract  - DOCX parsing, metadata extraction and section chunking
+                  (process pool, CPU-bound)
+    2. version  - version assignment (main thread, in input order)
+    3. enrich   - summary, key points and complexity (thread pool, I/O-bound);
+                  exact duplicates and minor revisions reuse their parent's
+                  enrichment and chunk embeddings instead
+    4. embed    - batched chunk embeddings (writer, one request per batch)
+    5. write    - batched ChromaDB adds of documents and chunks (single writer)
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import settings
+from core.document_processor import DocumentProcessor
+from core.metadata_extractor import MetadataExtractor
+from core.minhash import changed_fraction, jaccard, minhash_signature, shingle_hashes
+from core.section_chunker import SectionChunker
+from rag_engine.term_index import count_terms
+
+logger = logging.getLogger(__name__)
+
+# Parent document fields copied onto every chunk so search filters apply to chunks
+CHUNK_PARENT_FIELDS = [
+    "filename",
+    "client_name",
+    "rfp_type",
+    "document_type",
+    "service_category",
+    "specific_service",
+    "equipment_type",
+    "document_version",
+    "key_terms",
+]
+
+# LLM calls made by enrich_document
+ENRICHMENT_CALLS = 3
+
+# Per-process instances used by extraction workers
+_worker_processor: Optional[DocumentProcessor] = None
+_worker_metadata_extractor: Optional[MetadataExtractor] = None
+_worker_chunker: Optional[SectionChunker] = None
+
+
+def _init_extraction_worker():
+    """Create the per-process extraction components"""
+    global _worker_processor, _worker_metadata_extractor, _worker_chunker
+    _worker_processor = DocumentProcessor()
+    _worker_metadata_extractor = MetadataExtractor()
+    _worker_chunker = SectionChunker()
+
+
+def extract_document(
+    file_path: str,
+    processor: Optional[DocumentProcessor] = None,
+    metadata_extractor: Optional[MetadataExtractor] = None,
+    chunker: Optional[SectionChunker] = None,
+) -> Dict[str, Any]:
+    """
+    Parse, chunk, extract metadata, count terms and compute the MinHash
+    signature of a document (pipeline stage 1)
+    """
+    started = time.time()
+    processor = processor or _worker_processor or DocumentProcessor()
+    metadata_extractor = (
+        metadata_extractor or _worker_metadata_extractor or MetadataExtractor()
+    )
+    chunker = chunker or _worker_chunker or SectionChunker()
+
+    doc_data = processor.process_document(file_path)
+    enhanced_metadata = metadata_extractor.extract_comprehensive_metadata(
+        doc_data["content"], file_path, doc_data["filename_metadata"]
+    )
+    # Blocks are only needed for chunking; don't ship them back to the parent process
+    chunks = chunker.chunk_blocks(doc_data.pop("blocks"))
+
+    return {
+        "file_path": file_path,
+        "doc_data": doc_data,
+        "enhanced_metadata": enhanced_metadata,
+        "chunks": chunks,
+        "term_counts": count_terms(doc_data["content"]),
+        "minhash": minhash_signature(doc_data["content"]),
+        "started": started,
+        "finished": time.time(),
+    }
+
+
+def enrich_document(
+    content: str, enhanced_metadata: Dict[str, Any], summarizer
+) -> Dict[str, Any]:
+    """Run the LLM enrichment calls for a document (pipeline stage 3)"""
+    summary = summarizer.generate_summary(content, enhanced_metadata)
+    key_points = summarizer.generate_key_points(content, enhanced_metadata)
+    complexity = summarizer.classify_document_complexity(content, enhanced_metadata)
+
+    return {"summary": summary, "key_points": key_points, "complexity": complexity}
+
+
+def load_parent_enrichment(vector_store, document_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Text, enrichment and chunk embeddings of a stored document, for reuse by
+    its duplicates; None if it is not stored or was never enriched
+    """
+    document = vector_store.get_document_by_id(document_id)
+    if document is None or "content_summary" not in document["metadata"]:
+        return None
+    metadata = document["metadata"]
+    return {
+        "content": document["content"],
+        "enrichment": {
+            "summary": metadata["content_summary"],
+            "key_points": metadata.get("key_points", ""),
+            "complexity": metadata.get("complexity", "Medium"),
+        },
+        "chunk_embeddings": vector_store.get_chunk_embeddings(document_id),
+    }
+
+
+def snapshot_parent_enrichments(vector_store, document_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Reusable enrichment of documents about to be deleted and re-indexed"""
+    if not settings.enrichment_reuse_enabled:
+        return {}
+    parents = {}
+    for document_id in document_ids:
+        parent = load_parent_enrichment(vector_store, document_id)
+        if parent is not None:
+            parents[document_id] = parent
+    return parents
+
+
+def can_reuse_enrichment(content: str, parent: Dict[str, Any]) -> bool:
+    """
+    Whether a duplicate may take its parent's enrichment: it is an exact
+    copy, or a minor revision with at most enrichment_reuse_max_change of
+    its shingles outside the parent
+    """
+    if parent["content"] == content:
+        return True
+    new, old = shingle_hashes(content), shingle_hashes(parent["content"])
+    return (
+        jaccard(new, old) >= settings.version_minor_similarity
+        and changed_fraction(new, old) <= settings.enrichment_reuse_max_change
+    )
+
+
+def build_final_metadata(
+    enhanced_metadata: Dict[str, Any],
+    enrichment: Dict[str, Any],
+    version: str,
+    is_duplicate: bool,
+    parent_id: Optional[str],
+    doc_data: Dict[str, Any],
+    file_path: str,
+) -> Dict[str, Any]:
+    """Assemble the stored metadata (lists are converted to strings for ChromaDB)"""
+    key_points = enrichment["key_points"]
+    final_metadata = {
+        **enhanced_metadata,
+        "content_summary": enrichment["summary"],
+        "key_points": ", ".join(key_points)
+        if isinstance(key_points, list)
+        else key_points,
+        "complexity": enrichment["complexity"],
+        "document_version": version,
+        "is_duplicate": is_duplicate,
+        "parent_document_id": parent_id,
+        "word_count": doc_data["stats"]["word_count"],
+        "file_path": file_path,
+        "processing_date": doc_data["processing_timestamp"],
+    }
+
+    # Convert any list values in enhanced_metadata to strings
+    for key, value in final_metadata.items():
+        if isinstance(value, list):
+            final_metadata[key] = ", ".join(str(v) for v in value)
+
+    return final_metadata
+
+
+def build_chunk_records(
+    document_id: str,
+    chunks: List[Dict[str, Any]],
+    final_metadata: Dict[str, Any],
+    embeddings: List[List[float]],
+) -> List[Dict[str, Any]]:
+    """Chunk upsert items: parent fields plus section labels in the metadata"""
+    parent = {
+        field: final_metadata[field]
+        for field in CHUNK_PARENT_FIELDS
+        if final_metadata.get(field) is not None
+    }
+    return [
+        {
+            "id": f"{document_id}::chunk-{chunk['chunk_index']:04d}",
+            "content": chunk["text"],
+            "embedding": embedding,
+            "metadata": {
+                **parent,
+                "document_id": document_id,
+                "chunk_index": chunk["chunk_index"],
+                "section_title": chunk["section_title"],
+                "section_path": chunk["section_path"],
+                "section_type": chunk["section_type"],
+                "token_count": chunk["token_count"],
+            },
+        }
+        for chunk, embedding in zip(chunks, embeddings)
+    ]
+
+
+def write_documents(
+    embedding_engine, vector_store, jobs: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Embed the chunks of several documents and upsert documents and chunks
+    (pipeline stages 4-5). Each job needs document_id, content, metadata and
+    chunks; jobs with term_counts get their key_terms scored against the
+    corpus document frequencies, and chunks whose text is in a job's
+    reused_embeddings are not embedded again. Returns the embed/write stage
+    timestamps, the number of reused chunk embeddings and an error message
+    per document that could not be written.
+    """
+    embed_started = time.time()
+    chunk_texts = [[chunk["text"] for chunk in job["chunks"]] for job in jobs]
+    reused = [job.get("reused_embeddings") or {} for job in jobs]
+    chunk_embeddings, document_embeddings = (
+        embedding_engine.generate_chunked_document_embeddings(chunk_texts, reused)
+    )
+    embeddings_reused = sum(
+        text in known
+        for texts, known in zip(chunk_texts, reused)
+        for text in texts or [""]
+    )
+    write_started = time.time()
+    errors: Dict[str, str] = {}
+
+    key_terms = vector_store.add_key_terms(
+        {job["document_id"]: job["term_counts"] for job in jobs if "term_counts" in job}
+    )
+    for job in jobs:
+        if key_terms.get(job["document_id"]):
+            job["metadata"]["key_terms"] = key_terms[job["document_id"]]
+
+    # Chunks first, so a document is only searchable once all its chunks are stored
+    chunk_batch = []
+    chunk_owner = []
+    for job, embeddings in zip(jobs, chunk_embeddings):
+        records = build_chunk_records(
+            job["document_id"], job["chunks"], job["metadata"], embeddings
+        )
+        chunk_batch.extend(records)
+        chunk_owner.extend([job["document_id"]] * len(records))
+    for owner, status in zip(chunk_owner, vector_store.upsert_chunks(chunk_batch)):
+        if status["status"] != "upserted":
+            errors.setdefault(owner, status.get("error") or status["status"])
+
+    document_batch = [
+        {
+            "id": job["document_id"],
+            "content": job["content"],
+            "embedding": embedding,
+            "metadata": job["metadata"],
+        }
+        for job, embedding in zip(jobs, document_embeddings)
+        if job["document_id"] not in errors
+    ]
+    for status in vector_store.upsert_documents(document_batch):
+        if status["status"] != "upserted":
+            errors[status["id"]] = status.get("error") or status["status"]
+
+    # Don't leave chunks behind for documents that failed
+    if errors:
+        vector_store.delete_documents(list(errors))
+
+    return {
+        "embed_started": embed_started,
+        "write_started": write_started,
+        "write_finished": time.time(),
+        "embeddings_reused": embeddings_reused,
+        "errors": errors,
+    }
+
+
+class StageStats:
+    """Throughput counters for a single pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, started: float, finished: float, items: int = 1):
+        with self._lock:
+            self.items += items
+            self.busy_seconds += finished - started
+            if self.first_start is None or started < self.first_start:
+                self.first_start = started
+            if self.last_end is None or finished > self.last_end:
+                self.last_end = finished
+
+    def as_dict(self) -> Dict[str, Any]:
+        wall_seconds = 0.0
+        if self.first_start is not None and self.last_end is not None:
+            wall_seconds = self.last_end - self.first_start
+
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wall_seconds": round(wall_seconds, 3),
+            "items_per_second": round(self.items / wall_seconds, 2)
+            if wall_seconds > 0
+            else 0.0,
+        }
+
+
+class IngestionPipeline:
+    """Runs documents through extract -> version -> enrich -> embed -> write"""
+
+    STAGES = ["extract", "version", "enrich", "embed", "write"]
+
+    def __init__(
+        self,
+        processor: DocumentProcessor,
+        metadata_extractor: MetadataExtractor,
+        version_manager,
+        summarizer,
+        embedding_engine,
+        vector_store,
+        workers: Optional[int] = None,
+        write_batch_size: Optional[int] = None,
+    ):
+        self.processor = processor
+        self.metadata_extractor = metadata_extractor
+        self.version_manager = version_manager
+        self.summarizer = summarizer
+        self.embedding_engine = embedding_engine
+        self.vector_store = vector_store
+        self.workers = max(1, workers or settings.ingestion_workers)
+        self.write_batch_size = max(
+            1, write_batch_size or settings.vector_write_batch_size
+        )
+        self.stats = {stage: StageStats(stage) for stage in self.STAGES}
+        self.reuse = {"documents": 0, "llm_calls_avoided": 0, "embeddings_avoided": 0}
+        self._reuse_lock = threading.Lock()
+        # Enrichment of documents not yet written, by document ID
+        self._enriching: Dict[str, Any] = {}
+        self._parents: Dict[str, Dict[str, Any]] = {}
+        self._superseded: List[str] = []
+
+    def run(
+        self,
+        file_paths: List[str],
+        existing_docs: Optional[Dict[str, Dict]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        parents: Optional[Dict[str, Dict[str, Any]]] = None,
+        superseded: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Process all files and return per-file results (in input order), stage
+        stats and reuse counters. `superseded` are the documents these files
+        replace, and `parents` holds their reusable enrichment (see
+        snapshot_parent_enrichments)
+        """
+        if existing_docs is None:
+            existing_docs = {}
+        self._parents = parents or {}
+        self._superseded = list(superseded or [])
+
+        file_paths = [str(path) for path in file_paths]
+        total = len(file_paths)
+        results: List[Optional[Dict[str, Any]]] = [None] * total
+        completed = [0]
+        window = self.workers * 2
+        started = time.time()
+
+        document_ids: Dict[int, str] = {}
+
+        def finish(index: int, result: Dict[str, Any]):
+            if result.get("error") and index in document_ids:
+                # Never written: drop it from the version registry again
+                self.version_manager.remove_documents(
+                    [document_ids[index]], keep_history=False
+                )
+            results[index] = result
+            completed[0] += 1
+            if progress_callback:
+                progress_callback(completed[0], total)
+
+        write_buffer: List[Dict[str, Any]] = []
+
+        def flush():
+            if not write_buffer:
+                return
+            batch = list(write_buffer)
+            write_buffer.clear()
+            try:
+                written = write_documents(self.embedding_engine, self.vector_store, batch)
+            except Exception as e:
+                for job in batch:
+                    finish(job["index"], {"file_path": job["file_path"], "error": str(e)})
+                return
+            self.stats["embed"].record(
+                written["embed_started"], written["write_started"], len(batch)
+            )
+            self.stats["write"].record(
+                written["write_started"], written["write_finished"], len(batch)
+            )
+            with self._reuse_lock:
+                self.reuse["embeddings_avoided"] += written["embeddings_reused"]
+            for job in batch:
+                # Stored now (or failed): later duplicates read it from the vector store
+                self._enriching.pop(job["document_id"], None)
+                error = written["errors"].get(job["document_id"])
+                if error:
+                    finish(job["index"], {"file_path": job["file_path"], "error": error})
+                    continue
+                finish(
+                    job["index"],
+                    {
+                        "file_path": job["file_path"],
+                        "document_id": job["document_id"],
+                        "version": job["version"],
+                        "is_duplicate": job["is_duplicate"],
+                    },
+                )
+
+        def drain(inflight: Dict[Any, int], block: bool):
+            if not inflight:
+                return
+            done, _ = wait(
+                list(inflight),
+                timeout=None if block else 0,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                index = inflight.pop(future)
+                try:
+                    write_buffer.append(future.result())
+                except Exception as e:
+                    self._enriching.pop(document_ids.get(index), None)
+                    finish(index, {"file_path": file_paths[index], "error": str(e)})
+                if len(write_buffer) >= self.write_batch_size:
+                    flush()
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_extraction_worker
+        ) as cpu_pool, ThreadPoolExecutor(max_workers=self.workers) as io_pool:
+            pending_extractions = deque()
+            inflight: Dict[Any, int] = {}
+            next_index = 0
+
+            while next_index < total or pending_extractions:
+                while next_index < total and len(pending_extractions) < window:
+                    pending_extractions.append(
+                        (
+                            next_index,
+                            cpu_pool.submit(extract_document, file_paths[next_index]),
+                        )
+                    )
+                    next_index += 1
+
+                # Consume extractions in input order so versioning matches the serial path
+                index, future = pending_extractions.popleft()
+                try:
+                    extracted = future.result()
+                    self.stats["extract"].record(
+                        extracted["started"], extracted["finished"]
+                    )
+                    job = self._assign_version(index, extracted, existing_docs)
+                    document_ids[index] = job["document_id"]
+                    enriching = io_pool.submit(self._enrich, job)
+                    self._enriching[job["document_id"]] = enriching
+                    inflight[enriching] = index
+                except Exception as e:
+                    logger.error(f"Failed to process {file_paths[index]}: {e}")
+                    finish(index, {"file_path": file_paths[index], "error": str(e)})
+
+                drain(inflight, block=len(inflight) >= window)
+
+            while inflight:
+                drain(inflight, block=True)
+            flush()
+
+        return {
+            "results": results,
+            "stats": self.get_stats(),
+            "reuse": dict(self.reuse),
+            "elapsed_seconds": round(time.time() - started, 3),
+        }
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage throughput statistics"""
+        return {stage: self.stats[stage].as_dict() for stage in self.STAGES}
+
+    def _assign_version(
+        self, index: int, extracted: Dict[str, Any], existing_docs: Dict[str, Dict]
+    ) -> Dict[str, Any]:
+        """Determine the version and register the document (pipeline stage 2)"""
+        version_started = time.time()
+        file_path = extracted["file_path"]
+        content = extracted["doc_data"]["content"]
+
+        document_id = str(uuid.uuid4())
+        version, is_duplicate, parent_id = self.version_manager.assign_version(
+            document_id, content, file_path, existing_docs, signature=extracted["minhash"],
+            superseded=self._superseded
+        )
+        self.stats["version"].record(version_started, time.time())
+
+        return {
+            **extracted,
+            "index": index,
+            "content": content,
+            "document_id": document_id,
+            "version": version,
+            "is_duplicate": is_duplicate,
+            "parent_id": parent_id,
+        }
+
+    def _enrich(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """LLM enrichment, or the parent's for duplicates (pipeline stage 3)"""
+        enrich_started = time.time()
+        parent = self._find_parent(job)
+        if parent is not None and can_reuse_enrichment(job["content"], parent):
+            enrichment = parent["enrichment"]
+            job["reused_embeddings"] = parent["chunk_embeddings"]
+            with self._reuse_lock:
+                self.reuse["documents"] += 1
+                self.reuse["llm_calls_avoided"] += ENRICHMENT_CALLS
+        else:
+            enrichment = enrich_document(
+                job["content"], job["enhanced_metadata"], self.summarizer
+            )
+        job["enrichment"] = enrichment
+        self.stats["enrich"].record(enrich_started, time.time())
+
+        job["metadata"] = build_final_metadata(
+            job["enhanced_metadata"],
+            enrichment,
+            job["version"],
+            job["is_duplicate"],
+            job["parent_id"],
+            job["doc_data"],
+            job["file_path"],
+        )
+
+        return job
+
+    def _find_parent(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Reusable enrichment of a duplicate's parent, wherever the parent is"""
+        parent_id = job["parent_id"]
+        if not (settings.enrichment_reuse_enabled and job["is_duplicate"] and parent_id):
+            return None
+        if parent_id in self._parents:
+            return self._parents[parent_id]
+
+        enriching = self._enriching.get(parent_id)
+        if enriching is not None:
+            # Parent from this run, submitted earlier so already running or done;
+            # its chunks are not embedded yet
+            try:
+                parent_job = enriching.result()
+            except Exception:
+                return None
+            return {
+                "content": parent_job["content"],
+                "enrichment": parent_job["enrichment"],
+                "chunk_embeddings": {},
+            }
+
+        return load_parent_enrichment(self.vector_store, parent_id)
@@ -1,16 +1,111 @@
 import re
-from typing import Dict, Any, List, Tuple
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from config.metadata_schema import (
     RFP_TYPE_PATTERNS,
     DOCUMENT_TYPE_PATTERNS,
     SERVICE_CATEGORY_PATTERNS,
     EQUIPMENT_TYPE_PATTERNS,
+    CLIENT_PATTERNS,
+    DOCUMENT_PURPOSE_PATTERNS,
     add_custom_rfp_type,
+    get_pattern_version,
 )
+from rag_engine.term_index import TermIndex, count_terms
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Words for keyword matching
+_WORD = re.compile(r"[a-z0-9&]+")
+
+
+class KeywordMatcher:
+    """
+    Keyword tables compiled into word and phrase lookups. A text is tokenized
+    once (letters, digits and "&" form words; spaces, underscores and
+    punctuation separate them). Single words are counted from the token
+    counts, and phrases are checked only where their first word occurs.
+    Keywords therefore match whole words, with an optional plural "s"/"es"
+    on the last word, and a phrase hit also counts for the words inside it
+    ("cesc kolkata" counts for "cesc").
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        # Word or phrase (with its plural forms) -> keywords it counts for
+        self.words: Dict[str, List[str]] = {}
+        self.phrases: Dict[Tuple[str, ...], List[str]] = {}
+        for keyword in keywords:
+            words = tuple(_WORD.findall(keyword.lower()))
+            if not words:
+                continue
+            key = " ".join(words)
+            for suffix in ("", "s", "es"):
+                form = words[:-1] + (words[-1] + suffix,)
+                if len(form) == 1:
+                    keys = self.words.setdefault(form[0], [])
+                else:
+                    keys = self.phrases.setdefault(form, [])
+                if key not in keys:
+                    keys.append(key)
+        self.phrase_starts = {phrase[0] for phrase in self.phrases}
+        self.phrase_lengths = sorted({len(phrase) for phrase in self.phrases})
+
+    @staticmethod
+    def normalize(keyword: str) -> str:
+        return " ".join(_WORD.findall(keyword.lower()))
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Hit count per keyword found in text (case-insensitive)"""
+        tokens = _WORD.findall(text.lower())
+        counts: Dict[str, int] = {}
+
+        found = Counter(tokens)
+        for word, keys in self.words.items():
+            hits = found.get(word)
+            if hits:
+                for key in keys:
+                    counts[key] = counts.get(key, 0) + hits
+
+        if self.phrase_starts.intersection(found):
+            starts = [i for i, token in enumerate(tokens) if token in self.phrase_starts]
+            for i in starts:
+                for length in self.phrase_lengths:
+                    if i + length > len(tokens):
+                        break
+                    for key in self.phrases.get(tuple(tokens[i:i + length]), ()):
+                        counts[key] = counts.get(key, 0) + 1
+        return counts
+
+
+_matcher: Optional[KeywordMatcher] = None
+_matcher_version: Optional[int] = None
+
+
+def get_keyword_matcher() -> KeywordMatcher:
+    """Matcher over every pattern table, rebuilt when add_custom_rfp_type changes them"""
+    global _matcher, _matcher_version
+    version = get_pattern_version()
+    if _matcher is None or _matcher_version != version:
+        keywords: List[str] = []
+        for config in RFP_TYPE_PATTERNS.values():
+            keywords.extend(config["keywords"])
+        for table in (
+            CLIENT_PATTERNS,
+            SERVICE_CATEGORY_PATTERNS,
+            EQUIPMENT_TYPE_PATTERNS,
+            DOCUMENT_PURPOSE_PATTERNS,
+        ):
+            for patterns in table.values():
+                keywords.extend(patterns)
+        _matcher = KeywordMatcher(keywords)
+        _matcher_version = version
+    return _matcher
+
+
+def _hit(counts: Dict[str, int], keyword: str) -> bool:
+    return counts.get(KeywordMatcher.normalize(keyword), 0) > 0
+
 
 class MetadataExtractor:
     """Enhanced metadata extraction from document content and filenames"""
@@ -18,10 +113,20 @@ class MetadataExtractor:
     def __init__(self):
         self.confidence_threshold = 0.6
 
-    def classify_rfp_type(self, content: str, filename: str) -> Tuple[str, float]:
+    def match_keywords(self, content: str, filename: str) -> Dict[str, Dict[str, int]]:
+        """
+        Keyword hit counts for the content and the filename, from one pass
+        over each. The classifiers below take this as `hits`; without it they
+        match the text themselves.
+        """
+        matcher = get_keyword_matcher()
+        return {"content": matcher.count(content), "filename": matcher.count(filename)}
+
+    def classify_rfp_type(
+        self, content: str, filename: str, hits: Optional[Dict[str, Dict[str, int]]] = None
+    ) -> Tuple[str, float]:
         """Classify RFP type with confidence score"""
-        content_lower = content.lower()
-        filename_lower = filename.lower()
+        hits = hits or self.match_keywords(content, filename)
 
         scores = {}
 
@@ -31,11 +136,11 @@ class MetadataExtractor:
 
             for keyword in config["keywords"]:
                 # Higher weight for filename matches
-                if keyword in filename_lower:
+                if _hit(hits["filename"], keyword):
                     score += 3
                     keyword_matches += 1
                 # Content matches
-                if keyword in content_lower:
+                if _hit(hits["content"], keyword):
                     score += 1
                     keyword_matches += 1
 
@@ -51,29 +156,20 @@ class MetadataExtractor:
 
         return best_type, confidence
 
-    def extract_client_name(self, content: str, filename: str) -> Tuple[str, float]:
+    def extract_client_name(
+        self, content: str, filename: str, hits: Optional[Dict[str, Dict[str, int]]] = None
+    ) -> Tuple[str, float]:
         """Extract client name with confidence"""
-        content_lower = content.lower()
-        filename_lower = filename.lower()
-
-        # Common client patterns
-        client_patterns = {
-            "CESC_Kolkata": ["cesc kolkata", "cesc"],
-            "CPDL": ["cpdl"],
-            "CESC_Rajasthan": ["cesc rajasthan"],
-            "MPSL": ["mpsl"],
-            "CDPL": ["cdpl"],
-            "General": ["general", "common"],
-        }
+        hits = hits or self.match_keywords(content, filename)
 
         scores = {}
 
-        for client, patterns in client_patterns.items():
+        for client, patterns in CLIENT_PATTERNS.items():
             score = 0
             for pattern in patterns:
-                if pattern in filename_lower:
+                if _hit(hits["filename"], pattern):
                     score += 3
-                if pattern in content_lower:
+                if _hit(hits["content"], pattern):
                     score += 1
 
             if score > 0:
@@ -88,11 +184,10 @@ class MetadataExtractor:
         return best_client, confidence
 
     def classify_service_category(
-        self, content: str, filename: str
+        self, content: str, filename: str, hits: Optional[Dict[str, Dict[str, int]]] = None
     ) -> Tuple[str, float]:
         """Classify service category with confidence"""
-        content_lower = content.lower()
-        filename_lower = filename.lower()
+        hits = hits or self.match_keywords(content, filename)
 
         scores = {}
 
@@ -101,10 +196,10 @@ class MetadataExtractor:
             matches = 0
 
             for keyword in keywords:
-                if keyword in filename_lower:
+                if _hit(hits["filename"], keyword):
                     score += 2
                     matches += 1
-                if keyword in content_lower:
+                if _hit(hits["content"], keyword):
                     score += 1
                     matches += 1
 
@@ -119,19 +214,20 @@ class MetadataExtractor:
 
         return best_category, confidence
 
-    def extract_equipment_type(self, content: str, filename: str) -> Tuple[str, float]:
+    def extract_equipment_type(
+        self, content: str, filename: str, hits: Optional[Dict[str, Dict[str, int]]] = None
+    ) -> Tuple[str, float]:
         """Extract equipment type with confidence"""
-        content_lower = content.lower()
-        filename_lower = filename.lower()
+        hits = hits or self.match_keywords(content, filename)
 
         scores = {}
 
         for equipment, keywords in EQUIPMENT_TYPE_PATTERNS.items():
             score = 0
             for keyword in keywords:
-                if keyword in filename_lower:
+                if _hit(hits["filename"], keyword):
                     score += 2
-                if keyword in content_lower:
+                if _hit(hits["content"], keyword):
                     score += 1
 
             if score > 0:
@@ -145,96 +241,49 @@ class MetadataExtractor:
 
         return best_equipment, confidence
 
-    def extract_key_terms(self, content: str, max_terms: int = 20) -> List[str]:
-        """Extract key terms from document content"""
-        # Simple keyword extraction based on frequency and importance
-        content_lower = content.lower()
-
-        # Common technical terms in RFP documents
-        technical_terms = [
-            "transformer",
-            "substation",
-            "distribution",
-            "transmission",
-            "cable",
-            "installation",
-            "commissioning",
-            "testing",
-            "maintenance",
-            "inspection",
-            "safety",
-            "quality",
-            "specification",
-            "requirement",
-            "technical",
-            "commercial",
-            "financial",
-            "timeline",
-            "delivery",
-            "warranty",
-            "gpr",
-            "survey",
-            "metering",
-            "billing",
-            "infrastructure",
-            "equipment",
-        ]
-
-        found_terms = []
-        for term in technical_terms:
-            if term in content_lower:
-                found_terms.append(term)
-
-        # Also extract capitalized terms (might be specific equipment/brands)
-        capitalized = re.findall(r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b", content)
-        unique_capitalized = list(set(capitalized))[:10]  # Limit to prevent noise
-
-        key_terms = found_terms + unique_capitalized
-        return key_terms[:max_terms]
-
-    def detect_document_purpose(self, content: str, filename: str) -> str:
+    def extract_key_terms(
+        self, content: str, max_terms: int = 20, term_index: Optional[TermIndex] = None
+    ) -> List[str]:
+        """
+        Top TF-IDF terms of document content, scored against the corpus
+        document frequencies of the term index without adding the document
+        """
+        term_index = term_index or TermIndex()
+        return term_index.score_documents({"": count_terms(content)}, max_terms).get("", [])
+
+    def detect_document_purpose(
+        self, content: str, filename: str, hits: Optional[Dict[str, Dict[str, int]]] = None
+    ) -> str:
         """Detect the purpose of the document"""
-        content_lower = content.lower()
-        filename_lower = filename.lower()
+        hits = hits or self.match_keywords(content, filename)
 
-        if any(
-            word in filename_lower
-            for word in ["annexure", "attachment", "supplementary"]
-        ):
-            return "supplement"
-        elif any(
-            word in content_lower for word in ["template", "format", "boilerplate"]
-        ):
-            return "template"
-        elif any(word in content_lower for word in ["contract", "agreement", "terms"]):
-            return "contract"
-        elif any(
-            word in content_lower for word in ["specification", "requirements", "scope"]
-        ):
-            return "specification"
-        elif any(word in content_lower for word in ["tender", "bid", "proposal"]):
-            return "requirement"
-        else:
-            return "document"
+        for purpose, words in DOCUMENT_PURPOSE_PATTERNS.items():
+            # Supplements are recognised by their filename, the rest by content
+            source = hits["filename"] if purpose == "supplement" else hits["content"]
+            if any(_hit(source, word) for word in words):
+                return purpose
+        return "document"
 
     def extract_comprehensive_metadata(
         self, content: str, filename: str, filename_metadata: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Extract all metadata with confidence scores"""
 
+        # One matching pass over content and filename feeds every classifier
+        hits = self.match_keywords(content, filename)
+
         # Classify various aspects
-        rfp_type, rfp_confidence = self.classify_rfp_type(content, filename)
-        client_name, client_confidence = self.extract_client_name(content, filename)
+        rfp_type, rfp_confidence = self.classify_rfp_type(content, filename, hits)
+        client_name, client_confidence = self.extract_client_name(content, filename, hits)
         service_category, service_confidence = self.classify_service_category(
-            content, filename
+            content, filename, hits
         )
         equipment_type, equipment_confidence = self.extract_equipment_type(
-            content, filename
+            content, filename, hits
         )
 
-        # Extract additional metadata
-        key_terms = self.extract_key_terms(content)
-        document_purpose = self.detect_document_purpose(content, filename)
+        # Key terms are scored against the corpus when the document is written
+        document_purpose = self.detect_document_purpose(content, filename, hits)
 
         # Calculate overall confidence
         all_confidences = [
@@ -256,7 +305,6 @@ class MetadataExtractor:
             "service_confidence": service_confidence,
             "equipment_type": equipment_type,
             "equipment_confidence": equipment_confidence,
-            "key_terms": key_terms,
             "document_purpose": document_purpose,
             "overall_confidence": overall_confidence,
         }
@@ -0,0 +1,130 @@
+"""
+MinHash signatures and LSH banding for near-duplicate document detection.
+
+A document is reduced to the set of its word shingles (runs of
+settings.shingle_words words), each hashed to 32 bits. Its MinHash
+signature keeps, for each of num_perm random hash permutations, the
+smallest permuted shingle hash; the fraction of positions where two
+signatures agree estimates the Jaccard similarity of the shingle sets.
+LSH splits the signature into bands, and documents that share any whole
+band become candidates, so only a few exact comparisons are needed.
+"""
+
+import hashlib
+import re
+import zlib
+from collections import deque
+from typing import List, Optional, Set
+
+import numpy as np
+
+from config.settings import settings
+
+_WORD = re.compile(r"\w+")
+
+# Permutations are h(x) = (a * x + b) mod p over 32-bit shingle hashes;
+# a < 2^31 keeps a * x + b within 64 bits
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_SEED = 1
+
+# Shingle hashes processed at once, bounding the (block x num_perm) matrix
+_BLOCK = 4096
+
+
+def shingle_hashes(text: str, words: Optional[int] = None) -> np.ndarray:
+    """Distinct 32-bit hashes of the word shingles of a text, sorted"""
+    words = max(1, words or settings.shingle_words)
+    window: deque = deque(maxlen=words)
+    hashes: Set[int] = set()
+    for match in _WORD.finditer(text.lower()):
+        window.append(match.group())
+        if len(window) == words:
+            hashes.add(zlib.crc32(" ".join(window).encode("utf-8")))
+    if not hashes and window:
+        # Texts shorter than one shingle are a single shingle
+        hashes.add(zlib.crc32(" ".join(window).encode("utf-8")))
+    return np.array(sorted(hashes), dtype=np.uint64)
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Exact Jaccard similarity of two sorted shingle hash arrays"""
+    if len(a) == 0 and len(b) == 0:
+        return 1.0
+    shared = len(np.intersect1d(a, b, assume_unique=True))
+    return shared / (len(a) + len(b) - shared)
+
+
+def changed_fraction(new: np.ndarray, old: np.ndarray) -> float:
+    """Share of the shingles of a new text that do not occur in an older one"""
+    if len(new) == 0:
+        return 0.0 if len(old) == 0 else 1.0
+    return 1.0 - len(np.intersect1d(new, old, assume_unique=True)) / len(new)
+
+
+class MinHasher:
+    """Fixed family of hash permutations; equal parameters give comparable signatures"""
+
+    def __init__(self, num_perm: Optional[int] = None, seed: int = _SEED):
+        self.num_perm = num_perm or settings.minhash_permutations
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 31, size=self.num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=self.num_perm).astype(np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        """MinHash signature (uint32, num_perm values) of a set of shingle hashes"""
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), _BLOCK):
+            block = hashes[start:start + _BLOCK, np.newaxis]
+            permuted = ((block * self.a + self.b) % _PRIME) & _MAX_HASH
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+    def text_signature(self, text: str) -> np.ndarray:
+        return self.signature(shingle_hashes(text))
+
+    @staticmethod
+    def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+        """Jaccard similarity estimated from two signatures"""
+        return float(np.mean(np.asarray(a) == np.asarray(b)))
+
+
+class MinHashLSH:
+    """
+    LSH banding. A signature of num_perm values is cut into `bands` bands of
+    num_perm / bands rows, and each band is hashed to a short key; documents
+    with the same key in any band are candidates. Two documents with Jaccard
+    similarity s share at least one band with probability
+    1 - (1 - s^rows)^bands. The keys are stored by the caller
+    (VersionManager keeps them in its registry).
+    """
+
+    def __init__(self, num_perm: Optional[int] = None, bands: Optional[int] = None):
+        self.num_perm = num_perm or settings.minhash_permutations
+        self.bands = bands or settings.minhash_bands
+        if self.num_perm % self.bands:
+            raise ValueError(
+                f"minhash_bands ({self.bands}) must divide minhash_permutations ({self.num_perm})"
+            )
+        self.rows = self.num_perm // self.bands
+
+    def band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """One short hash per band of the signature"""
+        signature = np.ascontiguousarray(signature, dtype=np.uint32)
+        return [
+            hashlib.blake2b(
+                signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8
+            ).digest()
+            for band in range(self.bands)
+        ]
+
+
+_default_hasher: Optional[MinHasher] = None
+
+
+def minhash_signature(text: str) -> List[int]:
+    """Signature of a text with the default permutations, as a plain list"""
+    global _default_hasher
+    if _default_hasher is None or _default_hasher.num_perm != settings.minhash_permutations:
+        _default_hasher = MinHasher()
+    return _default_hasher.text_signature(text).tolist()
@@ -0,0 +1,230 @@
+"""
+Section-aware chunking of tender documents.
+
+Headings are detected from paragraph styles (Title, Heading N), list
+numbering and heading-like text (numbered or all-caps short lines ending
+without a full stop). Each section is labelled with a section type from
+SECTION_TYPE_PATTERNS and split into token-bounded chunks that carry their
+section heading, so every chunk can be embedded and retrieved on its own.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from config.metadata_schema import SECTION_TYPE_PATTERNS
+from config.settings import settings
+from core.docx_stream import DocxBlock
+from utils.token_budget import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SECTION_TYPE = "General"
+
+_HEADING_STYLE = re.compile(r"^heading(\d)$")
+_NUMBERED_HEADING = re.compile(r"^(\d+(?:\.\d+)*)[.)]?\s+\S")
+_KEYWORD_HEADING = re.compile(
+    r"^(section|chapter|article|part|annexure|appendix|schedule)\s+[\w.-]+\b", re.IGNORECASE
+)
+
+# Heading-like text must be short and must not read as a sentence
+_MAX_HEADING_WORDS = 12
+_MAX_HEADING_CHARS = 120
+_SENTENCE_ENDINGS = (".", ";", ",")
+
+
+def _compile_section_patterns() -> List[tuple]:
+    compiled = []
+    for section_type, keywords in SECTION_TYPE_PATTERNS.items():
+        for keyword in keywords:
+            compiled.append(
+                (section_type, re.compile(r"\b" + re.escape(keyword) + r"\b"), len(keyword))
+            )
+    return compiled
+
+
+class SectionChunker:
+    """Splits document blocks into labelled sections and token-bounded chunks"""
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+    ):
+        self.max_tokens = max(16, max_tokens or settings.chunk_max_tokens)
+        overlap = settings.chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
+        self.overlap_tokens = max(0, min(overlap, self.max_tokens // 2))
+        self.model = model or settings.openai_embedding_model
+        self.section_patterns = _compile_section_patterns()
+
+    def heading_level(self, block: DocxBlock) -> Optional[int]:
+        """Return the heading level of a block (0 = title), or None for body text"""
+        if block.kind != "paragraph":
+            return None
+
+        style = re.sub(r"[^a-z0-9]", "", (block.style or "").lower())
+        if style == "title":
+            return 0
+        match = _HEADING_STYLE.match(style)
+        if match:
+            return max(1, int(match.group(1)))
+        if style.startswith("toc"):
+            return None
+
+        text = block.text.strip()
+        words = text.split()
+        if (
+            not words
+            or len(words) > _MAX_HEADING_WORDS
+            or len(text) > _MAX_HEADING_CHARS
+            or text.endswith(_SENTENCE_ENDINGS)
+        ):
+            return None
+
+        # "1.2 Scope of Work", "2. PAYMENT TERMS"
+        match = _NUMBERED_HEADING.match(text)
+        if match and (text.endswith(":") or self._is_title_text(text[match.end() - 1:])):
+            return match.group(1).count(".") + 1
+
+        # "Section II", "Annexure - A"
+        if _KEYWORD_HEADING.match(text):
+            return 1
+
+        # Numbered list entries ending with a colon introduce a block ("Scope of Work:")
+        if block.num_level is not None and text.endswith(":") and len(words) <= 8:
+            return block.num_level + 1
+
+        if text.endswith(":") and len(words) <= 5 and self._is_title_text(text):
+            return 1
+
+        letters = [c for c in text if c.isalpha()]
+        if len(letters) >= 4 and text.upper() == text and len(words) >= 2:
+            return 1
+
+        return None
+
+    @staticmethod
+    def _is_title_text(text: str) -> bool:
+        """True for Title Case or UPPER CASE text (minor words excepted)"""
+        words = [word for word in re.findall(r"[A-Za-z][\w'&/-]*", text) if len(word) > 3]
+        if not words:
+            return False
+        capitalized = sum(1 for word in words if word[0].isupper())
+        return capitalized / len(words) >= 0.6
+
+    def classify_section(self, title: str) -> Optional[str]:
+        """Map a heading to a section type; the keyword found earliest wins"""
+        title = title.lower()
+        best = None
+        for section_type, pattern, length in self.section_patterns:
+            match = pattern.search(title)
+            if match:
+                rank = (match.start(), -length)
+                if best is None or rank < best[0]:
+                    best = (rank, section_type)
+        return best[1] if best else None
+
+    def split_sections(self, blocks: Sequence[DocxBlock]) -> List[Dict[str, Any]]:
+        """Group blocks under their nearest heading"""
+        sections: List[Dict[str, Any]] = []
+        # (level, title, section type) of the open headings
+        stack: List[tuple] = []
+        current = {"title": "", "path": "", "section_type": DEFAULT_SECTION_TYPE, "texts": []}
+
+        for block in blocks:
+            level = self.heading_level(block)
+            if level is None:
+                current["texts"].append(block.text)
+                continue
+
+            if current["texts"]:
+                sections.append(current)
+
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            inherited = stack[-1][2] if stack else DEFAULT_SECTION_TYPE
+            title = block.text.strip().rstrip(":").strip()
+            stack.append((level, title, self.classify_section(title) or inherited))
+
+            current = {
+                "title": title,
+                "path": " > ".join(entry[1] for entry in stack),
+                "section_type": stack[-1][2],
+                "texts": [],
+            }
+
+        if current["texts"]:
+            sections.append(current)
+        return sections
+
+    def chunk_blocks(self, blocks: Sequence[DocxBlock]) -> List[Dict[str, Any]]:
+        """Split blocks into section-labelled chunks of at most max_tokens"""
+        chunks: List[Dict[str, Any]] = []
+        for section in self.split_sections(blocks):
+            for text in self._chunk_section(section):
+                chunks.append(
+                    {
+                        "chunk_index": len(chunks),
+                        "text": text,
+                        "section_title": section["title"],
+                        "section_path": section["path"],
+                        "section_type": section["section_type"],
+                        "token_count": count_tokens(text, self.model),
+                    }
+                )
+        return chunks
+
+    def _chunk_section(self, section: Dict[str, Any]) -> List[str]:
+        """Pack a section's paragraphs into chunks, each prefixed by its heading"""
+        header = section["title"]
+        budget = self.max_tokens - (count_tokens(header, self.model) + 1 if header else 0)
+        if budget < self.max_tokens // 2:
+            header = truncate_to_tokens(header, self.max_tokens // 4, self.model)
+            budget = self.max_tokens - count_tokens(header, self.model) - 1
+
+        pieces: List[tuple] = []
+        for text in section["texts"]:
+            for piece in self._split_long_text(text, budget):
+                pieces.append((piece, count_tokens(piece, self.model) + 1))
+
+        bodies: List[List[str]] = []
+        current: List[tuple] = []
+        used = 0
+        for piece in pieces:
+            if current and used + piece[1] > budget:
+                bodies.append([text for text, _ in current])
+                current = self._overlap(current)
+                used = sum(tokens for _, tokens in current)
+                if used + piece[1] > budget:
+                    current, used = [], 0
+            current.append(piece)
+            used += piece[1]
+        if current:
+            bodies.append([text for text, _ in current])
+
+        prefix = f"{header}\n" if header else ""
+        return [prefix + "\n".join(body) for body in bodies]
+
+    def _overlap(self, pieces: List[tuple]) -> List[tuple]:
+        """Trailing pieces carried into the next chunk, within the overlap budget"""
+        carried: List[tuple] = []
+        used = 0
+        for piece in reversed(pieces):
+            if used + piece[1] > self.overlap_tokens:
+                break
+            carried.insert(0, piece)
+            used += piece[1]
+        return carried
+
+    def _split_long_text(self, text: str, max_tokens: int) -> List[str]:
+        """Split a paragraph that exceeds the budget, preferring sentence ends"""
+        pieces = []
+        remaining = text.strip()
+        while remaining:
+            piece = truncate_to_tokens(remaining, max_tokens - 1, self.model)
+            if not piece:
+                break
+            pieces.append(piece)
+            remaining = remaining[len(piece):].strip()
+        return pieces
@@ -3,9 +3,13 @@ import re
 from typing import Dict, List, Optional
 import logging
 from config.settings import settings
+from utils.token_budget import truncate_to_tokens
 
 logger = logging.getLogger(__name__)
 
+# Tokens reserved for the instructions and metadata wrapped around the content
+PROMPT_OVERHEAD_TOKENS = 400
+
 
 class DocumentSummarizer:
     """Handles automatic document summarization using OpenAI"""
@@ -29,7 +33,9 @@ class DocumentSummarizer:
                 """
 
             # Truncate content if too long
-            truncated_content = self._truncate_content(content)
+            truncated_content = self._truncate_content(
+                content, settings.summary_input_tokens, completion_tokens=500
+            )
 
             prompt = f"""
             You are an expert RFP (Request for Proposal) analyst. Please provide a comprehensive summary of the following RFP document.
@@ -76,7 +82,9 @@ class DocumentSummarizer:
     ) -> List[str]:
         """Extract key points from document"""
         try:
-            truncated_content = self._truncate_content(content, max_length=2000)
+            truncated_content = self._truncate_content(
+                content, settings.key_points_input_tokens, completion_tokens=300
+            )
 
             prompt = f"""
             Extract the 5-7 most important key points from this RFP document. Focus on critical requirements, 
@@ -125,7 +133,9 @@ class DocumentSummarizer:
     ) -> str:
         """Classify document complexity level"""
         try:
-            truncated_content = self._truncate_content(content, max_length=1500)
+            truncated_content = self._truncate_content(
+                content, settings.complexity_input_tokens, completion_tokens=50
+            )
 
             prompt = f"""
             Classify the complexity of this RFP document as one of: Simple, Medium, Complex, Very Complex.
@@ -170,19 +180,22 @@ class DocumentSummarizer:
             logger.error(f"Error classifying complexity: {str(e)}")
             return "Medium"
 
-    def _truncate_content(self, content: str, max_length: int = 3000) -> str:
+    def _truncate_content(
+        self, content: str, max_tokens: int, completion_tokens: int = 0
+    ) -> str:
         """Truncate content to fit within token limits"""
-        if len(content) <= max_length:
-            return content
-
-        # Try to truncate at sentence boundaries
-        truncated = content[:max_length]
-        last_sentence = truncated.rfind(".")
-
-        if last_sentence > max_length * 0.8:  # If we have a good sentence ending
-            return truncated[: last_sentence + 1]
-
-        return truncated + "..."
+        # Never exceed what the model's context has left after the prompt and completion
+        available = (
+            settings.openai_context_tokens
+            - PROMPT_OVERHEAD_TOKENS
+            - completion_tokens
+        )
+        budget = max(0, min(max_tokens, available))
+
+        truncated = truncate_to_tokens(content, budget, model=self.model)
+        if len(truncated) < len(content):
+            return truncated + "..."
+        return truncated
 
     def _generate_fallback_summary(
         self, content: str, metadata: Dict[str, any] = None
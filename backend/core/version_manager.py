@@ -1,24 +1,93 @@
-import difflib
 import hashlib
 import os
-from typing import Dict, List, Tuple, Optional
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple, Optional
 from datetime import datetime
 import re
 import logging
 
+import numpy as np
+
+from config.settings import settings
+from core.minhash import MinHasher, MinHashLSH, jaccard, minhash_signature, shingle_hashes
+
 logger = logging.getLogger(__name__)
 
+_VERSION = re.compile(r"v?(\d+)(?:\.(\d+))?", re.IGNORECASE)
 
-class VersionManager:
-    """Handles semantic versioning for duplicate document detection"""
 
-    def __init__(self):
-        self.document_versions = {}  # Track versions by base document
+class VersionManager:
+    """
+    Handles semantic versioning for duplicate document detection.
+    The registry of documents (base name, content hash, version, parent,
+    MinHash signature) is kept in SQLite next to the vector store, with one
+    row per LSH band of each signature, so lineage survives across runs and
+    processes. A new document is only compared with the few live documents
+    it shares a band with. Their similarity is the exact shingle Jaccard when
+    content_loader (document ID -> text) can supply the text, and the
+    signature estimate otherwise. Removed documents stay in the registry as
+    history, so version numbers keep counting up.
+    """
+
+    def __init__(
+        self,
+        content_loader: Optional[Callable[[str], Optional[str]]] = None,
+        path: Optional[str] = None,
+    ):
+        self.path = path or settings.version_registry_path or os.path.join(
+            settings.chroma_persist_dir, "version_registry.sqlite3"
+        )
+        self.lsh = MinHashLSH()
+        self.content_loader = content_loader
         self.similarity_thresholds = {
-            "minor": 0.95,  # Minor changes (v1.0 -> v1.1)
-            "major": 0.80,  # Major changes but same doc (v1.0 -> v2.0)
-            "new": 0.80,  # New document despite similar name
+            "minor": settings.version_minor_similarity,  # Minor changes (v1.0 -> v1.1)
+            "major": settings.version_major_similarity,  # Major changes but same doc (v1.0 -> v2.0)
+            "new": settings.version_major_similarity,  # New document despite similar name
         }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        # Re-entrant: assign_version holds it across determine and register
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                document_id TEXT PRIMARY KEY,
+                base_name TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                version TEXT NOT NULL,
+                major INTEGER NOT NULL,
+                minor INTEGER NOT NULL,
+                parent_id TEXT,
+                signature BLOB,
+                created_at TEXT NOT NULL,
+                removed_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_documents_version ON documents(base_name, major, minor);
+            CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents(content_hash);
+            CREATE TABLE IF NOT EXISTS lsh_bands (
+                band INTEGER NOT NULL,
+                key BLOB NOT NULL,
+                document_id TEXT NOT NULL,
+                PRIMARY KEY (band, key, document_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_lsh_bands_document ON lsh_bands(document_id);
+            """
+        )
+        # Registries written before base names dropped the file's directories
+        self.conn.executemany(
+            "UPDATE documents SET base_name = ? WHERE document_id = ?",
+            [
+                (self.extract_base_name(re.split(r"[\\/]", base_name)[-1]), document_id)
+                for document_id, base_name in self.conn.execute(
+                    "SELECT document_id, base_name FROM documents "
+                    "WHERE instr(base_name, '/') OR instr(base_name, '\\')"
+                ).fetchall()
+            ],
+        )
+        self.conn.commit()
 
     def extract_base_name(self, filename: str) -> str:
         """Extract base name from filename for version comparison"""
@@ -40,88 +109,112 @@ class VersionManager:
         # Remove trailing spaces and normalize
         return base_name.strip().lower()
 
+    def _base_name(self, file_path: str) -> str:
+        """Base name of a file path, without its directories (a registry key)"""
+        return self.extract_base_name(os.path.basename(str(file_path)))
+
     def generate_content_hash(self, content: str) -> str:
         """Generate SHA-256 hash of content for versioning"""
         return hashlib.sha256(content.encode("utf-8")).hexdigest()
 
     def calculate_similarity(self, content1: str, content2: str) -> float:
-        """Calculate text similarity ratio using difflib"""
-        return difflib.SequenceMatcher(None, content1, content2).ratio()
+        """Jaccard similarity of the word shingles of two texts"""
+        return jaccard(shingle_hashes(content1), shingle_hashes(content2))
 
     def get_next_minor_version(self, base_name: str) -> str:
         """Get next minor version (v1.0 -> v1.1)"""
-        if base_name not in self.document_versions:
-            return "v1.0"
-
-        versions = self.document_versions[base_name]
-        if not versions:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT major, minor FROM documents WHERE base_name = ? "
+                "ORDER BY major DESC, minor DESC LIMIT 1",
+                (base_name,),
+            ).fetchone()
+        if row is None:
             return "v1.0"
-
-        # Find highest major version
-        major_versions = {}
-        for version_info in versions.values():
-            major = int(version_info.split(".")[0][1:])
-            minor = int(version_info.split(".")[1])
-            if major not in major_versions or minor > major_versions[major]:
-                major_versions[major] = minor
-
-        latest_major = max(major_versions.keys())
-        latest_minor = major_versions[latest_major]
-
-        return f"v{latest_major}.{latest_minor + 1}"
+        return f"v{row[0]}.{row[1] + 1}"
 
     def get_next_major_version(self, base_name: str) -> str:
         """Get next major version (v1.1 -> v2.0)"""
-        if base_name not in self.document_versions:
-            return "v1.0"
-
-        versions = self.document_versions[base_name]
-        if not versions:
-            return "v1.0"
-
-        # Find highest major version
-        major_versions = set()
-        for version_info in versions.values():
-            major = int(version_info.split(".")[0][1:])
-            major_versions.add(major)
-
-        if not major_versions:
+        with self._lock:
+            latest_major = self.conn.execute(
+                "SELECT MAX(major) FROM documents WHERE base_name = ?", (base_name,)
+            ).fetchone()[0]
+        if latest_major is None:
             return "v1.0"
-
-        latest_major = max(major_versions)
         return f"v{latest_major + 1}.0"
 
     def determine_version(
-        self, content: str, filename: str, existing_documents: Dict[str, Dict] = None
+        self,
+        content: str,
+        filename: str,
+        existing_documents: Dict[str, Dict] = None,
+        signature: Optional[List[int]] = None,
+        superseded: Optional[Iterable[str]] = None,
     ) -> Tuple[str, bool, Optional[str]]:
         """
-        Determine document version based on content similarity
+        Determine document version based on content similarity.
+        Pass the document's MinHash signature if it was computed at extraction;
+        existing_documents adds documents that are not in the registry.
+        superseded are documents this one replaces (earlier indexing of the
+        same file): never exact duplicates, but still lineage parents.
 
         Returns:
             (version, is_duplicate, parent_document_id)
         """
         if existing_documents is None:
             existing_documents = {}
+        superseded = set(superseded or ())
 
-        base_name = self.extract_base_name(filename)
+        base_name = self._base_name(filename)
         content_hash = self.generate_content_hash(content)
 
         # Check if exact content already exists
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT document_id, version FROM documents "
+                "WHERE content_hash = ? AND removed_at IS NULL ORDER BY created_at",
+                (content_hash,),
+            ).fetchall()
+        for doc_id, version in rows:
+            if doc_id not in superseded:
+                return version, True, doc_id
         for doc_id, doc_info in existing_documents.items():
-            if doc_info.get("content_hash") == content_hash:
+            if doc_id not in superseded and doc_info.get("content_hash") == content_hash:
                 return doc_info.get("document_version", "v1.0"), True, doc_id
 
-        # Check for similar documents by base name
-        similar_docs = []
+        # Candidates with the same base name: live documents sharing an LSH
+        # band, plus any passed in
+        if signature is None:
+            signature = minhash_signature(content)
+        signature = np.asarray(signature, dtype=np.uint32)
+        candidates = {
+            doc_id: np.frombuffer(blob, dtype=np.uint32) if blob is not None else None
+            for doc_id, blob in self._band_candidates(base_name, signature)
+        }
         for doc_id, doc_info in existing_documents.items():
-            existing_base = self.extract_base_name(doc_info.get("filename", ""))
+            if doc_id not in candidates and (
+                self._base_name(doc_info.get("filename", "")) == base_name
+            ):
+                candidates[doc_id] = doc_info.get("minhash")
 
-            if base_name == existing_base:
-                similarity = self.calculate_similarity(
-                    content, doc_info.get("content", "")
-                )
-                if similarity > self.similarity_thresholds["new"]:
-                    similar_docs.append((doc_id, similarity, doc_info))
+        similar_docs = []
+        shingles = None
+        for doc_id, other_signature in candidates.items():
+            other = existing_documents.get(doc_id, {}).get("content")
+            if other is None and self.content_loader is not None:
+                other = self.content_loader(doc_id)
+
+            if other is not None:
+                if shingles is None:
+                    shingles = shingle_hashes(content)
+                similarity = jaccard(shingles, shingle_hashes(other))
+            elif other_signature is not None:
+                similarity = MinHasher.estimate_similarity(signature, other_signature)
+            else:
+                continue
+
+            if similarity >= self.similarity_thresholds["new"]:
+                similar_docs.append((doc_id, similarity))
 
         if not similar_docs:
             # No similar documents found - new document
@@ -129,7 +222,7 @@ class VersionManager:
 
         # Sort by similarity (highest first)
         similar_docs.sort(key=lambda x: x[1], reverse=True)
-        best_match_id, best_similarity, best_match_info = similar_docs[0]
+        best_match_id, best_similarity = similar_docs[0]
 
         if best_similarity >= self.similarity_thresholds["minor"]:
             # Minor change
@@ -146,37 +239,184 @@ class VersionManager:
             return "v1.0", False, None
 
     def register_document(
-        self, document_id: str, filename: str, content: str, version: str
+        self,
+        document_id: str,
+        filename: str,
+        content: str,
+        version: str,
+        signature: Optional[List[int]] = None,
+        parent_id: Optional[str] = None,
     ):
-        """Register a document in the version tracking system"""
-        base_name = self.extract_base_name(filename)
-        content_hash = self.generate_content_hash(content)
-
-        if base_name not in self.document_versions:
-            self.document_versions[base_name] = {}
-
-        self.document_versions[base_name][content_hash] = version
-        logger.info(
-            f"Registered document {document_id} as {version} for base '{base_name}'"
-        )
+        """Register a document and its MinHash signature in the version tracking system"""
+        with self._lock:
+            try:
+                self._insert(document_id, filename, content, version, signature, parent_id)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def assign_version(
+        self,
+        document_id: str,
+        content: str,
+        filename: str,
+        existing_documents: Dict[str, Dict] = None,
+        signature: Optional[List[int]] = None,
+        superseded: Optional[Iterable[str]] = None,
+    ) -> Tuple[str, bool, Optional[str]]:
+        """
+        determine_version and register_document in one write transaction, so
+        concurrent writers (other threads or processes) cannot hand out the
+        same version. Returns (version, is_duplicate, parent_document_id).
+        """
+        if signature is None:
+            signature = minhash_signature(content)
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                version, is_duplicate, parent_id = self.determine_version(
+                    content, filename, existing_documents, signature=signature,
+                    superseded=superseded
+                )
+                self._insert(document_id, filename, content, version, signature, parent_id)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return version, is_duplicate, parent_id
+
+    def remove_documents(self, document_ids: List[str], keep_history: bool = True) -> int:
+        """
+        Stop matching new documents against these documents. With
+        keep_history they stay in the lineage and keep counting towards
+        version numbers (documents deleted from the index); without it they
+        are forgotten (documents that were never written).
+        """
+        if not document_ids:
+            return 0
+        removed = 0
+        with self._lock:
+            for start in range(0, len(document_ids), 500):
+                part = list(document_ids[start:start + 500])
+                placeholders = ",".join("?" * len(part))
+                self.conn.execute(
+                    f"DELETE FROM lsh_bands WHERE document_id IN ({placeholders})", part
+                )
+                if keep_history:
+                    removed += self.conn.execute(
+                        f"UPDATE documents SET removed_at = ? "
+                        f"WHERE document_id IN ({placeholders}) AND removed_at IS NULL",
+                        [datetime.now().isoformat(), *part],
+                    ).rowcount
+                else:
+                    removed += self.conn.execute(
+                        f"DELETE FROM documents WHERE document_id IN ({placeholders})", part
+                    ).rowcount
+            self.conn.commit()
+        return removed
+
+    def reset(self):
+        """Forget every registered document"""
+        with self._lock:
+            self.conn.execute("DELETE FROM lsh_bands")
+            self.conn.execute("DELETE FROM documents")
+            self.conn.commit()
+
+    def get_document(self, document_id: str) -> Optional[Dict]:
+        """Registry entry of a document, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT document_id, base_name, content_hash, version, parent_id, created_at, removed_at "
+                "FROM documents WHERE document_id = ?",
+                (document_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ["document_id", "base_name", "content_hash", "version", "parent_id", "created_at", "removed_at"]
+        return dict(zip(keys, row))
 
     def get_document_versions(self, base_name: str) -> List[str]:
         """Get all versions for a given base document"""
-        if base_name not in self.document_versions:
-            return []
-
-        return list(set(self.document_versions[base_name].values()))
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT version, major, minor FROM documents "
+                "WHERE base_name = ? ORDER BY major, minor",
+                (base_name,),
+            ).fetchall()
+        return [row[0] for row in rows]
 
     def get_version_info(self) -> Dict:
-        """Get version tracking statistics"""
-        total_base_docs = len(self.document_versions)
-        total_versions = sum(
-            len(versions) for versions in self.document_versions.values()
-        )
+        """Get version tracking statistics (documents currently indexed)"""
+        with self._lock:
+            base_documents = [
+                row[0] for row in self.conn.execute(
+                    "SELECT DISTINCT base_name FROM documents WHERE removed_at IS NULL ORDER BY base_name"
+                )
+            ]
+            total_versions = self.conn.execute(
+                "SELECT COUNT(*) FROM (SELECT DISTINCT base_name, content_hash "
+                "FROM documents WHERE removed_at IS NULL)"
+            ).fetchone()[0]
+        total_base_docs = len(base_documents)
 
         return {
             "total_base_documents": total_base_docs,
             "total_versions": total_versions,
             "avg_versions_per_document": total_versions / max(total_base_docs, 1),
-            "base_documents": list(self.document_versions.keys()),
+            "base_documents": base_documents,
         }
+
+    def _insert(
+        self,
+        document_id: str,
+        filename: str,
+        content: str,
+        version: str,
+        signature: Optional[List[int]],
+        parent_id: Optional[str],
+    ):
+        base_name = self._base_name(filename)
+        content_hash = self.generate_content_hash(content)
+        if signature is None:
+            signature = minhash_signature(content)
+        signature = np.asarray(signature, dtype=np.uint32)
+        match = _VERSION.match(version or "")
+        major, minor = (int(match.group(1)), int(match.group(2) or 0)) if match else (1, 0)
+
+        self.conn.execute("DELETE FROM lsh_bands WHERE document_id = ?", (document_id,))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO documents "
+            "(document_id, base_name, content_hash, version, major, minor, parent_id, signature, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                document_id, base_name, content_hash, version, major, minor, parent_id,
+                signature.tobytes(), datetime.now().isoformat(),
+            ),
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO lsh_bands (band, key, document_id) VALUES (?, ?, ?)",
+            [(band, key, document_id) for band, key in enumerate(self.lsh.band_keys(signature))],
+        )
+        logger.info(
+            f"Registered document {document_id} as {version} for base '{base_name}'"
+        )
+
+    def _band_candidates(self, base_name: str, signature: np.ndarray) -> List[Tuple[str, bytes]]:
+        """Live documents with this base name sharing at least one band with the signature"""
+        keys = self.lsh.band_keys(signature)
+        values = ",".join("(?, ?)" for _ in keys)
+        params: List = []
+        for band, key in enumerate(keys):
+            params.extend((band, key))
+        params.append(base_name)
+        # CROSS JOIN keeps SQLite from starting with every document of the base name
+        with self._lock:
+            return self.conn.execute(
+                f"WITH keys(band, key) AS (VALUES {values}) "
+                f"SELECT DISTINCT d.document_id, d.signature FROM keys "
+                f"CROSS JOIN lsh_bands b ON b.band = keys.band AND b.key = keys.key "
+                f"CROSS JOIN documents d ON d.document_id = b.document_id "
+                f"WHERE d.base_name = ? AND d.removed_at IS NULL",
+                params,
+            ).fetchall()
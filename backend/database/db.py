@@ -4,9 +4,10 @@ SQLite database for RFP sessions and sections
 """
 
 import aiosqlite
+import json
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -53,9 +54,25 @@ CREATE TABLE IF NOT EXISTS generation_traces (
     FOREIGN KEY (session_id) REFERENCES rfp_sessions(id)
 );
 
+-- Background generation jobs (durable state for POST /api/jobs/generate)
+CREATE TABLE IF NOT EXISTS generation_jobs (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    status TEXT CHECK(status IN ('queued', 'running', 'completed', 'failed')),
+    context TEXT,  -- JSON stored as text
+    completed_sections TEXT DEFAULT '[]',  -- JSON list of section names saved so far
+    total_sections INTEGER,
+    attempts INTEGER DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (session_id) REFERENCES rfp_sessions(id)
+);
+
 -- Index for faster queries
 CREATE INDEX IF NOT EXISTS idx_sections_session ON sections(session_id);
 CREATE INDEX IF NOT EXISTS idx_traces_session ON generation_traces(session_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON generation_jobs(status);
 """
 
 
@@ -77,6 +94,38 @@ async def init_database():
     logger.info("Database initialized successfully")
 
 
+async def save_section(db, session_id: str, section: Dict[str, Any], source_type: str):
+    """Save section to database"""
+    await db.execute(
+        """INSERT INTO sections (session_id, name, source_type, content, assumptions, ai_eval)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        (
+            session_id,
+            section["name"],
+            source_type,
+            section["content"],
+            json.dumps(section.get("assumptions", [])),
+            json.dumps(section.get("aiEval", {}))
+        )
+    )
+
+
+async def update_section(db, session_id: str, section: Dict[str, Any], iteration: int):
+    """Replace a regenerated section's content and evaluation"""
+    await db.execute(
+        """UPDATE sections 
+           SET content = ?, ai_eval = ?, regen_count = ?
+           WHERE session_id = ? AND name = ?""",
+        (
+            section["content"],
+            json.dumps(section.get("aiEval", {})),
+            iteration,
+            session_id,
+            section["name"]
+        )
+    )
+
+
 async def close_database():
     """Close database connection"""
     # Connection is managed per-request, no global connection to close
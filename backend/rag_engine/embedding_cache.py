@@ -0,0 +1,229 @@
+import atexit
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+# Lookups buffered in memory before their counters and LRU times are written
+_FLUSH_LOOKUPS = 1000
+
+
+class EmbeddingCache:
+    """
+    Disk-backed embedding cache keyed by (embedding model, SHA-256 of normalized text).
+    Vectors are stored as float32 blobs in SQLite with size-based LRU eviction.
+    Lookups only read: hit/miss counts and access times are buffered in
+    memory and written with the next put_many, every _FLUSH_LOOKUPS lookups,
+    on close or at exit.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = path or settings.embedding_cache_path or os.path.join(
+            settings.chroma_persist_dir, "embedding_cache.sqlite3"
+        )
+        self.max_bytes = max_bytes or settings.embedding_cache_max_mb * 1024 * 1024
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            );
+            CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access);
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO counters (name, value)
+                VALUES ('hits', 0), ('misses', 0), ('size_bytes', 0);
+            """
+        )
+        self.conn.commit()
+
+        self._pending_hits = 0
+        self._pending_misses = 0
+        self._touched: Dict[tuple, float] = {}
+        atexit.register(self.flush)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Collapse whitespace so formatting-only changes share a cache entry"""
+        return " ".join(text.split())
+
+    @classmethod
+    def text_hash(cls, text: str) -> str:
+        return hashlib.sha256(cls.normalize(text).encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up embeddings; missing entries are returned as None"""
+        hashes = [self.text_hash(text) for text in texts]
+        found: Dict[str, List[float]] = {}
+
+        with self._lock:
+            unique_hashes = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique_hashes), _QUERY_CHUNK):
+                chunk = unique_hashes[start:start + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *chunk],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            hits = sum(1 for text_hash in hashes if text_hash in found)
+            self._pending_hits += hits
+            self._pending_misses += len(hashes) - hits
+            now = time.time()
+            for text_hash in found:
+                self._touched[(model, text_hash)] = now
+            if self._pending_hits + self._pending_misses >= _FLUSH_LOOKUPS:
+                self._commit_pending()
+
+        return [found.get(text_hash) for text_hash in hashes]
+
+    def put_many(self, model: str, texts: List[str], embeddings: List[List[float]]):
+        """Store embeddings and evict least recently used entries if over budget"""
+        now = time.time()
+        rows = {}
+        for text, embedding in zip(texts, embeddings):
+            vector = np.asarray(embedding, dtype=np.float32)
+            rows[self.text_hash(text)] = (vector.shape[0], vector.tobytes())
+
+        with self._lock:
+            self._flush()
+            # An existing (model, text) entry already holds the same vector, so only
+            # newly inserted rows change the cache size
+            added_bytes = 0
+            for text_hash, (dim, blob) in rows.items():
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO embeddings (model, text_hash, dim, vector, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (model, text_hash, dim, blob, now),
+                )
+                if cursor.rowcount:
+                    added_bytes += len(blob)
+            self._add_size(added_bytes)
+            if self._size_bytes() > self.max_bytes:
+                self._evict()
+            self.conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            counters = dict(self.conn.execute("SELECT name, value FROM counters").fetchall())
+
+            hits = counters.get("hits", 0) + self._pending_hits
+            misses = counters.get("misses", 0) + self._pending_misses
+        return {
+            "entries": entries,
+            "size_bytes": counters.get("size_bytes", 0),
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+    def flush(self):
+        """Write buffered hit/miss counts and access times"""
+        with self._lock:
+            self._commit_pending()
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        with self._lock:
+            self.conn.close()
+
+    def clear(self):
+        with self._lock:
+            self._pending_hits = self._pending_misses = 0
+            self._touched = {}
+            self.conn.execute("DELETE FROM embeddings")
+            self.conn.execute("UPDATE counters SET value = 0")
+            self.conn.commit()
+
+    def _commit_pending(self):
+        """Best effort: a busy database leaves the lookups buffered for later"""
+        try:
+            if self._flush():
+                self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.warning(f"Could not write embedding cache statistics: {e}")
+
+    def _flush(self) -> bool:
+        """Apply buffered lookups in the current transaction; False if none"""
+        if not (self._pending_hits or self._pending_misses or self._touched):
+            return False
+        self.conn.executemany(
+            "UPDATE embeddings SET last_access = MAX(last_access, ?) WHERE model = ? AND text_hash = ?",
+            [(accessed, model, text_hash) for (model, text_hash), accessed in self._touched.items()],
+        )
+        self.conn.execute(
+            "UPDATE counters SET value = value + ? WHERE name = 'hits'", (self._pending_hits,)
+        )
+        self.conn.execute(
+            "UPDATE counters SET value = value + ? WHERE name = 'misses'", (self._pending_misses,)
+        )
+        # Cleared only once the statements succeeded, so a failed flush is retried
+        self._pending_hits = self._pending_misses = 0
+        self._touched = {}
+        return True
+
+    def _size_bytes(self) -> int:
+        return self.conn.execute(
+            "SELECT value FROM counters WHERE name = 'size_bytes'"
+        ).fetchone()[0]
+
+    def _add_size(self, delta: int):
+        self.conn.execute(
+            "UPDATE counters SET value = MAX(0, value + ?) WHERE name = 'size_bytes'",
+            (delta,),
+        )
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is 90% of its budget"""
+        target = int(self.max_bytes * 0.9)
+        size = self._size_bytes()
+        evicted = 0
+        while size > target:
+            rows = self.conn.execute(
+                "SELECT rowid, dim FROM embeddings ORDER BY last_access LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                size = 0
+                break
+            remove = []
+            for rowid, dim in rows:
+                remove.append((rowid,))
+                size -= dim * 4
+                if size <= target:
+                    break
+            self.conn.executemany("DELETE FROM embeddings WHERE rowid = ?", remove)
+            evicted += len(remove)
+        self.conn.execute(
+            "UPDATE counters SET value = ? WHERE name = 'size_bytes'", (max(0, size),)
+        )
+        logger.info(f"Evicted {evicted} embeddings from cache")
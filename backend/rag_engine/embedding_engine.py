@@ -1,55 +1,238 @@
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
 from openai import OpenAI
 from config.settings import settings
+from rag_engine.embedding_cache import EmbeddingCache
+from utils.token_budget import count_tokens, truncate_to_tokens
 
 logger = logging.getLogger(__name__)
 
+# OpenAI embeddings endpoint limits per request
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = 300000
+
 class EmbeddingEngine:
     """
     Engine for generating embeddings using OpenAI's API.
     """
-    
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+
+    def __init__(self,
+                 cache: Optional[EmbeddingCache] = None,
+                 client: Optional[OpenAI] = None):
+        self.client = client or OpenAI(api_key=settings.openai_api_key)
         self.model = settings.openai_embedding_model
-        
-    def generate_embedding(self, text: str) -> List[float]:
+        self.cache = cache
+        if self.cache is None and settings.embedding_cache_enabled:
+            self.cache = EmbeddingCache()
+
+    def generate_embedding(self, text: str, timeout: Optional[float] = None) -> List[float]:
         """
         Generate embedding for a single text string.
-        Truncates text if it exceeds max tokens.
+        Truncates text if it exceeds max tokens. With a timeout the request is
+        made once, without retries, and fails after that many seconds.
         """
         try:
-            # clean text
-            text = text.replace("\n", " ")
-            
-            # Truncate if necessary
-            # Simple character truncation as approximation (1 token ~= 4 chars)
-            # Safe limit: max_tokens * 3 to be conservative (since some chars are < 1 byte, but many tokens are > 1 char)
-            # Ideally use tiktoken, but to avoid extra deps for now, we'll use a safe char limit.
-            # settings.max_tokens is usually 8191 for text-embedding-3-small
-            max_chars = settings.max_tokens * 3
-            if len(text) > max_chars:
-                text = text[:max_chars]
-                # logging truncation
-                # logger.debug(f"Truncated text to {max_chars} chars for embedding")
-            
-            response = self.client.embeddings.create(
+            text = self._prepare_text(text)
+            if self.cache:
+                cached = self.cache.get_many(self.model, [text])[0]
+                if cached is not None:
+                    return cached
+
+            client = self.client
+            if timeout is not None:
+                client = client.with_options(timeout=timeout, max_retries=0)
+            response = client.embeddings.create(
                 input=[text],
                 model=self.model
             )
-            
-            return response.data[0].embedding
-            
+
+            embedding = response.data[0].embedding
+            if self.cache:
+                self.cache.put_many(self.model, [text], [embedding])
+            return embedding
+
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             raise
 
+    def generate_embeddings(self,
+                            texts: List[str],
+                            timeout: Optional[float] = None) -> List[List[float]]:
+        """
+        Generate embeddings for many texts with as few requests as possible.
+        Inputs are packed into batches bounded by settings.batch_size and the
+        provider's per-request item/token limits; a few batches run concurrently
+        and only a failed batch is retried. Output order matches input order.
+        Cached texts are served from the embedding cache without an API call.
+        With a timeout each request is made once and fails after that many seconds.
+        """
+        if not texts:
+            return []
+
+        prepared = [self._prepare_text(text) for text in texts]
+        embeddings: List[Optional[List[float]]] = [None] * len(prepared)
+        if self.cache:
+            embeddings = self.cache.get_many(self.model, prepared)
+
+        # Embed each distinct missing text once
+        missing: Dict[str, List[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(prepared[i], []).append(i)
+        if not missing:
+            return embeddings
+
+        missing_texts = list(missing)
+        batches = self._pack_batches(missing_texts)
+
+        workers = max(1, min(settings.embedding_max_concurrency, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            batch_results = pool.map(
+                lambda indices: self._embed_batch([missing_texts[i] for i in indices], timeout),
+                batches
+            )
+            for indices, batch_embeddings in zip(batches, batch_results):
+                batch_texts = [missing_texts[i] for i in indices]
+                if self.cache:
+                    self.cache.put_many(self.model, batch_texts, batch_embeddings)
+                for text, embedding in zip(batch_texts, batch_embeddings):
+                    for i in missing[text]:
+                        embeddings[i] = embedding
+
+        logger.debug(
+            f"Embedded {len(missing_texts)} of {len(prepared)} texts in {len(batches)} requests"
+        )
+        return embeddings
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Embedding cache statistics (entries, size and hit/miss counters).
+        """
+        if not self.cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+
     def generate_document_embedding(self, content: str, metadata: Dict[str, Any]) -> List[float]:
         """
-        Generate embedding for a document. 
+        Generate embedding for a document.
         Currently just embeds the content, but could be enhanced to include metadata.
         """
         # For now, we just embed the content
         # In a more advanced version, we might combine title + summary + content
         return self.generate_embedding(content)
+
+    def generate_document_embeddings(self,
+                                     contents: List[str],
+                                     metadatas: List[Dict[str, Any]]) -> List[List[float]]:
+        """
+        Batched variant of generate_document_embedding.
+        """
+        return self.generate_embeddings(contents)
+
+    def generate_chunked_document_embeddings(
+            self,
+            chunk_texts: List[List[str]],
+            known: Optional[List[Optional[Dict[str, List[float]]]]] = None
+    ) -> Tuple[List[List[List[float]]], List[List[float]]]:
+        """
+        Embed the chunks of several documents in one batched pass.
+        Returns (chunk embeddings per document, document embeddings); a document
+        embedding is the normalized mean of its chunk embeddings. A document
+        without chunks is embedded from an empty text. `known` optionally maps,
+        per document, chunk texts to embeddings that are already available
+        (e.g. from a duplicate's parent); those texts are not sent.
+        """
+        texts = [chunks or [""] for chunks in chunk_texts]
+        known = known or [None] * len(texts)
+        missing = [
+            text
+            for chunks, reuse in zip(texts, known)
+            for text in chunks
+            if not reuse or text not in reuse
+        ]
+        flat = iter(self.generate_embeddings(missing))
+
+        chunk_embeddings = []
+        document_embeddings = []
+        for chunks, reuse in zip(texts, known):
+            embeddings = [
+                reuse[text] if reuse and text in reuse else next(flat)
+                for text in chunks
+            ]
+            chunk_embeddings.append(embeddings)
+            document_embeddings.append(self.pool_embeddings(embeddings))
+        return chunk_embeddings, document_embeddings
+
+    @staticmethod
+    def pool_embeddings(embeddings: List[List[float]]) -> List[float]:
+        """
+        Mean of several embeddings, L2-normalized for cosine search.
+        """
+        mean = np.mean(np.asarray(embeddings, dtype=np.float32), axis=0)
+        norm = np.linalg.norm(mean)
+        if norm > 0:
+            mean /= norm
+        return mean.tolist()
+
+    def _prepare_text(self, text: str) -> str:
+        """
+        Clean text and truncate it to the model's input limit.
+        """
+        # clean text
+        text = text.replace("\n", " ")
+
+        # Truncate at the real token limit (settings.max_tokens is 8191 for text-embedding-3-small)
+        text = truncate_to_tokens(text, settings.max_tokens, model=self.model)
+
+        # The API rejects empty inputs
+        return text or " "
+
+    def _pack_batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        Group text indices into requests within the item and token limits.
+        """
+        max_items = max(1, min(settings.batch_size, MAX_INPUTS_PER_REQUEST))
+        max_tokens = min(settings.embedding_max_request_tokens, MAX_TOKENS_PER_REQUEST)
+
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for i, text in enumerate(texts):
+            tokens = count_tokens(text, self.model)
+            if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, batch: List[str], timeout: Optional[float] = None) -> List[List[float]]:
+        """
+        Embed one request's worth of texts, retrying this batch on failure
+        (no retries when a timeout is given).
+        """
+        client = self.client
+        attempts = max(1, settings.embedding_max_retries + 1)
+        if timeout is not None:
+            client = client.with_options(timeout=timeout, max_retries=0)
+            attempts = 1
+        for attempt in range(attempts):
+            try:
+                response = client.embeddings.create(
+                    input=batch,
+                    model=self.model
+                )
+                data = sorted(response.data, key=lambda item: item.index)
+                return [item.embedding for item in data]
+            except Exception as e:
+                if attempt == attempts - 1:
+                    logger.error(f"Error generating embeddings for batch of {len(batch)}: {e}")
+                    raise
+                delay = 2 ** attempt
+                logger.warning(f"Embedding batch of {len(batch)} failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
@@ -0,0 +1,280 @@
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+from config.settings import settings
+from rag_engine.metadata_filter import matches_where
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+# Words with digits, dots, hyphens and slashes stay whole: "60076-1", "4.2.1", "33/11"
+_TOKEN = re.compile(r"[a-z0-9]+(?:[./-][a-z0-9]+)*")
+_NUMBER = re.compile(r"^\d+(?:\.\d+)?$")
+
+# Prefixes of standard codes ("IS 2026", "IEC 60076", "IS:1554"); "is" is also a stopword
+_STANDARD_PREFIXES = {"is", "iec", "iso", "bs", "ieee", "astm", "din", "en", "cbip", "cea"}
+
+# Units joined to a preceding number ("20 MVA" -> "20mva")
+_UNITS = {
+    "v", "kv", "a", "ka", "ma", "va", "kva", "mva", "w", "kw", "mw", "kwh", "mwh", "hz",
+    "mm", "cm", "m", "km", "sqmm", "kg", "mt", "ton", "tons", "pc", "pcs", "nos", "rmt",
+    "day", "days", "week", "weeks", "month", "months", "year", "years", "hrs", "hours",
+}
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "in", "is", "it", "its", "of", "on", "or", "shall", "that", "the", "this",
+    "to", "was", "were", "will", "with", "which", "been", "all", "any",
+}
+
+
+def _stem(word: str) -> str:
+    """Light plural stripping ("cables" -> "cable", "batteries" -> "battery")"""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokens for BM25. Besides plain words this keeps clause numbers and codes
+    intact and adds joined forms for standard codes ("IS 2026" -> "is2026")
+    and quantities with units ("20 MVA" -> "20mva"), so either spelling matches.
+    """
+    raw = _TOKEN.findall(text.lower())
+    tokens: List[str] = []
+    for i, token in enumerate(raw):
+        following = raw[i + 1] if i + 1 < len(raw) else ""
+
+        if token in _STANDARD_PREFIXES and following[:1].isdigit():
+            tokens.append(token + following)
+            if token != "is":
+                tokens.append(token)
+            continue
+        if _NUMBER.match(token) and following in _UNITS:
+            tokens.append(token + following)
+
+        if token in _STOPWORDS:
+            continue
+        tokens.append(_stem(token) if token.isalpha() else token)
+
+        # Compound codes also match on their parts ("60076-1" -> "60076")
+        if not token.isalnum():
+            tokens.extend(part for part in re.split(r"[./-]", token) if len(part) > 1)
+    return tokens
+
+
+class KeywordIndex:
+    """
+    Persistent BM25 inverted index over chunk text, stored in SQLite.
+    Postings are updated incrementally per chunk; document frequencies are
+    read from the postings at query time, while the chunk count and total
+    length (for the average length) are running totals kept with every write.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.keyword_index_path or os.path.join(
+            settings.chroma_persist_dir, "keyword_index.sqlite3"
+        )
+        self.k1 = settings.bm25_k1
+        self.b = settings.bm25_b
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                chunk_id TEXT PRIMARY KEY,
+                document_id TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks(document_id);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, chunk_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings(chunk_id);
+            CREATE TABLE IF NOT EXISTS totals (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                chunks INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            """
+        )
+        # Indexes created before the totals table are counted once
+        self.conn.execute(
+            "INSERT OR IGNORE INTO totals (id, chunks, length) "
+            "SELECT 1, COUNT(*), COALESCE(SUM(length), 0) FROM chunks"
+        )
+        self.conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def upsert(self, items: List[Dict[str, Any]]):
+        """Index or re-index chunks ({id, content, metadata} with metadata.document_id)"""
+        if not items:
+            return
+        # A repeated ID keeps its last occurrence
+        items = list({item["id"]: item for item in items}.values())
+        rows = []
+        postings = []
+        for item in items:
+            metadata = item.get("metadata") or {}
+            terms = Counter(tokenize(item.get("content") or ""))
+            rows.append((
+                item["id"],
+                metadata.get("document_id", item["id"]),
+                sum(terms.values()),
+                item.get("content") or "",
+                json.dumps(metadata),
+            ))
+            postings.extend((term, item["id"], tf) for term, tf in terms.items())
+
+        with self._lock:
+            # One write transaction, so concurrent writers keep the totals exact
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete_chunks([row[0] for row in rows])
+                self.conn.executemany(
+                    "INSERT INTO chunks (chunk_id, document_id, length, content, metadata) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self.conn.executemany(
+                    "INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)", postings
+                )
+                self._add_totals(len(rows), sum(row[2] for row in rows))
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def delete_documents(self, document_ids: List[str]) -> int:
+        """Remove every chunk of the given documents"""
+        if not document_ids:
+            return 0
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                chunk_ids = []
+                for start in range(0, len(document_ids), _QUERY_CHUNK):
+                    part = document_ids[start:start + _QUERY_CHUNK]
+                    placeholders = ",".join("?" * len(part))
+                    chunk_ids.extend(
+                        row[0] for row in self.conn.execute(
+                            f"SELECT chunk_id FROM chunks WHERE document_id IN ({placeholders})", part
+                        )
+                    )
+                self._delete_chunks(chunk_ids)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return len(chunk_ids)
+
+    def reset(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM postings")
+            self.conn.execute("DELETE FROM chunks")
+            self.conn.execute("UPDATE totals SET chunks = 0, length = 0")
+            self.conn.commit()
+
+    def search(self,
+               query: str,
+               n_results: int = 20,
+               where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """BM25-ranked chunks as {"id", "content", "metadata", "score"}"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or n_results <= 0:
+            return []
+
+        with self._lock:
+            total, total_length = self.conn.execute(
+                "SELECT chunks, length FROM totals"
+            ).fetchone()
+            if not total:
+                return []
+            average_length = total_length / total
+
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self.conn.execute(
+                    "SELECT p.chunk_id, p.tf, c.length FROM postings p "
+                    "JOIN chunks c ON c.chunk_id = p.chunk_id WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+                for chunk_id, tf, length in postings:
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            results = []
+            # Filters are applied in rank order until enough chunks qualify
+            for start in range(0, len(ranked), _QUERY_CHUNK):
+                page = ranked[start:start + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(page))
+                rows = {
+                    row[0]: row
+                    for row in self.conn.execute(
+                        f"SELECT chunk_id, content, metadata FROM chunks WHERE chunk_id IN ({placeholders})",
+                        [chunk_id for chunk_id, _ in page],
+                    )
+                }
+                for chunk_id, score in page:
+                    metadata = json.loads(rows[chunk_id][2])
+                    if not matches_where(metadata, where):
+                        continue
+                    results.append({
+                        "id": chunk_id,
+                        "content": rows[chunk_id][1],
+                        "metadata": metadata,
+                        "score": score,
+                    })
+                    if len(results) >= n_results:
+                        return results
+            return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            chunks = self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            terms = self.conn.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0]
+        return {"chunks": chunks, "terms": terms}
+
+    def _delete_chunks(self, chunk_ids: List[str]):
+        for start in range(0, len(chunk_ids), _QUERY_CHUNK):
+            part = chunk_ids[start:start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(part))
+            removed, removed_length = self.conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks WHERE chunk_id IN ({placeholders})", part
+            ).fetchone()
+            self.conn.execute(f"DELETE FROM postings WHERE chunk_id IN ({placeholders})", part)
+            self.conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", part)
+            self._add_totals(-removed, -removed_length)
+
+    def _add_totals(self, chunks: int, length: int):
+        self.conn.execute(
+            "UPDATE totals SET chunks = chunks + ?, length = length + ?", (chunks, length)
+        )
@@ -0,0 +1,88 @@
+"""
+ChromaDB-style where clauses evaluated outside ChromaDB, for the keyword
+index (one metadata dict at a time) and the NumPy index (whole columns).
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+COMPARISONS = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+    "$contains": lambda a, b: isinstance(a, list) and b in a,
+    "$not_contains": lambda a, b: not (isinstance(a, list) and b in a),
+    "$in": lambda a, b: a in b,
+    "$nin": lambda a, b: a not in b,
+}
+
+
+def _operand(operator: str, operand: Any) -> Any:
+    """Check the operator; $in/$nin lists become sets for constant-time lookups"""
+    if operator not in COMPARISONS:
+        raise ValueError(f"Unsupported filter operator: {operator}")
+    if operator in ("$in", "$nin"):
+        return {value for value in operand if not isinstance(value, list)}
+    return operand
+
+
+def _compare(operator: str, value: Any, operand: Any) -> bool:
+    if isinstance(value, list) and operator in ("$in", "$nin"):
+        # List values are never members of the scalar operands
+        return operator == "$nin"
+    return COMPARISONS[operator](value, operand)
+
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a where clause against one metadata dict"""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, operand in condition.items():
+                if not _compare(operator, value, _operand(operator, operand)):
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def where_mask(where: Dict[str, Any],
+               column: Callable[[str], np.ndarray],
+               size: int) -> np.ndarray:
+    """
+    Boolean mask over `size` rows for a where clause, with the same semantics
+    as matches_where. column(field) returns the field's values as an object
+    array (None where a row lacks the field).
+    """
+    mask = np.ones(size, dtype=bool)
+    for key, condition in where.items():
+        if key == "$and":
+            for clause in condition:
+                mask &= where_mask(clause, column, size)
+        elif key == "$or":
+            either = np.zeros(size, dtype=bool)
+            for clause in condition:
+                either |= where_mask(clause, column, size)
+            mask &= either
+        elif not isinstance(condition, dict):
+            mask &= column(key) == condition
+        else:
+            values = column(key)
+            for operator, operand in condition.items():
+                operand = _operand(operator, operand)
+                mask &= np.fromiter(
+                    (_compare(operator, value, operand) for value in values), dtype=bool, count=size
+                )
+    return mask
@@ -0,0 +1,577 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from config.settings import settings
+from rag_engine.metadata_filter import where_mask
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+
+# Rows dequantized per step when scoring int8 vectors; small enough that the
+# float32 tile stays in CPU cache
+_SCORE_BLOCK_ROWS = 128
+
+# Rows copied per step when compacting the float32 file
+_COPY_BLOCK_ROWS = 65536
+
+# Compact once dead rows outnumber both the live rows and this floor
+_COMPACT_MIN_DEAD_ROWS = 1024
+
+_MANIFEST = "manifest.json"
+_FORMAT = 2
+
+# Set-bit counts for every byte value (np.bitwise_count needs numpy >= 2.0)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount_rows(bits: np.ndarray) -> np.ndarray:
+    """Number of set bits per row of a packed uint8 matrix"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[bits].sum(axis=1, dtype=np.int32)
+
+
+class _GrowableArray:
+    """Array appended to in place with spare capacity, so appends are amortized O(1)"""
+
+    def __init__(self, array: np.ndarray):
+        self._data = array
+        self._size = len(array)
+
+    @property
+    def view(self) -> np.ndarray:
+        return self._data[:self._size]
+
+    def extend(self, rows: np.ndarray):
+        needed = self._size + len(rows)
+        if needed > len(self._data):
+            grown = np.empty((max(needed, 2 * len(self._data)),) + self._data.shape[1:], dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = rows
+        self._size = needed
+
+
+class NumpyVectorIndex:
+    """
+    Exact cosine search over a memory-mapped float32 matrix.
+    Rows are L2-normalized on write, so a query is one matrix-vector product
+    followed by an argpartition top-k. IDs and metadata are kept in parallel
+    lists next to the matrix; document text is not stored (ChromaDB has it).
+
+    Storage is append-only: an upsert appends rows to the float32 (and
+    quantized) files and one JSON line per row to the records log, and a
+    delete appends tombstones. Replaced and deleted rows stay in the files as
+    dead rows until they outnumber the live ones, when the files are
+    compacted. manifest.json is replaced last and is the commit point: it
+    holds the committed row count and log length, a generation token that
+    changes with every write, and the source stamp of the ChromaDB write the
+    index reflects (see VectorStore._sync_index).
+
+    With int8 or binary quantization only the quantized copy is held in memory
+    and scanned; the best rerank_factor * k candidates are then rescored
+    against the float32 rows, which stay memory-mapped on disk. int8 keeps
+    recall of exact search; binary signs can drop true neighbours before the
+    rerank, however large the factor, on weakly clustered embeddings.
+    """
+
+    def __init__(self,
+                 path: str,
+                 quantization: Optional[str] = None,
+                 rerank_factor: Optional[int] = None):
+        self.path = path
+        self.manifest_path = os.path.join(path, _MANIFEST)
+        self.quantization = quantization or settings.vector_quantization
+        if self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown vector quantization: {self.quantization}")
+        self.rerank_factor = max(1, rerank_factor or settings.vector_rerank_factor)
+        self._lock = threading.RLock()
+        self.manifest: Optional[Dict[str, Any]] = None
+        self.vectors: Optional[np.ndarray] = None
+        self._quantized: Optional[_GrowableArray] = None
+        self._scales: Optional[_GrowableArray] = None
+        self._alive = _GrowableArray(np.zeros(0, dtype=bool))
+        self.ids: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    @property
+    def quantized(self) -> Optional[np.ndarray]:
+        return self._quantized.view if self._quantized is not None else None
+
+    @property
+    def scales(self) -> Optional[np.ndarray]:
+        return self._scales.view if self._scales is not None else None
+
+    @property
+    def source_stamp(self) -> Optional[str]:
+        """Stamp of the source write this index reflects; None without an index on disk"""
+        return self.manifest.get("source_stamp") if self.manifest else None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def load(self):
+        """Read the manifest, replay the records log and memory-map the matrix"""
+        with self._lock:
+            self._clear_memory()
+            manifest = self._read_manifest()
+            if manifest is None:
+                return
+            try:
+                ids, metadatas, positions = self._replay(manifest)
+                rows = manifest["rows"]
+                if len(ids) != rows:
+                    raise ValueError(f"{rows} vectors for {len(ids)} records")
+                self.manifest = manifest
+                self.ids = ids
+                self.metadatas = metadatas
+                self._positions = positions
+                alive = np.zeros(rows, dtype=bool)
+                alive[list(positions.values())] = True
+                self._alive = _GrowableArray(alive)
+                self._map_vectors()
+                self._load_quantized()
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable vector index at {self.path}: {e}")
+                self._clear_memory()
+
+    def refresh(self) -> bool:
+        """Reload if another process has written to the index; returns True if it did"""
+        with self._lock:
+            manifest = self._read_manifest()
+            current = self.manifest["generation"] if self.manifest else None
+            latest = manifest["generation"] if manifest else None
+            if current == latest:
+                return False
+            self.load()
+            return True
+
+    def upsert(self,
+               ids: List[str],
+               embeddings: List[List[float]],
+               metadatas: List[Dict[str, Any]],
+               source_stamp: Optional[str] = None):
+        """Insert or replace rows by ID (appended; replaced rows become dead)"""
+        if not ids:
+            return
+        # The last occurrence of a repeated ID wins
+        latest = {doc_id: i for i, doc_id in enumerate(ids)}
+        order = sorted(latest.values())
+
+        new_vectors = np.asarray([embeddings[i] for i in order], dtype=np.float32)
+        norms = np.linalg.norm(new_vectors, axis=1, keepdims=True)
+        new_vectors /= np.where(norms > 0, norms, 1.0)
+
+        with self._lock:
+            self.refresh()
+            if self.manifest is None:
+                self._commit(self._new_manifest())
+            dim = self.manifest["dim"]
+            if dim is not None and dim != new_vectors.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension {new_vectors.shape[1]} does not match "
+                    f"index dimension {dim}"
+                )
+            records = [{"id": ids[i], "metadata": metadatas[i] or {}} for i in order]
+            self._append(new_vectors, records, source_stamp)
+
+    def delete(self,
+               ids: Optional[List[str]] = None,
+               where: Optional[Dict[str, Any]] = None,
+               source_stamp: Optional[str] = None) -> int:
+        """Delete rows by ID and/or metadata filter; returns the number removed"""
+        with self._lock:
+            self.refresh()
+            if self.manifest is None:
+                return 0
+            remove = np.zeros(len(self.ids), dtype=bool)
+            if ids:
+                for doc_id in ids:
+                    position = self._positions.get(doc_id)
+                    if position is not None:
+                        remove[position] = True
+            if where:
+                remove |= where_mask(where, self._column, len(self.ids))
+            remove &= self._alive.view
+
+            removed = [self.ids[row] for row in np.flatnonzero(remove)]
+            if removed or source_stamp is not None:
+                self._append(None, [{"deleted": doc_id} for doc_id in removed], source_stamp)
+            if self._dead_rows() > max(_COMPACT_MIN_DEAD_ROWS, len(self._positions)):
+                self.compact()
+            return len(removed)
+
+    def reset(self, source_stamp: Optional[str] = None):
+        """Remove all rows and the files on disk; with a source stamp, leave an empty index"""
+        with self._lock:
+            self._clear_memory()
+            shutil.rmtree(self.path, ignore_errors=True)
+            if source_stamp is not None:
+                manifest = self._new_manifest()
+                manifest["source_stamp"] = source_stamp
+                self._commit(manifest)
+
+    def compact(self):
+        """Rewrite the files with live rows only"""
+        with self._lock:
+            if self.manifest is None:
+                return
+            live = np.flatnonzero(self._alive.view)
+            manifest = self._new_manifest()
+            manifest.update(
+                dim=self.manifest["dim"],
+                rows=len(live),
+                source_stamp=self.manifest.get("source_stamp"),
+            )
+            files = manifest["files"]
+
+            with open(self._file(files["vectors"]), "wb") as f:
+                for start in range(0, len(live), _COPY_BLOCK_ROWS):
+                    f.write(np.ascontiguousarray(self.vectors[live[start:start + _COPY_BLOCK_ROWS]]).tobytes())
+            quantized = scales = None
+            if self._quantized is not None:
+                quantized = self.quantized[live]
+                self._write_file(files["quantized"], quantized.tobytes())
+                if self._scales is not None:
+                    scales = self.scales[live]
+                    self._write_file(files["scales"], scales.tobytes())
+            lines = "".join(
+                json.dumps({"id": self.ids[row], "metadata": self.metadatas[row]}) + "\n"
+                for row in live
+            ).encode("utf-8")
+            self._write_file(files["records"], lines)
+            manifest["records_bytes"] = len(lines)
+
+            old_files = list(self.manifest["files"].values())
+            self.vectors = None
+            self._commit(manifest)
+            for name in old_files:
+                try:
+                    os.remove(self._file(name))
+                except OSError:
+                    pass
+
+            self.ids = [self.ids[row] for row in live]
+            self.metadatas = [self.metadatas[row] for row in live]
+            self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+            self._alive = _GrowableArray(np.ones(len(live), dtype=bool))
+            self._quantized = _GrowableArray(quantized) if quantized is not None else None
+            self._scales = _GrowableArray(scales) if scales is not None else None
+            self._columns = {}
+            self._map_vectors()
+
+    def query(self,
+              query_embedding: List[float],
+              n_results: int = 5,
+              where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Top-k rows by cosine similarity (distance = 1 - similarity, as in ChromaDB).
+        Hits carry id, metadata and distance; the caller looks up the text.
+        """
+        with self._lock:
+            vectors = self.vectors
+            if vectors is None or not len(self._positions) or n_results <= 0:
+                return []
+
+            query = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if norm > 0:
+                query = query / norm
+
+            rows = None
+            if where:
+                rows = np.flatnonzero(where_mask(where, self._column, len(self.ids)) & self._alive.view)
+            elif self._dead_rows():
+                rows = np.flatnonzero(self._alive.view)
+            if rows is not None and not len(rows):
+                return []
+            candidate_count = len(rows) if rows is not None else len(vectors)
+            k = min(n_results, candidate_count)
+
+            # First pass over the quantized copy, then rescore the survivors exactly
+            shortlist = k * self.rerank_factor
+            if self.quantized is not None and shortlist < candidate_count:
+                approximate = self._approximate_scores(query, rows)
+                best = self._top(approximate, shortlist)
+                rows = rows[best] if rows is not None else best
+                rows.sort()  # sequential reads from the memory-mapped file
+
+            if rows is not None:
+                scores = vectors[rows] @ query
+            else:
+                scores = vectors @ query
+
+            results = []
+            for i in self._top(scores, k):
+                row = int(rows[i]) if rows is not None else int(i)
+                results.append({
+                    "id": self.ids[row],
+                    "metadata": self.metadatas[row],
+                    "distance": float(1.0 - scores[i]),
+                })
+            return results
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes of the float32 matrix and of the copy scanned for each query"""
+        full = int(self.vectors.nbytes) if self.vectors is not None else 0
+        if self.quantized is None:
+            return {"float32_bytes": full, "resident_bytes": full}
+        resident = int(self.quantized.nbytes)
+        if self.scales is not None:
+            resident += int(self.scales.nbytes)
+        return {"float32_bytes": full, "resident_bytes": resident}
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, best first"""
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def _approximate_scores(self, query: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """Similarity estimates from the quantized copy"""
+        quantized = self.quantized if rows is None else self.quantized[rows]
+
+        if self.quantization == "binary":
+            # Fraction of agreeing signs, mapped to [-1, 1]
+            query_bits = np.packbits(query > 0)
+            disagreements = _popcount_rows(np.bitwise_xor(quantized, query_bits))
+            return 1.0 - 2.0 * disagreements / query.shape[0]
+
+        scales = self.scales if rows is None else self.scales[rows]
+        scores = np.empty(len(quantized), dtype=np.float32)
+        tile = np.empty((_SCORE_BLOCK_ROWS, quantized.shape[1]), dtype=np.float32)
+        for start in range(0, len(quantized), _SCORE_BLOCK_ROWS):
+            block = quantized[start:start + _SCORE_BLOCK_ROWS]
+            np.copyto(tile[:len(block)], block)
+            scores[start:start + len(block)] = tile[:len(block)] @ query
+        return scores * scales
+
+    def _quantize(self, vectors: np.ndarray):
+        """Quantized copy (and int8 per-row scales) of normalized float32 rows"""
+        if self.quantization == "binary":
+            return np.packbits(vectors > 0, axis=1), None
+
+        scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.zeros(0)
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        quantized = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return quantized, scales
+
+    def _quantized_width(self, dim: int) -> int:
+        return (dim + 7) // 8 if self.quantization == "binary" else dim
+
+    def _load_quantized(self):
+        """Load the resident quantized copy, rebuilding it if missing, stale or of another mode"""
+        if self.quantization == "none" or self.manifest["dim"] is None:
+            return
+        rows, width = self.manifest["rows"], self._quantized_width(self.manifest["dim"])
+        dtype = np.uint8 if self.quantization == "binary" else np.int8
+        files = self.manifest["files"]
+        if not rows:
+            self._quantized = _GrowableArray(np.zeros((0, width), dtype=dtype))
+            if self.quantization == "int8":
+                self._scales = _GrowableArray(np.zeros(0, dtype=np.float32))
+            return
+        try:
+            if self.manifest.get("quantization") != self.quantization:
+                raise ValueError("quantization mode changed")
+            quantized = np.fromfile(self._file(files["quantized"]), dtype=dtype, count=rows * width)
+            scales = None
+            if self.quantization == "int8":
+                scales = np.fromfile(self._file(files["scales"]), dtype=np.float32, count=rows)
+                if len(scales) != rows:
+                    raise ValueError("row count mismatch")
+            if len(quantized) != rows * width:
+                raise ValueError("row count mismatch")
+            quantized = quantized.reshape(rows, width)
+        except Exception:
+            quantized, scales = self._quantize(np.asarray(self.vectors, dtype=np.float32))
+            manifest = dict(self.manifest, quantization=self.quantization, generation=uuid.uuid4().hex)
+            self._write_file(files["quantized"], quantized.tobytes())
+            if scales is not None:
+                self._write_file(files["scales"], scales.tobytes())
+            self._commit(manifest)
+        self._quantized = _GrowableArray(quantized)
+        self._scales = _GrowableArray(scales) if scales is not None else None
+
+    def _append(self,
+                vectors: Optional[np.ndarray],
+                records: List[Dict[str, Any]],
+                source_stamp: Optional[str]):
+        """Append rows and/or tombstones, then commit the manifest and update memory"""
+        # Loading rebuilt the quantized file if it was of another mode
+        manifest = dict(self.manifest, generation=uuid.uuid4().hex, quantization=self.quantization)
+        if source_stamp is not None:
+            manifest["source_stamp"] = source_stamp
+        files = manifest["files"]
+        rows = manifest["rows"]
+
+        quantized = scales = None
+        if vectors is not None and len(vectors):
+            if manifest["dim"] is None:
+                manifest["dim"] = int(vectors.shape[1])
+            dim = manifest["dim"]
+            # Release the mapping before the file under it grows
+            self.vectors = None
+            self._append_file(files["vectors"], rows * dim * 4, vectors.tobytes())
+            if self.quantization != "none":
+                quantized, scales = self._quantize(vectors)
+                self._append_file(
+                    files["quantized"], rows * self._quantized_width(dim), quantized.tobytes()
+                )
+                if scales is not None:
+                    self._append_file(files["scales"], rows * 4, scales.tobytes())
+            manifest["rows"] = rows + len(vectors)
+
+        lines = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        self._append_file(files["records"], manifest["records_bytes"], lines)
+        manifest["records_bytes"] += len(lines)
+        self._commit(manifest)
+
+        # Committed: apply the same changes in memory
+        alive = self._alive.view
+        for record in records:
+            if "deleted" in record:
+                position = self._positions.pop(record["deleted"], None)
+                if position is not None:
+                    alive[position] = False
+        if vectors is not None and len(vectors):
+            for offset, record in enumerate(records):
+                position = self._positions.get(record["id"])
+                if position is not None:
+                    alive[position] = False
+                self._positions[record["id"]] = rows + offset
+                self.ids.append(record["id"])
+                self.metadatas.append(record["metadata"])
+            self._alive.extend(np.ones(len(vectors), dtype=bool))
+            if quantized is not None:
+                if self._quantized is None:
+                    self._quantized = _GrowableArray(quantized)
+                    self._scales = _GrowableArray(scales) if scales is not None else None
+                else:
+                    self._quantized.extend(quantized)
+                    if scales is not None:
+                        self._scales.extend(scales)
+        self._columns = {}
+        self._map_vectors()
+
+    def _replay(self, manifest: Dict[str, Any]):
+        """IDs and metadata per row, and the live row of each ID, from the records log"""
+        ids: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        positions: Dict[str, int] = {}
+        size = manifest["records_bytes"]
+        if size:
+            with open(self._file(manifest["files"]["records"]), "rb") as f:
+                data = f.read(size)
+            if len(data) != size:
+                raise ValueError("records log is shorter than committed")
+            for line in data.decode("utf-8").splitlines():
+                record = json.loads(line)
+                if "deleted" in record:
+                    positions.pop(record["deleted"], None)
+                    continue
+                positions[record["id"]] = len(ids)
+                ids.append(record["id"])
+                metadatas.append(record["metadata"])
+        return ids, metadatas, positions
+
+    def _map_vectors(self):
+        rows, dim = self.manifest["rows"], self.manifest["dim"]
+        self.vectors = None
+        if rows and dim:
+            self.vectors = np.memmap(
+                self._file(self.manifest["files"]["vectors"]), dtype=np.float32, mode="r", shape=(rows, dim)
+            )
+
+    def _dead_rows(self) -> int:
+        return len(self.ids) - len(self._positions)
+
+    def _new_manifest(self) -> Dict[str, Any]:
+        generation = uuid.uuid4().hex
+        return {
+            "format": _FORMAT,
+            "generation": generation,
+            "dim": None,
+            "rows": 0,
+            "records_bytes": 0,
+            "quantization": self.quantization,
+            "source_stamp": None,
+            "files": {
+                "vectors": f"vectors-{generation}.f32",
+                "quantized": f"vectors-{generation}.quantized",
+                "scales": f"scales-{generation}.f32",
+                "records": f"records-{generation}.jsonl",
+            },
+        }
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get("format") == _FORMAT else None
+
+    def _commit(self, manifest: Dict[str, Any]):
+        """Atomically replace the manifest"""
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+        self.manifest = manifest
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _append_file(self, name: str, committed: int, data: bytes):
+        """Append after the committed length, dropping any uncommitted tail"""
+        path = self._file(name)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() != committed:
+                f.seek(committed)
+                f.truncate()
+            f.write(data)
+
+    def _write_file(self, name: str, data: bytes):
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._file(name), "wb") as f:
+            f.write(data)
+
+    def _column(self, field: str) -> np.ndarray:
+        """Metadata values for one field as an object array (cached until the next write)"""
+        column = self._columns.get(field)
+        if column is None:
+            column = np.empty(len(self.metadatas), dtype=object)
+            column[:] = [metadata.get(field) for metadata in self.metadatas]
+            self._columns[field] = column
+        return column
+
+    def _clear_memory(self):
+        self.manifest = None
+        self.vectors = None
+        self._quantized = None
+        self._scales = None
+        self._alive = _GrowableArray(np.zeros(0, dtype=bool))
+        self.ids = []
+        self.metadatas = []
+        self._positions = {}
+        self._columns = {}
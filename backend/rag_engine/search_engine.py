@@ -1,4 +1,6 @@
+import json
 import logging
+import numpy as np
 from typing import List, Dict, Any, Optional
 from rag_engine.embedding_engine import EmbeddingEngine
 from rag_engine.vector_store import VectorStore
@@ -6,58 +8,281 @@ from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+SEARCH_TYPES = ("hybrid", "vector", "keyword")
+
 class SearchEngine:
     """
     High-level search interface combining embedding generation and vector storage.
     """
     
-    def __init__(self):
-        self.embedding_engine = EmbeddingEngine()
-        self.vector_store = VectorStore()
+    def __init__(self,
+                 embedding_engine: Optional[EmbeddingEngine] = None,
+                 vector_store: Optional[VectorStore] = None):
+        self.embedding_engine = embedding_engine or EmbeddingEngine()
+        self.vector_store = vector_store or VectorStore()
         
     def search_templates(self, 
                          query: str, 
                          filters: Optional[Dict[str, Any]] = None, 
-                         limit: int = 5) -> List[Dict[str, Any]]:
+                         limit: int = 5,
+                         search_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Search for templates based on logical filters and semantic query.
+        Section chunks are searched and grouped by parent document; each result
+        carries its best matching chunks instead of the whole document text.
+        search_type is "hybrid" (BM25 and vector rankings fused with reciprocal
+        rank fusion), "vector" or "keyword". Hybrid search falls back to keywords
+        alone when the query embedding fails or times out.
         """
         try:
-            # Generate query embedding
-            query_embedding = self.embedding_engine.generate_embedding(query)
-            
-            # Prepare ChromaDB filters
-            chroma_filters = {}
-            if filters:
-                # ChromaDB supports basic exact match filters
-                # If multiple filters, we might need $and
-                if len(filters) > 1:
-                    chroma_filters = {"$and": [{k: v} for k, v in filters.items()]}
-                else:
-                    chroma_filters = filters
-            
-            # Search
-            raw_results = self.vector_store.query_similar(
-                query_embedding=query_embedding,
-                n_results=limit,
-                where=chroma_filters if chroma_filters else None
-            )
+            return self._search([query], filters, limit, search_type)[0]
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
+            return []
+
+    def search_many(self,
+                    queries: List[str],
+                    filters: Optional[Dict[str, Any]] = None,
+                    limit: int = 5,
+                    search_type: Optional[str] = None,
+                    query_filters: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches together: all queries are embedded in one batched
+        request and matched in one multi-embedding vector query, and parent
+        metadata is fetched once for every document hit by any query.
+        query_filters optionally adds filters for each query on top of the
+        shared ones; queries with the same filters share a vector query.
+        Returns one search_templates-style result list per query, in order.
+        """
+        if not queries:
+            return []
+        if query_filters is not None and len(query_filters) != len(queries):
+            raise ValueError("query_filters must have one entry per query")
+        try:
+            return self._search(list(queries), filters, limit, search_type, query_filters)
+        except Exception as e:
+            logger.error(f"Batch search failed: {e}")
+            return [[] for _ in queries]
+
+    def _search(self,
+                queries: List[str],
+                filters: Optional[Dict[str, Any]],
+                limit: int,
+                search_type: Optional[str],
+                query_filters: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[List[Dict[str, Any]]]:
+        search_type = search_type or settings.search_type
+        if search_type not in SEARCH_TYPES:
+            raise ValueError(f"Unknown search type: {search_type}")
+        
+        # Prepare ChromaDB filters, one clause per query
+        if query_filters is None:
+            wheres = [self._build_where(filters)] * len(queries)
+        else:
+            wheres = [
+                self._build_where({**(filters or {}), **(extra or {})})
+                for extra in query_filters
+            ]
+        
+        # Search chunks, over-fetching so several documents survive grouping
+        chunks_per_document = max(1, settings.search_chunks_per_document)
+        candidates = max(settings.search_chunk_candidates, limit * chunks_per_document)
+        
+        query_embeddings = None
+        vector_hits: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        keyword_hits: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        if search_type != "keyword":
+            try:
+                query_embeddings = self.embedding_engine.generate_embeddings(
+                    queries,
+                    timeout=settings.search_embedding_timeout if search_type == "hybrid" else None
+                )
+            except Exception as e:
+                if search_type == "vector" or self.vector_store.keyword_index is None:
+                    raise
+                logger.warning(f"Query embedding unavailable ({e}), using keyword search only")
+                search_type = "keyword"
+            else:
+                # One multi-embedding query per distinct where clause
+                groups: Dict[str, List[int]] = {}
+                for i, where in enumerate(wheres):
+                    groups.setdefault(json.dumps(where, sort_keys=True), []).append(i)
+                for indices in groups.values():
+                    hits = self.vector_store.query_chunks_many(
+                        query_embeddings=[query_embeddings[i] for i in indices],
+                        n_results=candidates,
+                        where=wheres[indices[0]]
+                    )
+                    for i, query_hits in zip(indices, hits):
+                        vector_hits[i] = query_hits
+        if search_type != "vector":
+            keyword_hits = [
+                self.vector_store.keyword_search(query, candidates, where)
+                for query, where in zip(queries, wheres)
+            ]
+        
+        # Group chunks by document, ranked by each document's best chunk
+        groupings: List[Optional[Dict[str, List[Dict[str, Any]]]]] = []
+        for vector, keyword in zip(vector_hits, keyword_hits):
+            if not vector and not keyword:
+                groupings.append(None)
+                continue
+            grouped: Dict[str, List[Dict[str, Any]]] = {}
+            for hit in self._fuse_rankings(vector, keyword):
+                document_id = hit["metadata"].get("document_id")
+                if document_id not in grouped:
+                    if len(grouped) >= limit:
+                        continue
+                    grouped[document_id] = []
+                if len(grouped[document_id]) < chunks_per_document:
+                    grouped[document_id].append(hit)
+            groupings.append(grouped)
+        
+        if query_embeddings is not None:
+            self._score_keyword_only_hits(groupings, query_embeddings)
+        
+        # Documents shared between queries are looked up once
+        document_ids = list(dict.fromkeys(
+            document_id for grouped in groupings if grouped for document_id in grouped
+        ))
+        parents = self.vector_store.get_documents_metadata(document_ids)
+        
+        results = []
+        for i, grouped in enumerate(groupings):
+            if grouped is None:
+                # Index built before chunking existed
+                results.append(
+                    self._search_documents(query_embeddings[i], wheres[i], limit)
+                    if query_embeddings is not None else []
+                )
+                continue
             
             # Transform results for output formatter
             formatted_results = []
-            for res in raw_results:
+            for document_id, hits in grouped.items():
+                chunks = [
+                    {
+                        "chunk_id": hit["id"],
+                        "section_title": hit["metadata"].get("section_title", ""),
+                        "section_type": hit["metadata"].get("section_type", ""),
+                        "similarity_score": hit["similarity_score"],
+                        "keyword_score": hit["keyword_score"],
+                        "score": hit["score"],
+                        "content": hit.get("content")
+                    }
+                    for hit in hits
+                ]
+                similarities = [
+                    chunk["similarity_score"] for chunk in chunks
+                    if chunk["similarity_score"] is not None
+                ]
                 formatted_results.append({
-                    "document_id": res.get("id"),
-                    "similarity_score": 1 - res.get("distance", 1.0),
-                    "metadata": res.get("metadata", {}),
-                    "content": res.get("content")
+                    "document_id": document_id,
+                    "similarity_score": max(similarities) if similarities else None,
+                    "score": chunks[0]["score"],
+                    "search_type": search_type,
+                    "metadata": parents.get(document_id) or hits[0]["metadata"],
+                    "content": "\n\n".join(chunk["content"] or "" for chunk in chunks),
+                    "chunks": chunks
                 })
-            
-            return formatted_results
-            
-        except Exception as e:
-            logger.error(f"Search failed: {e}")
-            return []
+            results.append(formatted_results)
+        
+        return results
+
+    @staticmethod
+    def _fuse_rankings(vector_hits: List[Dict[str, Any]],
+                       keyword_hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Weighted reciprocal rank fusion of vector and BM25 chunk rankings:
+        score = sum(weight / (rrf_k + rank)) over the rankings a chunk appears in.
+        Chunks only BM25 found have no similarity_score (None) yet.
+        """
+        fused: Dict[str, Dict[str, Any]] = {}
+        rankings = (
+            (vector_hits, settings.hybrid_vector_weight, "vector"),
+            (keyword_hits, settings.hybrid_keyword_weight, "keyword"),
+        )
+        for hits, weight, source in rankings:
+            for rank, hit in enumerate(hits, start=1):
+                entry = fused.get(hit["id"])
+                if entry is None:
+                    entry = fused[hit["id"]] = {
+                        "id": hit["id"],
+                        "content": hit.get("content"),
+                        "metadata": hit.get("metadata") or {},
+                        "similarity_score": None,
+                        "keyword_score": 0.0,
+                        "score": 0.0
+                    }
+                entry["score"] += weight / (settings.rrf_k + rank)
+                if source == "vector":
+                    entry["similarity_score"] = 1 - hit.get("distance", 1.0)
+                else:
+                    entry["keyword_score"] = hit["score"]
+        return sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)
+
+    def _score_keyword_only_hits(self,
+                                 groupings: List[Optional[Dict[str, List[Dict[str, Any]]]]],
+                                 query_embeddings: List[List[float]]):
+        """
+        Cosine similarity of the returned chunks that only BM25 found, from
+        their stored embeddings (one lookup for all queries). Chunks without
+        a stored embedding keep similarity_score None.
+        """
+        missing = [
+            (i, hit)
+            for i, grouped in enumerate(groupings) if grouped
+            for hits in grouped.values()
+            for hit in hits
+            if hit["similarity_score"] is None
+        ]
+        if not missing:
+            return
+        vectors = self.vector_store.get_chunk_vectors(list({hit["id"] for _, hit in missing}))
+        for i, hit in missing:
+            vector = vectors.get(hit["id"])
+            if vector is None:
+                continue
+            query = np.asarray(query_embeddings[i], dtype=np.float32)
+            chunk = np.asarray(vector, dtype=np.float32)
+            norms = float(np.linalg.norm(query) * np.linalg.norm(chunk))
+            if norms > 0:
+                hit["similarity_score"] = float(query @ chunk) / norms
+
+    def _search_documents(self,
+                          query_embedding: List[float],
+                          chroma_filters: Optional[Dict[str, Any]],
+                          limit: int) -> List[Dict[str, Any]]:
+        """
+        Whole-document search over the document-level vectors.
+        """
+        raw_results = self.vector_store.query_similar(
+            query_embedding=query_embedding,
+            n_results=limit,
+            where=chroma_filters
+        )
+        
+        formatted_results = []
+        for res in raw_results:
+            formatted_results.append({
+                "document_id": res.get("id"),
+                "similarity_score": 1 - res.get("distance", 1.0),
+                "metadata": res.get("metadata", {}),
+                "content": res.get("content")
+            })
+        
+        return formatted_results
+
+    @staticmethod
+    def _build_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Turn exact-match filters into a ChromaDB where clause.
+        """
+        if not filters:
+            return None
+        # ChromaDB supports basic exact match filters; several need $and
+        if len(filters) > 1:
+            return {"$and": [{k: v} for k, v in filters.items()]}
+        return dict(filters)
 
     def find_similar_documents(self, document_id: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -108,10 +333,28 @@ class SearchEngine:
         """
         try:
             doc_ids = self.vector_store.list_all_documents()
+            chunk_count = self.vector_store.count_chunks()
+            cache_stats = self.embedding_engine.get_cache_stats()
             return {
                 "total_documents": len(doc_ids),
+                "total_chunks": chunk_count,
                 "collection_name": settings.chroma_collection_name,
-                "embedding_model": settings.openai_embedding_model
+                "search_type": settings.search_type,
+                "vector_store": {
+                    "document_count": len(doc_ids),
+                    "chunk_count": chunk_count,
+                    "collection_name": settings.chroma_collection_name,
+                    **self.vector_store.get_index_stats()
+                },
+                "embedding_model": settings.openai_embedding_model,
+                "embeddings": {
+                    "model": settings.openai_embedding_model,
+                    "cache_size": cache_stats.get("entries", 0),
+                    "cache_hits": cache_stats.get("hits", 0),
+                    "cache_misses": cache_stats.get("misses", 0),
+                    "cache_hit_rate": cache_stats.get("hit_rate", 0.0),
+                    "cache_bytes": cache_stats.get("size_bytes", 0)
+                }
             }
         except Exception as e:
             logger.error(f"Failed to get stats: {e}")
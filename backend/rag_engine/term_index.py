@@ -0,0 +1,275 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, deque
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+# Words (hyphenated and slashed forms stay whole) or a single separator character;
+# separators, numbers and stopwords end the current phrase
+_TERM_TOKEN = re.compile(r"[a-z0-9]+(?:[-/][a-z0-9]+)*|[^ \ta-z0-9]", re.IGNORECASE)
+_COMPOUND_SEPARATOR = re.compile(r"[-/]")
+
+_TERM_STOPWORDS = {
+    "about", "above", "after", "again", "against", "all", "also", "and", "any", "are",
+    "based", "been", "before", "being", "below", "between", "both", "but", "can",
+    "could", "did", "does", "done", "during", "each", "either", "etc", "every", "for",
+    "from", "further", "had", "has", "have", "having", "hereby", "herein", "here",
+    "how", "including", "into", "its", "may", "more", "most", "must", "nor", "not",
+    "off", "once", "only", "other", "otherwise", "our", "out", "over", "own", "per",
+    "same", "shall", "should", "since", "some", "such", "than", "that", "the", "their",
+    "them", "then", "there", "thereof", "these", "they", "this", "those", "through",
+    "thus", "under", "until", "upon", "very", "was", "were", "what", "when", "where",
+    "whether", "which", "while", "who", "whom", "whose", "why", "will", "with",
+    "within", "without", "would", "yet", "you", "your",
+    # Pronouns
+    "her", "hers", "herself", "him", "himself", "his", "itself", "mine", "myself",
+    "ours", "ourselves", "she", "theirs", "themselves", "yours", "yourself", "yourselves",
+    # Auxiliaries and the stems of their contractions ("doesn't" -> "doesn")
+    "aren", "couldn", "didn", "doesn", "doing", "don", "hadn", "hasn", "haven", "isn",
+    "might", "mustn", "ought", "shan", "shouldn", "wasn", "weren", "won", "wouldn",
+    # Generic document wording
+    "following", "given", "means", "note", "one", "required", "use", "used", "using",
+    "yes",
+}
+
+
+def iter_terms(text: str, max_ngram: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the words and n-grams of a text in one pass. Words are lower-cased
+    and must start with a letter and have at least three characters; each
+    part of a hyphenated or slashed compound must also have three characters
+    and not be a stopword ("yes/no" is not a term). An
+    n-gram is a run of up to max_ngram adjacent words that no punctuation,
+    line break, number or stopword interrupts ("power transformer", not
+    "transformer shall").
+    """
+    max_ngram = max(1, max_ngram or settings.key_term_max_ngram)
+    window: deque = deque(maxlen=max_ngram - 1)
+    for match in _TERM_TOKEN.finditer(text):
+        token = match.group().lower()
+        if not token[0].isalpha() or not all(
+            len(part) >= 3 and part not in _TERM_STOPWORDS
+            for part in _COMPOUND_SEPARATOR.split(token)
+        ):
+            window.clear()
+            continue
+        yield token
+        phrase = token
+        for previous in reversed(window):
+            phrase = f"{previous} {phrase}"
+            yield phrase
+        if max_ngram > 1:
+            window.append(token)
+
+
+def count_terms(text: str, max_ngram: Optional[int] = None) -> Dict[str, int]:
+    """Term frequencies of a document, as counted by iter_terms"""
+    return dict(Counter(iter_terms(text, max_ngram)))
+
+
+class TermIndex:
+    """
+    Persistent document-frequency table for corpus-level key terms, stored in
+    SQLite. Adding a document increments the frequency of each of its distinct
+    terms and scores them by TF-IDF against the table as it stands, so the work
+    is proportional to the new documents, not the corpus. The distinct terms of
+    each document are kept so deleting it decrements their frequencies again.
+    Key terms of documents already indexed are not rescored as the corpus grows.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.key_term_index_path or os.path.join(
+            settings.chroma_persist_dir, "term_index.sqlite3"
+        )
+        self.terms_per_document = max(1, settings.key_terms_per_document)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS document_frequency (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS documents (
+                document_id TEXT PRIMARY KEY,
+                terms TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO counters (name, value) VALUES ('documents', 0);
+            """
+        )
+        self.conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._document_count()
+
+    def add_documents(self,
+                      term_counts: Dict[str, Dict[str, int]],
+                      limit: Optional[int] = None) -> Dict[str, List[str]]:
+        """
+        Add documents ({document_id: {term: count}}) to the document
+        frequencies and return the top TF-IDF terms of each. A document that
+        is already indexed is replaced.
+        """
+        if not term_counts:
+            return {}
+        limit = limit or self.terms_per_document
+
+        with self._lock:
+            self._remove(list(term_counts))
+            self.conn.executemany(
+                "INSERT INTO documents (document_id, terms) VALUES (?, ?)",
+                [(doc_id, json.dumps(list(counts))) for doc_id, counts in term_counts.items()]
+            )
+            self.conn.executemany(
+                "INSERT INTO document_frequency (term, df) VALUES (?, 1) "
+                "ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                [(term,) for counts in term_counts.values() for term in counts]
+            )
+            self.conn.execute(
+                "UPDATE counters SET value = value + ? WHERE name = 'documents'",
+                (len(term_counts),)
+            )
+            self.conn.commit()
+
+            vocabulary = list({term for counts in term_counts.values() for term in counts})
+            document_frequency = self._document_frequencies(vocabulary)
+            total = self._document_count()
+
+        return self._top_terms(term_counts, vocabulary, document_frequency, total, limit)
+
+    def score_documents(self,
+                        term_counts: Dict[str, Dict[str, int]],
+                        limit: Optional[int] = None) -> Dict[str, List[str]]:
+        """
+        Top TF-IDF terms of documents ({document_id: {term: count}}) against
+        the current document frequencies, without adding them.
+        """
+        if not term_counts:
+            return {}
+        limit = limit or self.terms_per_document
+
+        with self._lock:
+            vocabulary = list({term for counts in term_counts.values() for term in counts})
+            document_frequency = self._document_frequencies(vocabulary)
+            total = self._document_count()
+
+        return self._top_terms(term_counts, vocabulary, document_frequency, total, limit)
+
+    def delete_documents(self, document_ids: List[str]) -> int:
+        """Remove documents from the document frequencies"""
+        if not document_ids:
+            return 0
+        with self._lock:
+            removed = self._remove(document_ids)
+            self.conn.commit()
+        return removed
+
+    def reset(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM document_frequency")
+            self.conn.execute("DELETE FROM documents")
+            self.conn.execute("UPDATE counters SET value = 0")
+            self.conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            documents = self._document_count()
+            terms = self.conn.execute("SELECT COUNT(*) FROM document_frequency").fetchone()[0]
+        return {"documents": documents, "terms": terms}
+
+    def _document_count(self) -> int:
+        return self.conn.execute(
+            "SELECT value FROM counters WHERE name = 'documents'"
+        ).fetchone()[0]
+
+    def _document_frequencies(self, vocabulary: List[str]) -> np.ndarray:
+        frequencies: Dict[str, int] = {}
+        for start in range(0, len(vocabulary), _QUERY_CHUNK):
+            part = vocabulary[start:start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(part))
+            frequencies.update(self.conn.execute(
+                f"SELECT term, df FROM document_frequency WHERE term IN ({placeholders})", part
+            ).fetchall())
+        return np.array([frequencies.get(term, 1) for term in vocabulary], dtype=np.float64)
+
+    @staticmethod
+    def _top_terms(term_counts: Dict[str, Dict[str, int]],
+                   vocabulary: List[str],
+                   document_frequency: np.ndarray,
+                   total: int,
+                   limit: int) -> Dict[str, List[str]]:
+        """
+        Score every (document, term) pair of the batch at once. The pairs form
+        a sparse documents x vocabulary matrix in coordinate form; the weight
+        is (1 + log tf) * idf with the smoothed idf = log((1 + N) / (1 + df)) + 1.
+        """
+        column = {term: i for i, term in enumerate(vocabulary)}
+        doc_ids = list(term_counts)
+        rows = np.concatenate([
+            np.full(len(counts), i, dtype=np.int64) for i, counts in enumerate(term_counts.values())
+        ])
+        columns = np.fromiter(
+            (column[term] for counts in term_counts.values() for term in counts),
+            dtype=np.int64, count=len(rows)
+        )
+        tf = np.fromiter(
+            (count for counts in term_counts.values() for count in counts.values()),
+            dtype=np.float64, count=len(rows)
+        )
+
+        idf = np.log((1.0 + total) / (1.0 + document_frequency)) + 1.0
+        scores = (1.0 + np.log(tf)) * idf[columns]
+
+        # Best first within each document; ties go to the term seen first
+        order = np.lexsort((-scores, rows))
+        starts = np.searchsorted(rows[order], np.arange(len(doc_ids)))
+        ends = np.append(starts[1:], len(order))
+        return {
+            doc_id: [vocabulary[columns[j]] for j in order[start:min(end, start + limit)]]
+            for doc_id, start, end in zip(doc_ids, starts, ends)
+        }
+
+    def _remove(self, document_ids: List[str]) -> int:
+        terms: List[str] = []
+        removed = 0
+        for start in range(0, len(document_ids), _QUERY_CHUNK):
+            part = document_ids[start:start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(part))
+            rows = self.conn.execute(
+                f"SELECT terms FROM documents WHERE document_id IN ({placeholders})", part
+            ).fetchall()
+            for (stored,) in rows:
+                terms.extend(json.loads(stored))
+            removed += len(rows)
+            self.conn.execute(f"DELETE FROM documents WHERE document_id IN ({placeholders})", part)
+        if not removed:
+            return 0
+
+        self.conn.executemany(
+            "UPDATE document_frequency SET df = df - 1 WHERE term = ?", [(term,) for term in terms]
+        )
+        self.conn.execute("DELETE FROM document_frequency WHERE df <= 0")
+        self.conn.execute(
+            "UPDATE counters SET value = value - ? WHERE name = 'documents'", (removed,)
+        )
+        return removed
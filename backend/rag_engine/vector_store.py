@@ -3,13 +3,22 @@ import chromadb
 from chromadb.config import Settings
 from typing import List, Dict, Any, Optional
 import os
+import uuid
 from config.settings import settings
+from rag_engine.keyword_index import KeywordIndex
+from rag_engine.numpy_index import NumpyVectorIndex
+from rag_engine.term_index import TermIndex, count_terms
 
 logger = logging.getLogger(__name__)
 
 class VectorStore:
     """
     Wrapper around ChromaDB for storing and retrieving document embeddings.
+    With settings.vector_backend == "numpy", similarity queries are answered by
+    in-process NumpyVectorIndex mirrors of the collections; ChromaDB stays the
+    source of truth and the mirrors are rebuilt from it when out of sync.
+    Chunk text is also mirrored into a BM25 KeywordIndex for keyword search,
+    and document terms into a TermIndex of document frequencies for key terms.
     """
     
     def __init__(self):
@@ -19,11 +28,45 @@ class VectorStore:
         # Initialize client
         self.client = chromadb.PersistentClient(path=settings.chroma_persist_dir)
         
-        # Get or create collection
+        # Get or create collections: one vector per document, one per section chunk
+        self.chunk_collection_name = f"{settings.chroma_collection_name}_chunks"
         self.collection = self.client.get_or_create_collection(
             name=settings.chroma_collection_name,
             metadata={"hnsw:space": "cosine"}
         )
+        self.chunk_collection = self.client.get_or_create_collection(
+            name=self.chunk_collection_name,
+            metadata={"hnsw:space": "cosine"}
+        )
+
+        # Optional in-process exact-search mirrors
+        self.index: Optional[NumpyVectorIndex] = None
+        self.chunk_index: Optional[NumpyVectorIndex] = None
+        # Every write records a new stamp per collection, whatever the backend,
+        # so a process with a mirror notices writes made by other processes
+        self.stamp_dir = os.path.join(settings.chroma_persist_dir, "numpy_index")
+        self._stamps: Dict[str, Any] = {}
+        if settings.vector_backend == "numpy":
+            self.index = NumpyVectorIndex(os.path.join(self.stamp_dir, settings.chroma_collection_name))
+            self.chunk_index = NumpyVectorIndex(os.path.join(self.stamp_dir, self.chunk_collection_name))
+            self._sync_index(self.collection, self.index, check_count=True)
+            self._sync_index(self.chunk_collection, self.chunk_index, check_count=True)
+
+        self.keyword_index: Optional[KeywordIndex] = None
+        if settings.keyword_index_enabled:
+            self.keyword_index = KeywordIndex()
+            self._sync_keyword_index()
+
+        self.term_index: Optional[TermIndex] = None
+        if settings.key_terms_enabled:
+            self.term_index = TermIndex()
+            self._sync_term_index()
+
+        # Largest write ChromaDB accepts in one request
+        try:
+            self.max_batch_size = self.client.get_max_batch_size()
+        except Exception:
+            self.max_batch_size = settings.vector_max_batch_size
         
     def add_document(self, 
                      document_id: str, 
@@ -31,34 +74,143 @@ class VectorStore:
                      embedding: List[float], 
                      metadata: Dict[str, Any]):
         """
-        Add a document to the vector store.
+        Add a document to the vector store (single-item upsert_documents).
         """
-        try:
-            # Sanitize metadata for ChromaDB
-            sanitized_metadata = {}
-            for k, v in metadata.items():
-                if v is None:
-                    continue
-                if isinstance(v, (str, int, float, bool)):
-                    sanitized_metadata[k] = v
-                elif isinstance(v, list):
-                    # Convert list to string as ChromaDB (pre-0.4.15?) had issues with lists or mixed types
-                    # Even if supported, comma-join is safer for simple metadata
-                    sanitized_metadata[k] = ", ".join(str(item) for item in v)
-                else:
-                    # Fallback for dicts or other objects
-                    sanitized_metadata[k] = str(v)
+        status = self.upsert_documents([{
+            "id": document_id,
+            "content": content,
+            "embedding": embedding,
+            "metadata": metadata
+        }])[0]
+        if status["status"] != "upserted":
+            raise RuntimeError(f"Error adding document {document_id}: {status.get('error')}")
+        logger.debug(f"Added document {document_id} to vector store")
 
-            self.collection.add(
-                ids=[document_id],
-                documents=[content],
-                embeddings=[embedding],
-                metadatas=[sanitized_metadata]
+    def upsert_documents(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert or replace documents. Each item needs id, content, embedding and
+        metadata. Returns one {"id", "status", "error"} entry per item, in order.
+        """
+        return self._upsert(self.collection, self.index, batch, "documents")
+
+    def upsert_chunks(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert or replace section chunks (each metadata carries its parent document_id).
+        """
+        statuses = self._upsert(self.chunk_collection, self.chunk_index, batch, "chunks")
+        if self.keyword_index is not None:
+            written = {status["id"] for status in statuses if status["status"] == "upserted"}
+            try:
+                self.keyword_index.upsert([
+                    {**item, "metadata": self._sanitize_metadata(item.get("metadata") or {})}
+                    for item in batch
+                    if item.get("id") in written
+                ])
+            except Exception as e:
+                # The next start-up rebuilds the keyword index from the collection
+                logger.error(f"Error updating keyword index: {e}")
+        return statuses
+
+    def _upsert(self,
+                collection,
+                index: Optional[NumpyVectorIndex],
+                batch: List[Dict[str, Any]],
+                label: str) -> List[Dict[str, Any]]:
+        """
+        Upsert a batch in requests sized to ChromaDB's max batch limit; a failed
+        request only fails its own items.
+        """
+        statuses: List[Dict[str, Any]] = [None] * len(batch)
+
+        # Validate, keep the last occurrence of a repeated ID and sanitize in one pass
+        latest: Dict[str, int] = {}
+        for i, item in enumerate(batch):
+            if not item.get("id") or item.get("embedding") is None:
+                statuses[i] = {"id": item.get("id"), "status": "error", "error": "missing id or embedding"}
+                continue
+            if item["id"] in latest:
+                earlier = latest[item["id"]]
+                statuses[earlier] = {"id": item["id"], "status": "duplicate", "error": "superseded by a later item"}
+            latest[item["id"]] = i
+        pending = sorted(latest.values())
+        metadatas = {i: self._sanitize_metadata(batch[i].get("metadata") or {}) or None for i in pending}
+
+        def send(part: List[int]):
+            collection.upsert(
+                ids=[batch[i]["id"] for i in part],
+                documents=[batch[i].get("content") or "" for i in part],
+                embeddings=[batch[i]["embedding"] for i in part],
+                metadatas=[metadatas[i] for i in part]
             )
-            logger.info(f"Added document {document_id} to vector store")
-        except Exception as e:
-            logger.error(f"Error adding document to vector store: {e}")
-            raise
+
+        written: List[int] = []
+        for start in range(0, len(pending), self.max_batch_size):
+            part = pending[start:start + self.max_batch_size]
+            try:
+                send(part)
+                written.extend(part)
+                continue
+            except Exception as e:
+                if len(part) == 1:
+                    failed = {part[0]: e}
+                else:
+                    # Retry item by item so one bad item doesn't fail the whole request
+                    logger.warning(f"Upsert of {len(part)} {label} failed ({e}), retrying items individually")
+                    failed = {}
+                    for i in part:
+                        try:
+                            send([i])
+                            written.append(i)
+                        except Exception as item_error:
+                            failed[i] = item_error
+            for i, error in failed.items():
+                logger.error(f"Error upserting {batch[i]['id']} to vector store: {error}")
+                statuses[i] = {"id": batch[i]["id"], "status": "error", "error": str(error)}
+
+        written.sort()
+        for i in written:
+            statuses[i] = {"id": batch[i]["id"], "status": "upserted"}
+
+        if written:
+            stamp = self._new_stamp()
+            if index is not None:
+                try:
+                    self._sync_index(collection, index)
+                    index.upsert(
+                        [batch[i]["id"] for i in written],
+                        [batch[i]["embedding"] for i in written],
+                        [metadatas[i] or {} for i in written],
+                        source_stamp=stamp
+                    )
+                except Exception as e:
+                    # The stamp below no longer matches, so the next check rebuilds the mirror
+                    logger.error(f"Error updating vector index for {collection.name}: {e}")
+            self._write_stamp(collection, stamp)
+
+        if written:
+            logger.info(f"Upserted {len(written)} of {len(batch)} {label} to vector store")
+        return statuses
+
+    @staticmethod
+    def _sanitize_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Coerce metadata values into types ChromaDB accepts.
+        """
+        sanitized_metadata = {}
+        for k, v in metadata.items():
+            if v is None:
+                continue
+            if isinstance(v, (str, int, float, bool)):
+                sanitized_metadata[k] = v
+            elif isinstance(v, list) and v and all(isinstance(item, str) for item in v):
+                # String lists stay lists so they can be filtered with $contains
+                sanitized_metadata[k] = v
+            elif isinstance(v, list):
+                sanitized_metadata[k] = ", ".join(str(item) for item in v)
+            else:
+                # Fallback for dicts or other objects
+                sanitized_metadata[k] = str(v)
+        return sanitized_metadata
 
     def get_document_by_id(self, document_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -80,13 +232,105 @@ class VectorStore:
             return {
                 "id": result['ids'][0],
                 "content": result['documents'][0],
-                "metadata": result['metadatas'][0],
+                "metadata": result['metadatas'][0] or {},
                 "embedding": embedding
             }
         except Exception as e:
             logger.error(f"Error retrieving document {document_id}: {e}")
             return None
 
+    def get_document_content(self, document_id: str) -> Optional[str]:
+        """
+        Text of a document, or None if it is not stored.
+        """
+        try:
+            result = self.collection.get(ids=[document_id], include=["documents"])
+            return result['documents'][0] if result['ids'] else None
+        except Exception as e:
+            logger.error(f"Error retrieving document {document_id}: {e}")
+            return None
+
+    def get_documents_metadata(self, document_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Map document IDs to their metadata (no content or embeddings).
+        """
+        if not document_ids:
+            return {}
+        try:
+            result = self.collection.get(ids=document_ids, include=["metadatas"])
+            return {
+                doc_id: metadata or {}
+                for doc_id, metadata in zip(result['ids'], result['metadatas'])
+            }
+        except Exception as e:
+            logger.error(f"Error retrieving document metadata: {e}")
+            return {}
+
+    def get_chunk_embeddings(self, document_id: str) -> Dict[str, List[float]]:
+        """
+        Map the chunk texts of a document to their stored embeddings.
+        """
+        try:
+            result = self.chunk_collection.get(
+                where={"document_id": document_id},
+                include=["documents", "embeddings"]
+            )
+            if result['embeddings'] is None:
+                return {}
+            return {
+                text: list(map(float, embedding))
+                for text, embedding in zip(result['documents'], result['embeddings'])
+            }
+        except Exception as e:
+            logger.error(f"Error retrieving chunk embeddings for {document_id}: {e}")
+            return {}
+
+    def get_chunk_vectors(self, chunk_ids: List[str]) -> Dict[str, List[float]]:
+        """
+        Map chunk IDs to their stored embeddings.
+        """
+        if not chunk_ids:
+            return {}
+        try:
+            result = self.chunk_collection.get(ids=chunk_ids, include=["embeddings"])
+            if result['embeddings'] is None:
+                return {}
+            return {
+                chunk_id: list(map(float, embedding))
+                for chunk_id, embedding in zip(result['ids'], result['embeddings'])
+            }
+        except Exception as e:
+            logger.error(f"Error retrieving chunk embeddings: {e}")
+            return {}
+
+    def count_chunks(self) -> int:
+        """
+        Number of indexed section chunks.
+        """
+        try:
+            return self.chunk_collection.count()
+        except Exception as e:
+            logger.error(f"Error counting chunks: {e}")
+            return 0
+
+    def get_index_stats(self) -> Dict[str, Any]:
+        """
+        Query backend, quantization mode, index memory footprint and keyword index size.
+        """
+        stats = {"backend": settings.vector_backend}
+        if self.index is not None:
+            usage = [self.index.memory_usage(), self.chunk_index.memory_usage()]
+            stats.update({
+                "quantization": self.index.quantization,
+                "float32_bytes": sum(u["float32_bytes"] for u in usage),
+                "resident_bytes": sum(u["resident_bytes"] for u in usage)
+            })
+        if self.keyword_index is not None:
+            stats["keyword_index"] = self.keyword_index.stats()
+        if self.term_index is not None:
+            stats["term_index"] = self.term_index.stats()
+        return stats
+
     def list_all_documents(self) -> List[str]:
         """
         List all document IDs in the store.
@@ -101,16 +345,117 @@ class VectorStore:
             logger.error(f"Error listing documents: {e}")
             return []
 
+    def list_document_files(self) -> Dict[str, str]:
+        """
+        Map document IDs to their source file paths (metadata only, no content or embeddings).
+        """
+        try:
+            result = self.collection.get(include=["metadatas"])
+            return {
+                doc_id: (metadata or {}).get("file_path", "")
+                for doc_id, metadata in zip(result['ids'], result['metadatas'])
+            }
+        except Exception as e:
+            logger.error(f"Error listing document files: {e}")
+            return {}
+
+    def delete_documents(self,
+                         document_ids: Optional[List[str]] = None,
+                         where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Delete documents and their chunks by ID and/or metadata filter.
+        Returns one {"id", "status"} entry per requested or matched document;
+        status is "deleted", "not_found" or "error".
+        """
+        requested = list(dict.fromkeys(document_ids or []))
+        if not requested and not where:
+            return []
+
+        try:
+            existing = set()
+            for start in range(0, len(requested), self.max_batch_size):
+                part = requested[start:start + self.max_batch_size]
+                existing.update(self.collection.get(ids=part, include=[])['ids'])
+            matched = self.collection.get(where=where, include=[])['ids'] if where else []
+        except Exception as e:
+            logger.error(f"Error resolving documents to delete: {e}")
+            return [{"id": doc_id, "status": "error", "error": str(e)} for doc_id in requested]
+
+        # Requested IDs also cascade to chunks whose document is already gone
+        requested_set = set(requested)
+        existing.update(matched)
+        targets = requested + [doc_id for doc_id in matched if doc_id not in requested_set]
+        statuses: List[Dict[str, Any]] = []
+        deleted: List[str] = []
+        for start in range(0, len(targets), self.max_batch_size):
+            part = targets[start:start + self.max_batch_size]
+            try:
+                self.collection.delete(ids=part)
+                self.chunk_collection.delete(where={"document_id": {"$in": part}})
+            except Exception as e:
+                logger.error(f"Error deleting {len(part)} documents from vector store: {e}")
+                statuses.extend({"id": doc_id, "status": "error", "error": str(e)} for doc_id in part)
+                continue
+            deleted.extend(part)
+            for doc_id in part:
+                statuses.append({"id": doc_id, "status": "deleted" if doc_id in existing else "not_found"})
+
+        if deleted:
+            for collection, index, selector in (
+                (self.collection, self.index, {"ids": deleted}),
+                (self.chunk_collection, self.chunk_index, {"where": {"document_id": {"$in": deleted}}}),
+            ):
+                stamp = self._new_stamp()
+                if index is not None:
+                    try:
+                        self._sync_index(collection, index)
+                        index.delete(**selector, source_stamp=stamp)
+                    except Exception as e:
+                        logger.error(f"Error updating vector index for {collection.name}: {e}")
+                self._write_stamp(collection, stamp)
+        if self.keyword_index is not None and deleted:
+            try:
+                self.keyword_index.delete_documents(deleted)
+            except Exception as e:
+                logger.error(f"Error updating keyword index: {e}")
+        if self.term_index is not None and deleted:
+            try:
+                self.term_index.delete_documents(deleted)
+            except Exception as e:
+                logger.error(f"Error updating term index: {e}")
+
+        removed = sum(1 for status in statuses if status["status"] == "deleted")
+        if removed:
+            logger.info(f"Deleted {removed} documents from vector store")
+        return statuses
+
     def reset_collection(self) -> bool:
         """
-        Delete and recreate the collection.
+        Delete and recreate the document and chunk collections.
         """
         try:
             self.client.delete_collection(settings.chroma_collection_name)
+            self.client.delete_collection(self.chunk_collection_name)
             self.collection = self.client.get_or_create_collection(
                 name=settings.chroma_collection_name,
                 metadata={"hnsw:space": "cosine"}
             )
+            self.chunk_collection = self.client.get_or_create_collection(
+                name=self.chunk_collection_name,
+                metadata={"hnsw:space": "cosine"}
+            )
+            for collection, index in (
+                (self.collection, self.index),
+                (self.chunk_collection, self.chunk_index),
+            ):
+                stamp = self._new_stamp()
+                if index is not None:
+                    index.reset(source_stamp=stamp)
+                self._write_stamp(collection, stamp)
+            if self.keyword_index is not None:
+                self.keyword_index.reset()
+            if self.term_index is not None:
+                self.term_index.reset()
             return True
         except Exception as e:
             logger.error(f"Error resetting collection: {e}")
@@ -123,27 +468,244 @@ class VectorStore:
         """
         Query for similar documents.
         """
+        if self.index is not None:
+            return self._query_index(self.collection, self.index, [query_embedding], n_results, where)[0]
+        return self._query(self.collection, query_embedding, n_results, where)
+
+    def query_chunks(self,
+                     query_embedding: List[float],
+                     n_results: int = 20,
+                     where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Query for similar section chunks.
+        """
+        if self.chunk_index is not None:
+            return self._query_index(self.chunk_collection, self.chunk_index, [query_embedding], n_results, where)[0]
+        return self._query(self.chunk_collection, query_embedding, n_results, where)
+
+    def keyword_search(self,
+                       query: str,
+                       n_results: int = 20,
+                       where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        BM25 search over section chunks; no embedding is needed.
+        """
+        if self.keyword_index is None:
+            return []
         try:
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
+            return self.keyword_index.search(query, n_results=n_results, where=where)
+        except Exception as e:
+            logger.error(f"Error querying keyword index: {e}")
+            return []
+
+    def query_chunks_many(self,
+                          query_embeddings: List[List[float]],
+                          n_results: int = 20,
+                          where: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Query section chunks for several embeddings at once (one ChromaDB request).
+        Returns one hit list per embedding, in order.
+        """
+        if self.chunk_index is not None:
+            return self._query_index(self.chunk_collection, self.chunk_index, query_embeddings, n_results, where)
+        return self._query_many(self.chunk_collection, query_embeddings, n_results, where)
+
+    def _query_index(self,
+                     collection,
+                     index: NumpyVectorIndex,
+                     query_embeddings: List[List[float]],
+                     n_results: int,
+                     where: Optional[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Answer queries from a NumPy mirror (after checking it is current); the
+        mirror keeps no text, so hit contents are read from the collection.
+        """
+        try:
+            self._sync_index(collection, index)
+            results = [
+                index.query(embedding, n_results=n_results, where=where)
+                for embedding in query_embeddings
+            ]
+            hit_ids = list({hit["id"] for hits in results for hit in hits})
+            if hit_ids:
+                found = collection.get(ids=hit_ids, include=["documents"])
+                contents = dict(zip(found['ids'], found['documents']))
+                for hits in results:
+                    for hit in hits:
+                        hit["content"] = contents.get(hit["id"]) or ""
+            return results
+        except Exception as e:
+            logger.error(f"Error querying vector index: {e}")
+            return [[] for _ in query_embeddings]
+
+    def _stamp_path(self, collection) -> str:
+        return os.path.join(self.stamp_dir, f"{collection.name}.stamp")
+
+    @staticmethod
+    def _new_stamp() -> str:
+        return uuid.uuid4().hex
+
+    def _read_stamp(self, collection) -> str:
+        """Stamp of the latest write to a collection ("" before the first one)"""
+        path = self._stamp_path(collection)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return ""
+        cached = self._stamps.get(path)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stamp = f.read().strip()
+        except OSError:
+            return ""
+        self._stamps[path] = (stat.st_mtime_ns, stat.st_size, stamp)
+        return stamp
+
+    def _write_stamp(self, collection, stamp: str):
+        try:
+            os.makedirs(self.stamp_dir, exist_ok=True)
+            path = self._stamp_path(collection)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(stamp)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error recording write stamp for {collection.name}: {e}")
+
+    def _sync_index(self,
+                    collection,
+                    index: NumpyVectorIndex,
+                    page_size: int = 1000,
+                    check_count: bool = False):
+        """
+        Rebuild a NumPy mirror from its ChromaDB collection unless it reflects
+        the collection's latest write stamp. A mirror that another process
+        kept up to date is reloaded instead of rebuilt. With check_count the
+        row counts are compared as well (on start-up).
+        """
+        try:
+            stamp = self._read_stamp(collection)
+            if index.source_stamp != stamp:
+                index.refresh()
+            if index.source_stamp == stamp and not (check_count and len(index) != collection.count()):
+                return
+
+            expected = collection.count()
+            logger.info(f"Rebuilding vector index for {collection.name} ({expected} vectors)")
+            index.reset(source_stamp=stamp)
+            for offset in range(0, expected, page_size):
+                page = collection.get(
+                    include=["embeddings", "metadatas"],
+                    limit=page_size,
+                    offset=offset
+                )
+                index.upsert(page['ids'], page['embeddings'], page['metadatas'], source_stamp=stamp)
+        except Exception as e:
+            logger.error(f"Error syncing vector index for {collection.name}: {e}")
+            raise
+
+    def _sync_keyword_index(self, page_size: int = 1000):
+        """
+        Rebuild the keyword index from the chunk collection if the two disagree.
+        """
+        try:
+            expected = self.chunk_collection.count()
+            if self.keyword_index.count() == expected:
+                return
+
+            logger.info(f"Rebuilding keyword index ({expected} chunks)")
+            self.keyword_index.reset()
+            for offset in range(0, expected, page_size):
+                page = self.chunk_collection.get(
+                    include=["metadatas", "documents"],
+                    limit=page_size,
+                    offset=offset
+                )
+                self.keyword_index.upsert([
+                    {"id": chunk_id, "content": content, "metadata": metadata or {}}
+                    for chunk_id, content, metadata in zip(page['ids'], page['documents'], page['metadatas'])
+                ])
+        except Exception as e:
+            logger.error(f"Error syncing keyword index: {e}")
+
+    def add_key_terms(self, term_counts: Dict[str, Dict[str, int]]) -> Dict[str, List[str]]:
+        """
+        Record the term counts of documents about to be written and return
+        their top TF-IDF terms ({document_id: [term, ...]}).
+        """
+        if self.term_index is None:
+            return {}
+        try:
+            return self.term_index.add_documents(term_counts)
+        except Exception as e:
+            logger.error(f"Error updating term index: {e}")
+            return {}
+
+    def _sync_term_index(self, page_size: int = 100):
+        """
+        Rebuild the document frequencies from the stored document text if the
+        term index and the collection disagree. Stored key terms are kept.
+        """
+        try:
+            expected = self.collection.count()
+            if self.term_index.count() == expected:
+                return
+
+            logger.info(f"Rebuilding term index ({expected} documents)")
+            self.term_index.reset()
+            for offset in range(0, expected, page_size):
+                page = self.collection.get(
+                    include=["documents"],
+                    limit=page_size,
+                    offset=offset
+                )
+                self.term_index.add_documents({
+                    doc_id: count_terms(content or "")
+                    for doc_id, content in zip(page['ids'], page['documents'])
+                })
+        except Exception as e:
+            logger.error(f"Error syncing term index: {e}")
+
+    def _query(self,
+               collection,
+               query_embedding: List[float],
+               n_results: int,
+               where: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self._query_many(collection, [query_embedding], n_results, where)[0]
+
+    def _query_many(self,
+                    collection,
+                    query_embeddings: List[List[float]],
+                    n_results: int,
+                    where: Optional[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        if not query_embeddings:
+            return []
+        try:
+            results = collection.query(
+                query_embeddings=query_embeddings,
                 n_results=n_results,
                 where=where,
                 include=["documents", "metadatas", "distances"]
             )
             
-            # Format results
+            # Format results, one list per query embedding
             formatted_results = []
-            if results['ids']:
-                for i in range(len(results['ids'][0])):
-                    formatted_results.append({
-                        "id": results['ids'][0][i],
-                        "content": results['documents'][0][i],
-                        "metadata": results['metadatas'][0][i],
-                        "distance": results['distances'][0][i]
-                    })
+            for q in range(len(query_embeddings)):
+                hits = []
+                if results['ids'] and q < len(results['ids']):
+                    for i in range(len(results['ids'][q])):
+                        hits.append({
+                            "id": results['ids'][q][i],
+                            "content": results['documents'][q][i],
+                            "metadata": results['metadatas'][q][i],
+                            "distance": results['distances'][q][i]
+                        })
+                formatted_results.append(hits)
             
             return formatted_results
             
         except Exception as e:
             logger.error(f"Error querying vector store: {e}")
-            return []
+            return [[] for _ in query_embeddings]
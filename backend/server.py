@@ -7,10 +7,13 @@ FastAPI server that connects the Next.js frontend with the RAG system
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
 from api.routes import router
+from config.settings import settings
 from database.db import init_database
+from services.registry import ServiceRegistry
 
 # Configure logging
 logging.basicConfig(
@@ -26,10 +29,17 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Initializing database...")
     await init_database()
+    logger.info("Initializing services...")
+    services = ServiceRegistry()
+    if settings.warm_up_on_startup:
+        await asyncio.to_thread(services.warm_up)
+    app.state.services = services
+    await services.job_queue.start()
     logger.info("Server started successfully")
     yield
     # Shutdown
     logger.info("Server shutting down...")
+    await services.close()
 
 
 # Create FastAPI app
@@ -72,7 +82,7 @@ async def health_check():
     return {
         "status": "healthy",
         "database": "connected",
-        "rag_engine": "ready"
+        "rag_engine": "ready" if app.state.services.warmed_up else "cold"
     }
 
 
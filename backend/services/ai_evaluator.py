@@ -15,11 +15,11 @@ logger = logging.getLogger(__name__)
 class AIEvaluator:
     """Evaluates generated sections with AI metrics"""
     
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
+    def __init__(self, client: Optional[openai.AsyncOpenAI] = None):
+        self.client = client or openai.AsyncOpenAI(api_key=settings.openai_api_key)
         self.model = settings.openai_model
     
-    def evaluate_section(
+    async def evaluate_section(
         self,
         section_name: str,
         section_content: str,
@@ -32,7 +32,7 @@ class AIEvaluator:
         
         Returns:
         - coherence (0-10): LLM-as-judge score
-        - ragConfidence (0-100%): RAG attribution score
+        - ragConfidence (0-100%): RAG attribution score (None if no source has a similarity)
         - formatCompliance (0-100%): Template adherence
         - sources: list of RAG sources with similarity scores
         - latencyMs: generation time
@@ -40,7 +40,7 @@ class AIEvaluator:
         """
         
         # Evaluate coherence using LLM-as-judge
-        coherence = self._evaluate_coherence(section_name, section_content)
+        coherence = await self._evaluate_coherence(section_name, section_content)
         
         # Calculate RAG confidence from sources
         rag_confidence = self._calculate_rag_confidence(rag_sources)
@@ -57,7 +57,7 @@ class AIEvaluator:
             "tokenCount": token_count
         }
     
-    def _evaluate_coherence(self, section_name: str, content: str) -> float:
+    async def _evaluate_coherence(self, section_name: str, content: str) -> float:
         """
         Use LLM-as-judge to evaluate section coherence
         Returns score from 0-10
@@ -81,7 +81,7 @@ Content:
 Rate this section's coherence (0-10):"""
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -100,16 +100,19 @@ Rate this section's coherence (0-10):"""
             # Default to reasonable score
             return 8.0
     
-    def _calculate_rag_confidence(self, sources: Optional[List[Dict[str, Any]]]) -> float:
+    def _calculate_rag_confidence(self, sources: Optional[List[Dict[str, Any]]]) -> Optional[float]:
         """
         Calculate RAG confidence based on source similarity scores
-        Returns percentage (0-100)
+        Returns percentage (0-100), or None if no source similarity is known
+        (keyword-only retrieval)
         """
         if not sources or len(sources) == 0:
             return 0.0
         
-        # Average similarity scores
-        similarities = [s.get('similarity', 0) for s in sources]
+        # Average similarity scores of the sources that have one
+        similarities = [s['similarity'] for s in sources if s.get('similarity') is not None]
+        if not similarities:
+            return None
         avg_similarity = sum(similarities) / len(similarities)
         
         return round(avg_similarity, 1)
@@ -0,0 +1,254 @@
+"""
+Generation Job Queue
+Background RFP generation with durable job state in the SQLite database
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Dict, Any, List, Optional
+
+from config.settings import settings
+from database.db import get_db, save_section
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationJobQueue:
+    """
+    In-process worker pool for RFP generation jobs, so a run outlives the
+    HTTP request that started it. Each job is a row in generation_jobs;
+    workers take job IDs from an asyncio queue and generate the sections the
+    job has not saved yet. Every finished section is checkpointed to
+    `sections`, together with the job's completed list, in one commit.
+    Sections that failed (fallback placeholders) are not checkpointed; they
+    are generated again in the next round, and the job fails if any are
+    still missing after settings.generation_job_section_attempts rounds. On
+    start, jobs left queued or running by a previous process are queued
+    again and resume from their last checkpoint.
+    """
+
+    def __init__(self, section_generator, workers: Optional[int] = None):
+        self.section_generator = section_generator
+        self.workers = max(1, workers or settings.generation_job_workers)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def section_names(self) -> List[str]:
+        gen = self.section_generator
+        return gen.NEW_SECTIONS + gen.OLD_SECTIONS + gen.RULES_SECTIONS
+
+    async def start(self):
+        """Re-queue interrupted jobs and start the workers"""
+        db = await get_db()
+        try:
+            cursor = await db.execute(
+                """SELECT id FROM generation_jobs
+                   WHERE status IN ('queued', 'running')
+                   ORDER BY created_at"""
+            )
+            interrupted = [row["id"] for row in await cursor.fetchall()]
+            await db.execute(
+                """UPDATE generation_jobs
+                   SET status = 'queued', updated_at = CURRENT_TIMESTAMP
+                   WHERE status = 'running'"""
+            )
+            await db.commit()
+        finally:
+            await db.close()
+
+        if interrupted:
+            logger.info(f"Resuming {len(interrupted)} interrupted generation jobs")
+        for job_id in interrupted:
+            self._queue.put_nowait(job_id)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"generation-job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        """Stop the workers; jobs they were running resume on the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, session_id: str, context: Dict[str, Any]) -> str:
+        """Record a queued job and hand it to the workers; returns the job ID"""
+        job_id = str(uuid.uuid4())
+        db = await get_db()
+        try:
+            await db.execute(
+                """INSERT INTO generation_jobs (id, session_id, status, context, total_sections)
+                   VALUES (?, ?, 'queued', ?, ?)""",
+                (job_id, session_id, json.dumps(context), len(self.section_names))
+            )
+            await db.commit()
+        finally:
+            await db.close()
+
+        self._queue.put_nowait(job_id)
+        logger.info(f"Queued generation job {job_id} for session {session_id}")
+        return job_id
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Job status plus the sections checkpointed so far, grouped as
+        { "new": [...], "old": [...], "rules": [...] } in canonical order.
+        Returns None for an unknown job.
+        """
+        db = await get_db()
+        try:
+            cursor = await db.execute("SELECT * FROM generation_jobs WHERE id = ?", (job_id,))
+            job = await cursor.fetchone()
+            if not job:
+                return None
+
+            completed = set(json.loads(job["completed_sections"] or "[]"))
+            cursor = await db.execute(
+                """SELECT name, source_type, content, assumptions, ai_eval
+                   FROM sections WHERE session_id = ? ORDER BY id""",
+                (job["session_id"],)
+            )
+            # Latest row per name, in case the session was generated before
+            saved = {row["name"]: row for row in await cursor.fetchall() if row["name"] in completed}
+        finally:
+            await db.close()
+
+        gen = self.section_generator
+        sections: Dict[str, List[Dict[str, Any]]] = {}
+        for source_type, names in (
+            ("new", gen.NEW_SECTIONS),
+            ("old", gen.OLD_SECTIONS),
+            ("rules", gen.RULES_SECTIONS),
+        ):
+            sections[source_type] = [
+                {
+                    "name": name,
+                    "content": saved[name]["content"],
+                    "assumptions": json.loads(saved[name]["assumptions"] or "[]"),
+                    "aiEval": json.loads(saved[name]["ai_eval"] or "{}") or None,
+                }
+                for name in names if name in saved
+            ]
+
+        return {
+            "job_id": job["id"],
+            "session_id": job["session_id"],
+            "status": job["status"],
+            "completed_sections": len(completed),
+            "total_sections": job["total_sections"],
+            "attempts": job["attempts"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+            "sections": sections,
+        }
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            except Exception as e:
+                logger.error(f"Generation job {job_id} failed: {e}")
+                await self._mark_failed(job_id, str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str):
+        gen = self.section_generator
+        db = await get_db()
+        try:
+            # Claim the job; a job that is no longer queued was already handled
+            cursor = await db.execute(
+                """UPDATE generation_jobs
+                   SET status = 'running', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ? AND status = 'queued'""",
+                (job_id,)
+            )
+            await db.commit()
+            if cursor.rowcount == 0:
+                return
+
+            cursor = await db.execute(
+                "SELECT session_id, context, completed_sections FROM generation_jobs WHERE id = ?",
+                (job_id,)
+            )
+            job = await cursor.fetchone()
+            session_id = job["session_id"]
+            context = json.loads(job["context"] or "{}")
+            completed: List[str] = json.loads(job["completed_sections"] or "[]")
+            if completed:
+                logger.info(f"Resuming generation job {job_id} after {len(completed)} saved sections")
+
+            async def checkpoint(source_type: str, section: Dict[str, Any]):
+                await save_section(db, session_id, section, source_type)
+                completed.append(section["name"])
+                await db.execute(
+                    """UPDATE generation_jobs
+                       SET completed_sections = ?, updated_at = CURRENT_TIMESTAMP
+                       WHERE id = ?""",
+                    (json.dumps(completed), job_id)
+                )
+                await db.commit()
+
+            for section_name in gen.RULES_SECTIONS:
+                if section_name not in completed:
+                    section = gen.get_rules_section(section_name)
+                    if not gen.is_fallback_section(section):
+                        await checkpoint("rules", section)
+
+            attempts = max(1, settings.generation_job_section_attempts)
+            for attempt in range(attempts):
+                remaining = [
+                    name for name in gen.NEW_SECTIONS + gen.OLD_SECTIONS
+                    if name not in completed
+                ]
+                if not remaining:
+                    break
+                if attempt:
+                    logger.info(f"Generation job {job_id}: retrying {len(remaining)} failed sections")
+                async for source_type, section in gen.generate_sections_as_completed(
+                    context,
+                    deadline_seconds=settings.generation_job_deadline_seconds,
+                    section_names=remaining
+                ):
+                    # A fallback stays in `remaining`, so it is generated again
+                    if not gen.is_fallback_section(section):
+                        await checkpoint(source_type, section)
+
+            missing = [name for name in self.section_names if name not in completed]
+            if missing:
+                raise RuntimeError(
+                    f"{len(missing)} sections could not be generated: {', '.join(missing)}"
+                )
+
+            await db.execute(
+                """UPDATE generation_jobs
+                   SET status = 'completed', updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ?""",
+                (job_id,)
+            )
+            await db.commit()
+            logger.info(f"Generation job {job_id} completed")
+        finally:
+            await db.close()
+
+    async def _mark_failed(self, job_id: str, error: str):
+        try:
+            db = await get_db()
+            try:
+                await db.execute(
+                    """UPDATE generation_jobs
+                       SET status = 'failed', error = ?, updated_at = CURRENT_TIMESTAMP
+                       WHERE id = ?""",
+                    (error, job_id)
+                )
+                await db.commit()
+            finally:
+                await db.close()
+        except Exception as e:
+            logger.error(f"Could not record failure of generation job {job_id}: {e}")
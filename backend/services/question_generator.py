@@ -5,7 +5,7 @@ Generates adaptive follow-up questions based on input richness
 
 import openai
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -14,8 +14,8 @@ logger = logging.getLogger(__name__)
 class QuestionGenerator:
     """Generates adaptive questions for RFP context gathering"""
     
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
+    def __init__(self, client: Optional[openai.AsyncOpenAI] = None):
+        self.client = client or openai.AsyncOpenAI(api_key=settings.openai_api_key)
         self.model = settings.openai_model
     
     def analyze_input_richness(self, prompt: str) -> int:
@@ -41,7 +41,7 @@ class QuestionGenerator:
         
         return min(10, score)
     
-    def generate_questions(self, prompt: str, context: Dict[str, Any]) -> List[str]:
+    async def generate_questions(self, prompt: str, context: Dict[str, Any]) -> List[str]:
         """
         Generate 2-5 adaptive questions based on input richness
         Rich input → fewer questions
@@ -78,7 +78,7 @@ Already known context: {context}
 Generate {num_questions} questions as a numbered list."""
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -3,9 +3,12 @@ RAG Context Discovery Service
 Searches historical RFPs to find relevant context before generation
 """
 
+import asyncio
+import functools
 import logging
-from typing import Dict, Any, List
-from openai import OpenAI
+from concurrent.futures import Executor
+from typing import Dict, Any, List, Optional
+from openai import AsyncOpenAI
 import os
 from config.settings import settings
 
@@ -17,9 +20,17 @@ class RAGContextDiscovery:
     Service to discover relevant historical RFP context using RAG
     """
     
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+    def __init__(
+        self,
+        search_engine=None,
+        client: Optional[AsyncOpenAI] = None,
+        executor: Optional[Executor] = None,
+    ):
+        self.client = client or AsyncOpenAI(api_key=settings.openai_api_key)
         self.model = os.getenv("OPENAI_MODEL", "gpt-4o")
+        self.search_engine = search_engine
+        # Blocking search calls run here instead of on the event loop
+        self.executor = executor
     
     async def discover_context(self, user_context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -90,18 +101,24 @@ class RAGContextDiscovery:
         Search historical RFPs using RAG system
         """
         try:
-            from rag_engine.search_engine import SearchEngine
-            search_engine = SearchEngine()
+            loop = asyncio.get_running_loop()
+            if self.search_engine is None:
+                from rag_engine.search_engine import SearchEngine
+                self.search_engine = await loop.run_in_executor(self.executor, SearchEngine)
             
             # Prepare filters based on context
             filters = {}
             if context.get("rfp_type"):
                 filters["rfp_type"] = context.get("rfp_type")
                 
-            results = search_engine.search_templates(
-                query=query,
-                filters=filters,
-                limit=5
+            results = await loop.run_in_executor(
+                self.executor,
+                functools.partial(
+                    self.search_engine.search_templates,
+                    query=query,
+                    filters=filters,
+                    limit=5
+                )
             )
             
             logger.info(f"Found {len(results)} relevant historical RFPs")
@@ -111,9 +128,14 @@ class RAGContextDiscovery:
             for r in results:
                 formatted_results.append({
                     "doc_name": r.get('metadata', {}).get('filename', 'Unknown'),
-                    "similarity": round((1 - r.get('distance', 0)) * 100, 1),
+                    "similarity": (
+                        round(r['similarity_score'] * 100, 1)
+                        if r.get('similarity_score') is not None else None
+                    ),
                     "rfp_type": r.get('metadata', {}).get('rfp_type', 'Unknown'),
-                    "sections_found": [], # TODO: Extract sections from metadata if available
+                    "sections_found": list(dict.fromkeys(
+                        c['section_title'] for c in r.get('chunks', []) if c.get('section_title')
+                    )),
                     "summary": r.get('metadata', {}).get('content_summary', '')
                 })
                 
@@ -136,7 +158,9 @@ class RAGContextDiscovery:
         
         # Build prompt for insight extraction
         rfp_summaries = "\n".join([
-            f"- {rfp['doc_name']} ({rfp['similarity']}% match): {rfp['summary']}"
+            f"- {rfp['doc_name']} "
+            f"({'keyword match' if rfp['similarity'] is None else str(rfp['similarity']) + '% match'}): "
+            f"{rfp['summary']}"
             for rfp in rfps
         ])
         
@@ -158,7 +182,7 @@ Extract key insights that should inform the new RFP generation:
 Provide a concise summary in JSON format with keys: common_requirements, evaluation_patterns, standard_deliverables, considerations"""
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are an expert RFP analyst. Extract actionable insights from historical RFPs."},
@@ -0,0 +1,40 @@
+"""
+Rate Limiter
+Client-side token bucket that keeps OpenAI requests under a per-minute budget
+"""
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket shared by every request on an async HTTP client: up to
+    `burst` requests go out at once, after which requests are spaced to
+    `requests_per_minute`. Waiters are served in arrival order.
+    """
+
+    def __init__(self, requests_per_minute: int, burst: int = 1):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def on_request(self, request):
+        """httpx request event hook"""
+        await self.acquire()
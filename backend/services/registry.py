@@ -0,0 +1,167 @@
+"""
+Service Registry
+Process-wide shared clients and services for the API server
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+import httpx
+import openai
+
+from config.settings import settings
+from rag_engine.embedding_engine import EmbeddingEngine
+from rag_engine.search_engine import SearchEngine
+from rag_engine.vector_store import VectorStore
+from services.ai_evaluator import AIEvaluator
+from services.job_queue import GenerationJobQueue
+from services.question_generator import QuestionGenerator
+from services.rag_context_discovery import RAGContextDiscovery
+from services.rate_limiter import AsyncRateLimiter
+from services.response_cache import SectionResponseCache
+from services.section_generator import SectionGenerator
+
+logger = logging.getLogger(__name__)
+
+# Queries embedded during warm-up so the first searches hit the embedding cache
+WARM_UP_QUERIES = [
+    "Service Agreement",
+    "Supply Contract",
+    "EPC Project",
+    "General Terms",
+]
+
+
+class ServiceRegistry:
+    """
+    Owns the pooled OpenAI clients, one vector store handle and one search
+    engine, and builds every API service on top of them. Created once in the
+    server lifespan and handed to route handlers through dependency injection.
+    Request-path services use AsyncOpenAI; the blocking vector store and
+    embedding calls run on a bounded thread pool (self.executor).
+    """
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.Client] = None,
+        async_http_client: Optional[httpx.AsyncClient] = None,
+    ):
+        # One connection pool per client type for every OpenAI call made by the server
+        limits = httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_connections,
+        )
+        self.http_client = http_client or openai.DefaultHttpxClient(
+            limits=limits,
+            timeout=settings.openai_timeout,
+        )
+        self.async_http_client = async_http_client or openai.DefaultAsyncHttpxClient(
+            limits=limits,
+            timeout=settings.openai_timeout,
+        )
+        # Every async OpenAI request (retries included) waits for a rate-limit token
+        self.rate_limiter: Optional[AsyncRateLimiter] = None
+        if settings.openai_requests_per_minute > 0:
+            self.rate_limiter = AsyncRateLimiter(
+                settings.openai_requests_per_minute,
+                burst=settings.openai_burst_requests,
+            )
+            self.async_http_client.event_hooks["request"].append(self.rate_limiter.on_request)
+
+        self.openai_client = openai.OpenAI(
+            api_key=settings.openai_api_key,
+            http_client=self.http_client,
+        )
+        self.async_openai_client = openai.AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=self.async_http_client,
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.vector_store_workers,
+            thread_name_prefix="vector-store",
+        )
+
+        self.vector_store = VectorStore()
+        self.embedding_engine = EmbeddingEngine(client=self.openai_client)
+        self.search_engine = SearchEngine(
+            embedding_engine=self.embedding_engine,
+            vector_store=self.vector_store,
+        )
+
+        self.response_cache: Optional[SectionResponseCache] = None
+        if settings.response_cache_enabled:
+            self.response_cache = SectionResponseCache(embedding_engine=self.embedding_engine)
+        
+        self.evaluator = AIEvaluator(client=self.async_openai_client)
+        self.question_generator = QuestionGenerator(client=self.async_openai_client)
+        self.section_generator = SectionGenerator(
+            search_engine=self.search_engine,
+            client=self.async_openai_client,
+            evaluator=self.evaluator,
+            executor=self.executor,
+            response_cache=self.response_cache,
+        )
+        self.context_discovery = RAGContextDiscovery(
+            search_engine=self.search_engine,
+            client=self.async_openai_client,
+            executor=self.executor,
+        )
+        self.job_queue = GenerationJobQueue(self.section_generator)
+        self.warmed_up = False
+
+    def warm_up(self) -> Dict[str, Any]:
+        """
+        Pay one-off start-up costs before the first request: open both
+        collections, load their HNSW indexes with a query and embed the
+        canned queries (section names and RFP types) into the cache.
+        Returns what was counted and how long each step took.
+        Failures are logged, not raised, so the server still starts offline.
+        """
+        timings: Dict[str, Any] = {}
+
+        started = time.perf_counter()
+        try:
+            store = self.vector_store
+            timings["documents"] = store.collection.count()
+            timings["chunks"] = store.count_chunks()
+            # Query with a stored vector so whichever backend serves searches loads its index
+            for collection, query in (
+                (store.collection, store.query_similar),
+                (store.chunk_collection, store.query_chunks),
+            ):
+                sample = collection.peek(limit=1)
+                if sample["embeddings"] is not None and len(sample["embeddings"]):
+                    query(list(sample["embeddings"][0]), n_results=1)
+            store.keyword_search(" ".join(WARM_UP_QUERIES), n_results=1)
+        except Exception as e:
+            logger.warning(f"Vector store warm-up failed: {e}")
+        timings["vector_store_ms"] = round((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        try:
+            self.embedding_engine.generate_embeddings(
+                self.warm_up_queries(),
+                timeout=settings.search_embedding_timeout
+            )
+        except Exception as e:
+            logger.warning(f"Embedding warm-up failed: {e}")
+        timings["embeddings_ms"] = round((time.perf_counter() - started) * 1000)
+
+        self.warmed_up = True
+        logger.info(f"Service registry warmed up: {timings}")
+        return timings
+
+    def warm_up_queries(self) -> List[str]:
+        return WARM_UP_QUERIES + self.section_generator.OLD_SECTIONS
+
+    async def close(self):
+        await self.job_queue.stop()
+        self.executor.shutdown(wait=False)
+        if self.embedding_engine.cache:
+            # Buffered embedding cache hit counts and access times
+            self.embedding_engine.cache.flush()
+        await self.async_http_client.aclose()
+        self.http_client.close()
+
@@ -0,0 +1,253 @@
+"""
+Response Cache
+Semantic cache of generated sections keyed by section, prompt fingerprint and context
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, dict):
+        return "; ".join(
+            f"{key}={_normalize_value(value[key])}" for key in sorted(value)
+        )
+    if isinstance(value, (list, tuple, set)):
+        return ", ".join(sorted(_normalize_value(item) for item in value))
+    return " ".join(str(value).replace("_", " ").lower().split())
+
+
+class SectionResponseCache:
+    """
+    Disk-backed cache of generated sections. An entry is keyed by section
+    name, a fingerprint of the prompt (model, prompt text and settings, and
+    for OLD sections the retrieved passages) and the normalized context.
+    Identical contexts are exact hits. Otherwise the context is embedded, and
+    the most similar cached context for the same section and fingerprint is
+    returned as a draft when it reaches the similarity threshold. Changing a
+    prompt or template changes the fingerprint, so old entries stop matching
+    and age out through TTL and LRU eviction.
+    """
+
+    def __init__(self, embedding_engine=None, path: Optional[str] = None):
+        self.embedding_engine = embedding_engine
+        self.path = path or settings.response_cache_path or os.path.join(
+            settings.chroma_persist_dir, "response_cache.sqlite3"
+        )
+        self.ttl_seconds = settings.response_cache_ttl_seconds
+        self.max_entries = max(1, settings.response_cache_max_entries)
+        self.draft_similarity = settings.response_cache_draft_similarity
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                section_name TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                context_text TEXT NOT NULL,
+                embedding BLOB,
+                section TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_lookup ON responses(section_name, fingerprint);
+            CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access);
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO counters (name, value)
+                VALUES ('hits', 0), ('drafts', 0), ('misses', 0), ('evictions', 0);
+            """
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def fingerprint(model: str, request: Dict[str, Any]) -> str:
+        """Hash of the model and chat request a section is generated from"""
+        payload = json.dumps({"model": model, "request": request}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def normalize_context(context: Dict[str, Any]) -> str:
+        """One "field: value" line per non-empty field, sorted, lower-cased"""
+        lines = []
+        for key in sorted(context):
+            value = _normalize_value(context[key])
+            if value:
+                lines.append(f"{key.lower()}: {value}")
+        return "\n".join(lines)
+
+    def lookup(self, section_name: str, context: Dict[str, Any], fingerprint: str) -> Dict[str, Any]:
+        """
+        Find a cached section for this request.
+        Returns status ("hit", "draft" or "miss"), section (None on a miss),
+        similarity, and the key material store() needs to cache a fresh
+        generation.
+        """
+        context_text = self.normalize_context(context)
+        key = hashlib.sha256(
+            "\0".join((section_name, fingerprint, context_text)).encode("utf-8")
+        ).hexdigest()
+        lookup = {
+            "status": "miss",
+            "section": None,
+            "similarity": 0.0,
+            "key": key,
+            "section_name": section_name,
+            "fingerprint": fingerprint,
+            "context_text": context_text,
+            "embedding": None,
+        }
+        oldest = time.time() - self.ttl_seconds
+
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT section FROM responses WHERE key = ? AND created_at >= ?",
+                (key, oldest),
+            ).fetchone()
+        if row:
+            lookup.update(status="hit", section=json.loads(row[0]), similarity=1.0)
+            self._record(key, "hits")
+            return lookup
+
+        # Near hits need the context embedding, which store() reuses on a miss
+        embedding = self._embed(context_text)
+        lookup["embedding"] = embedding
+        if embedding is not None:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT key, embedding, section FROM responses "
+                    "WHERE section_name = ? AND fingerprint = ? AND created_at >= ? "
+                    "AND embedding IS NOT NULL",
+                    (section_name, fingerprint, oldest),
+                ).fetchall()
+            if rows:
+                matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob, _ in rows])
+                query = np.asarray(embedding, dtype=np.float32)
+                norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+                similarities = matrix @ query / np.where(norms > 0, norms, 1.0)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.draft_similarity:
+                    lookup.update(
+                        status="draft",
+                        section=json.loads(rows[best][2]),
+                        similarity=float(similarities[best]),
+                    )
+                    self._record(rows[best][0], "drafts")
+                    return lookup
+
+        self._record(None, "misses")
+        return lookup
+
+    def store(self, lookup: Dict[str, Any], section: Dict[str, Any]):
+        """Cache a freshly generated section under the key of a missed lookup"""
+        now = time.time()
+        embedding = lookup.get("embedding")
+        blob = np.asarray(embedding, dtype=np.float32).tobytes() if embedding is not None else None
+
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, section_name, fingerprint, context_text, embedding, section, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    lookup["key"],
+                    lookup["section_name"],
+                    lookup["fingerprint"],
+                    lookup["context_text"],
+                    blob,
+                    json.dumps(section),
+                    now,
+                    now,
+                ),
+            )
+            self._evict(now)
+            self.conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            counters = dict(self.conn.execute("SELECT name, value FROM counters").fetchall())
+
+        hits = counters.get("hits", 0)
+        drafts = counters.get("drafts", 0)
+        misses = counters.get("misses", 0)
+        lookups = hits + drafts + misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "drafts": drafts,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "draft_rate": drafts / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.execute("UPDATE counters SET value = 0")
+            self.conn.commit()
+
+    def _embed(self, context_text: str) -> Optional[list]:
+        if self.embedding_engine is None or not context_text:
+            return None
+        try:
+            return self.embedding_engine.generate_embedding(
+                context_text,
+                timeout=settings.search_embedding_timeout
+            )
+        except Exception as e:
+            logger.warning(f"Context embedding unavailable ({e}), response cache is exact-match only")
+            return None
+
+    def _record(self, key: Optional[str], counter: str):
+        with self._lock:
+            if key is not None:
+                self.conn.execute(
+                    "UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key)
+                )
+            self.conn.execute(
+                "UPDATE counters SET value = value + 1 WHERE name = ?", (counter,)
+            )
+            self.conn.commit()
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used ones beyond max_entries"""
+        expired = self.conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        overflow = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        evicted = 0
+        if overflow > 0:
+            evicted = self.conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            ).rowcount
+        if expired or evicted:
+            self.conn.execute(
+                "UPDATE counters SET value = value + ? WHERE name = 'evictions'",
+                (expired + evicted,),
+            )
+            logger.info(f"Evicted {expired} expired and {evicted} least recently used cached sections")
@@ -3,12 +3,15 @@ Section Generator Service
 Generates RFP sections using three-source architecture: NEW, OLD, RULES
 """
 
+import asyncio
+import functools
 import openai
 import logging
 import time
 import sys
+from concurrent.futures import Executor
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, Iterable, List, Optional, Tuple
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
@@ -16,6 +19,7 @@ sys.path.insert(0, str(project_root))
 
 from config.settings import settings
 from services.ai_evaluator import AIEvaluator
+from utils.token_budget import truncate_to_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +48,21 @@ class SectionGenerator:
         "References Required",
     ]
     
+    # Chunk section_type (see SECTION_TYPE_PATTERNS) searched for each OLD section
+    OLD_SECTION_TYPES = {
+        "Background & Context": "Background",
+        "Vendor Qualifications": "Vendor_Qualifications",
+        "Proposal Format": "Proposal_Format",
+        "Submission Instructions": "Submission_Instructions",
+        "Contract Terms": "Contract_Terms",
+        "Insurance Requirements": "Insurance",
+        "Warranty & Support": "Warranty",
+        "References Required": "References",
+    }
+    
+    # Context fields added to the retrieval query for OLD sections
+    OLD_SECTION_QUERY_FIELDS = ["rfp_type", "service", "specific_service", "equipment_type"]
+    
     RULES_SECTIONS = [
         "General Terms & Conditions",
         "Safety & Compliance",
@@ -58,167 +77,502 @@ class SectionGenerator:
         "Amendment Procedures",
     ]
     
-    def __init__(self, search_engine=None):
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
+    def __init__(
+        self,
+        search_engine=None,
+        client: Optional[openai.AsyncOpenAI] = None,
+        evaluator: Optional[AIEvaluator] = None,
+        executor: Optional[Executor] = None,
+        response_cache=None,
+    ):
+        self.client = client or openai.AsyncOpenAI(api_key=settings.openai_api_key)
         self.model = settings.openai_model
         self.search_engine = search_engine
-        self.evaluator = AIEvaluator()
+        self.executor = executor
+        self.response_cache = response_cache
+        self.evaluator = evaluator or AIEvaluator(client=self.client)
         self.templates_dir = Path(__file__).parent.parent / "templates"
     
-    def generate_all_sections(self, context: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    async def generate_all_sections(self, context: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
         """
         Generate all 25 RFP sections
         Returns: { "new": [...], "old": [...], "rules": [...] }
+        NEW and OLD sections are generated concurrently (see
+        generate_sections_as_completed); each list keeps the canonical order.
         """
         logger.info("Generating all RFP sections")
         
-        new_sections = []
-        old_sections = []
-        rules_sections = []
-        
-        # Generate NEW sections (LLM-based)
-        for section_name in self.NEW_SECTIONS:
-            section = self.generate_new_section(section_name, context)
-            new_sections.append(section)
-        
-        # Generate OLD sections (RAG-based)
-        for section_name in self.OLD_SECTIONS:
-            section = self.generate_old_section(section_name, context)
-            old_sections.append(section)
+        generated = {"new": {}, "old": {}}
+        async for source_type, section in self.generate_sections_as_completed(context):
+            generated[source_type][section["name"]] = section
         
         # Get RULES sections (templates)
-        for section_name in self.RULES_SECTIONS:
-            section = self.get_rules_section(section_name)
-            rules_sections.append(section)
+        rules_sections = [self.get_rules_section(name) for name in self.RULES_SECTIONS]
         
         return {
-            "new": new_sections,
-            "old": old_sections,
+            "new": [generated["new"][name] for name in self.NEW_SECTIONS],
+            "old": [generated["old"][name] for name in self.OLD_SECTIONS],
             "rules": rules_sections
         }
     
-    def generate_new_section(
+    async def generate_sections_as_completed(
+        self,
+        context: Dict[str, Any],
+        max_concurrency: Optional[int] = None,
+        deadline_seconds: Optional[float] = None,
+        section_names: Optional[Iterable[str]] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Generate every NEW and OLD section concurrently, yielding
+        (source_type, section) as each one finishes (generation plus
+        evaluation). At most max_concurrency sections are in flight; sections
+        still running at the deadline are cancelled and yielded as fallbacks
+        (deadline_seconds defaults to settings.generation_deadline_seconds;
+        0 means no deadline). Pass section_names to generate only those sections.
+        Passages for every OLD section are retrieved in one batched search
+        while the NEW sections start.
+        """
+        limit = max(1, max_concurrency or settings.generation_max_concurrency)
+        deadline = (
+            settings.generation_deadline_seconds if deadline_seconds is None else deadline_seconds
+        )
+        semaphore = asyncio.Semaphore(limit)
+        
+        jobs = [("new", name) for name in self.NEW_SECTIONS]
+        jobs += [("old", name) for name in self.OLD_SECTIONS]
+        if section_names is not None:
+            wanted = set(section_names)
+            jobs = [job for job in jobs if job[1] in wanted]
+        
+        old_names = [name for source_type, name in jobs if source_type == "old"]
+        retrieval = asyncio.ensure_future(
+            self.retrieve_old_section_passages(context, old_names)
+        ) if old_names else None
+        
+        async def bounded(source_type, section_name):
+            if source_type == "new":
+                async with semaphore:
+                    return await self.generate_new_section(section_name, context)
+            # Wait for retrieval before taking a generation slot
+            passages = (await retrieval).get(section_name, [])
+            async with semaphore:
+                return await self.generate_old_section(section_name, context, passages=passages)
+        
+        tasks = {
+            asyncio.create_task(bounded(source_type, name)): (source_type, name)
+            for source_type, name in jobs
+        }
+        
+        started = time.monotonic()
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = None
+                if deadline > 0:
+                    remaining = deadline - (time.monotonic() - started)
+                    if remaining <= 0:
+                        break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    source_type, name = tasks[task]
+                    if task.exception() is not None:
+                        logger.error(f"Error generating {source_type.upper()} section {name}: {task.exception()}")
+                        yield source_type, self._get_fallback_section(name, source_type)
+                    else:
+                        yield source_type, task.result()
+            
+            if pending:
+                logger.warning(f"{len(pending)} sections missed the {deadline:g}s generation deadline")
+            for task in pending:
+                task.cancel()
+                source_type, name = tasks[task]
+                yield source_type, self._get_fallback_section(name, source_type)
+        finally:
+            # Consumer went away (or deadline passed): stop outstanding work
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            if retrieval is not None and not retrieval.done():
+                retrieval.cancel()
+    
+    async def generate_new_section(
         self,
         section_name: str,
         context: Dict[str, Any],
         iteration: int = 1,
-        additional_context: Optional[str] = None
+        additional_context: Optional[str] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Generate a NEW section using LLM with user context
+        With use_cache, a cached section for the same (or a near-identical)
+        context is returned instead of a new completion.
         """
         logger.info(f"Generating NEW section: {section_name} (iteration {iteration})")
         
         start_time = time.time()
         
-        # Build prompt
-        system_prompt = self._get_new_section_system_prompt(section_name)
-        user_prompt = self._build_new_section_prompt(section_name, context, additional_context)
-        
         try:
-            response = self.client.chat.completions.create(
+            lookup = None
+            if use_cache and self.response_cache is not None:
+                lookup = await self._lookup_cached_section(
+                    section_name, context, self._new_section_request(section_name, {}, additional_context)
+                )
+                if lookup["section"] is not None:
+                    return self._cached_section(lookup, start_time)
+            
+            response = await self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1500
+                **self._new_section_request(section_name, context, additional_context)
             )
             
             content = response.choices[0].message.content
             token_count = response.usage.total_tokens
             latency_ms = int((time.time() - start_time) * 1000)
             
-            # Extract assumptions
-            assumptions = self._extract_assumptions(content, context)
-            
-            # Evaluate section
-            ai_eval = self.evaluator.evaluate_section(
-                section_name=section_name,
-                section_content=content,
-                rag_sources=None,  # NEW sections don't use RAG
-                latency_ms=latency_ms,
-                token_count=token_count
-            )
-            
-            return {
-                "name": section_name,
-                "content": content,
-                "assumptions": assumptions,
-                "aiEval": ai_eval
-            }
+            section = await self._evaluate_new_section(section_name, content, context, latency_ms, token_count)
+            if lookup is not None:
+                await self._in_executor(self.response_cache.store, lookup, section)
+            return section
             
         except Exception as e:
             logger.error(f"Error generating NEW section {section_name}: {e}")
             return self._get_fallback_section(section_name, "new")
     
-    def generate_old_section(
+    async def generate_old_section(
         self,
         section_name: str,
         context: Dict[str, Any],
-        iteration: int = 1
+        iteration: int = 1,
+        passages: Optional[List[Dict[str, Any]]] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Generate an OLD section using RAG retrieval
+        passages come from retrieve_old_section_passages; they are retrieved
+        for this section alone when not given. With use_cache, a cached
+        section built from the same passages is returned instead of a new
+        completion.
         """
         logger.info(f"Generating OLD section: {section_name}")
         
         start_time = time.time()
         
-        # For now, generate with LLM (RAG integration comes next)
-        # In production, this would use SearchEngine to find similar sections
-        
-        system_prompt = f"""You are an expert RFP writer. Generate the "{section_name}" section for an RFP.
-
-This section should be based on standard industry practices and typical RFP requirements.
-Use professional, formal language appropriate for procurement documents."""
-
-        user_prompt = f"""Generate the "{section_name}" section for this RFP:
-
-Context: {context}
-
-Create a comprehensive, professional section in markdown format."""
-
         try:
-            response = self.client.chat.completions.create(
+            if passages is None:
+                passages = (await self.retrieve_old_section_passages(context, [section_name]))[section_name]
+            
+            lookup = None
+            if use_cache and self.response_cache is not None:
+                lookup = await self._lookup_cached_section(
+                    section_name, context, self._old_section_request(section_name, {}, passages)
+                )
+                if lookup["section"] is not None:
+                    return self._cached_section(lookup, start_time)
+            
+            response = await self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.5,
-                max_tokens=1000
+                **self._old_section_request(section_name, context, passages)
             )
             
             content = response.choices[0].message.content
             token_count = response.usage.total_tokens
             latency_ms = int((time.time() - start_time) * 1000)
             
-            # Mock RAG sources (in production, these come from SearchEngine)
-            rag_sources = [
-                {"docName": "RFP_Services_2024.docx", "section": section_name, "similarity": 85.0},
-                {"docName": "RFP_Consulting_2023.docx", "section": section_name, "similarity": 78.0}
-            ]
-            
-            ai_eval = self.evaluator.evaluate_section(
-                section_name=section_name,
-                section_content=content,
-                rag_sources=rag_sources,
-                latency_ms=latency_ms,
-                token_count=token_count
-            )
-            
-            return {
-                "name": section_name,
-                "content": content,
-                "aiEval": ai_eval
-            }
+            section = await self._evaluate_old_section(section_name, content, latency_ms, token_count, passages)
+            if lookup is not None:
+                await self._in_executor(self.response_cache.store, lookup, section)
+            return section
             
         except Exception as e:
             logger.error(f"Error generating OLD section {section_name}: {e}")
             return self._get_fallback_section(section_name, "old")
     
+    async def stream_section(
+        self,
+        section_name: str,
+        context: Dict[str, Any],
+        iteration: int = 1,
+        additional_context: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Regenerate a NEW or OLD section with a streamed completion.
+        Yields ("token", text) for each content delta as it arrives, then
+        ("section", section) once the completion has ended and been evaluated.
+        Provider errors are raised rather than replaced by a fallback section.
+        """
+        if section_name not in self.NEW_SECTIONS + self.OLD_SECTIONS:
+            raise ValueError(f"Section cannot be regenerated: {section_name}")
+        
+        logger.info(f"Streaming section: {section_name} (iteration {iteration})")
+        start_time = time.time()
+        
+        passages: List[Dict[str, Any]] = []
+        if section_name in self.NEW_SECTIONS:
+            request = self._new_section_request(section_name, context, additional_context)
+        else:
+            passages = (await self.retrieve_old_section_passages(context, [section_name]))[section_name]
+            request = self._old_section_request(section_name, context, passages)
+        
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            stream=True,
+            stream_options={"include_usage": True},
+            **request
+        )
+        parts = []
+        token_count = None
+        async for chunk in stream:
+            if chunk.usage is not None:
+                token_count = chunk.usage.total_tokens
+            for choice in chunk.choices:
+                if choice.delta.content:
+                    parts.append(choice.delta.content)
+                    yield "token", choice.delta.content
+        
+        content = "".join(parts)
+        latency_ms = int((time.time() - start_time) * 1000)
+        
+        # Scoring starts only after the stream has closed
+        if section_name in self.NEW_SECTIONS:
+            section = await self._evaluate_new_section(section_name, content, context, latency_ms, token_count)
+        else:
+            section = await self._evaluate_old_section(section_name, content, latency_ms, token_count, passages)
+        yield "section", section
+    
+    async def _lookup_cached_section(
+        self,
+        section_name: str,
+        context: Dict[str, Any],
+        template_request: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Response cache lookup. template_request is the chat request built
+        with an empty context, so the fingerprint covers the model, prompt
+        text and settings (and OLD passages) but not the context itself.
+        """
+        fingerprint = self.response_cache.fingerprint(self.model, template_request)
+        return await self._in_executor(self.response_cache.lookup, section_name, context, fingerprint)
+    
+    def _cached_section(self, lookup: Dict[str, Any], start_time: float) -> Dict[str, Any]:
+        """Cached section marked with its cache status; no tokens were spent on it"""
+        section = dict(lookup["section"])
+        section["cacheStatus"] = lookup["status"]
+        if section.get("aiEval"):
+            section["aiEval"] = {
+                **section["aiEval"],
+                "latencyMs": int((time.time() - start_time) * 1000),
+                "tokenCount": 0
+            }
+        logger.info(
+            f"Response cache {lookup['status']} for section {section['name']} "
+            f"(similarity {lookup['similarity']:.3f})"
+        )
+        return section
+    
+    async def _in_executor(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+    
+    async def retrieve_old_section_passages(
+        self,
+        context: Dict[str, Any],
+        section_names: Optional[List[str]] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Retrieve past-tender passages for OLD sections. Each section searches
+        only the chunks labelled with its section type at ingestion, and all
+        sections share one batched search (SearchEngine.search_many).
+        Returns { section_name: [passage, ...] }; a passage has doc_name,
+        section_title, similarity (0-100, or None after a keyword-only search), score and content.
+        """
+        names = list(section_names or self.OLD_SECTIONS)
+        if self.search_engine is None:
+            return {name: [] for name in names}
+        
+        queries = [self._old_section_query(name, context) for name in names]
+        query_filters = [{"section_type": self.OLD_SECTION_TYPES[name]} for name in names]
+        
+        results = await self._in_executor(
+            functools.partial(
+                self.search_engine.search_many,
+                queries,
+                limit=settings.old_section_passages,
+                query_filters=query_filters
+            )
+        )
+        
+        retrieved = {}
+        for name, result in zip(names, results):
+            retrieved[name] = self._passages_from_results(result)
+            if not retrieved[name]:
+                logger.info(f"No {self.OLD_SECTION_TYPES[name]} passages found for OLD section {name}")
+        return retrieved
+    
+    def _old_section_query(self, section_name: str, context: Dict[str, Any]) -> str:
+        """Retrieval query for an OLD section: its name plus key context fields"""
+        terms = [section_name]
+        for field in self.OLD_SECTION_QUERY_FIELDS:
+            value = context.get(field)
+            if isinstance(value, str) and value:
+                terms.append(value.replace("_", " "))
+        return " ".join(terms)
+    
+    @staticmethod
+    def _similarity_percent(similarity: Optional[float]) -> Optional[float]:
+        """Cosine similarity as a percentage; None when search had no query embedding"""
+        if similarity is None:
+            return None
+        return round(max(similarity, 0.0) * 100, 1)
+
+    def _passages_from_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Best chunks across the matching documents, ranked by search score"""
+        passages = []
+        for result in results:
+            metadata = result.get("metadata") or {}
+            doc_name = metadata.get("filename") or result.get("document_id", "")
+            for chunk in result.get("chunks") or []:
+                passages.append({
+                    "doc_name": doc_name,
+                    "section_title": chunk.get("section_title", ""),
+                    "similarity": self._similarity_percent(chunk.get("similarity_score")),
+                    "score": chunk.get("score", 0.0),
+                    "content": chunk.get("content") or ""
+                })
+        passages.sort(key=lambda passage: passage["score"], reverse=True)
+        return passages[:settings.old_section_passages]
+    
+    def _new_section_request(
+        self,
+        section_name: str,
+        context: Dict[str, Any],
+        additional_context: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Chat completion parameters for a NEW section"""
+        system_prompt = self._get_new_section_system_prompt(section_name)
+        user_prompt = self._build_new_section_prompt(section_name, context, additional_context)
+        return {
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 1500
+        }
+    
+    def _old_section_request(
+        self,
+        section_name: str,
+        context: Dict[str, Any],
+        passages: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Chat completion parameters for an OLD section, grounded in retrieved passages"""
+        if passages:
+            system_prompt = f"""You are an expert RFP writer. Generate the "{section_name}" section for an RFP.
+
+Base the section on the reference excerpts from past tenders, adapting them to this RFP's context.
+Keep their requirements and structure where they apply, but do not copy names, dates or amounts specific to those tenders.
+Use professional, formal language appropriate for procurement documents."""
+
+            excerpts = "\n\n".join(
+                f"[{i}] {passage['doc_name']} - {passage['section_title'] or section_name}\n"
+                f"{truncate_to_tokens(passage['content'], settings.old_section_passage_tokens)}"
+                for i, passage in enumerate(passages, start=1)
+            )
+            user_prompt = f"""Generate the "{section_name}" section for this RFP:
+
+Context: {context}
+
+Reference excerpts:
+
+{excerpts}
+
+Create a comprehensive, professional section in markdown format."""
+        else:
+            # Nothing retrieved: fall back to standard practice
+            system_prompt = f"""You are an expert RFP writer. Generate the "{section_name}" section for an RFP.
+
+This section should be based on standard industry practices and typical RFP requirements.
+Use professional, formal language appropriate for procurement documents."""
+
+            user_prompt = f"""Generate the "{section_name}" section for this RFP:
+
+Context: {context}
+
+Create a comprehensive, professional section in markdown format."""
+
+        return {
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": 0.5,
+            "max_tokens": 1000
+        }
+    
+    async def _evaluate_new_section(
+        self,
+        section_name: str,
+        content: str,
+        context: Dict[str, Any],
+        latency_ms: int,
+        token_count: Optional[int]
+    ) -> Dict[str, Any]:
+        """Build a NEW section from generated content, with assumptions and evaluation"""
+        # Extract assumptions
+        assumptions = self._extract_assumptions(content, context)
+        
+        # Evaluate section
+        ai_eval = await self.evaluator.evaluate_section(
+            section_name=section_name,
+            section_content=content,
+            rag_sources=None,  # NEW sections don't use RAG
+            latency_ms=latency_ms,
+            token_count=token_count
+        )
+        
+        return {
+            "name": section_name,
+            "content": content,
+            "assumptions": assumptions,
+            "aiEval": ai_eval
+        }
+    
+    async def _evaluate_old_section(
+        self,
+        section_name: str,
+        content: str,
+        latency_ms: int,
+        token_count: Optional[int],
+        passages: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Build an OLD section from generated content, with its sources and evaluation"""
+        # Sources are the retrieved passages the prompt was grounded in
+        rag_sources = [
+            {
+                "docName": passage["doc_name"],
+                "section": passage["section_title"] or section_name,
+                "similarity": passage["similarity"]
+            }
+            for passage in passages or []
+        ]
+        
+        ai_eval = await self.evaluator.evaluate_section(
+            section_name=section_name,
+            section_content=content,
+            rag_sources=rag_sources,
+            latency_ms=latency_ms,
+            token_count=token_count
+        )
+        
+        return {
+            "name": section_name,
+            "content": content,
+            "aiEval": ai_eval
+        }
+    
     def get_rules_section(self, section_name: str) -> Dict[str, Any]:
         """
         Get a RULES section from fixed templates
@@ -337,10 +691,16 @@ Standard {section_name.lower()} clause as per company policy.
 
 This section contains fixed legal and compliance terms."""
     
+    @staticmethod
+    def is_fallback_section(section: Dict[str, Any]) -> bool:
+        """Whether a section is the placeholder used when generation failed"""
+        return bool(section.get("fallback"))
+    
     def _get_fallback_section(self, section_name: str, source_type: str) -> Dict[str, Any]:
         """Fallback section if generation fails"""
         return {
             "name": section_name,
+            "fallback": True,
             "content": f"## {section_name}\n\nContent generation in progress...",
             "assumptions": [],
             "aiEval": {
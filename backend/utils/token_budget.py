@@ -0,0 +1,130 @@
+"""
+Token counting and budget-aware truncation/packing.
+
+Uses a cached tiktoken encoding per model. When tiktoken or its encoding files
+are unavailable (e.g. offline hosts) it falls back to a conservative
+character-based estimate so callers never exceed a budget.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# Characters per token assumed by the fallback estimate (deliberately low)
+FALLBACK_CHARS_PER_TOKEN = 3
+
+# Sentence ends: terminal punctuation followed by whitespace, or a line break
+_SENTENCE_END = re.compile(r"[.!?;](?=\s)|\n")
+
+# Only snap to a sentence boundary if it keeps at least this share of the cut
+_MIN_SENTENCE_FRACTION = 0.8
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model: Optional[str] = None):
+    """Return the cached tiktoken encoding for a model, or None if unavailable"""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken not installed, using estimated token counts")
+        return None
+
+    try:
+        if model:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning(f"Tokenizer for {model or DEFAULT_ENCODING} unavailable ({e}), using estimated token counts")
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token estimate used when no tokenizer is available"""
+    return len(text) // FALLBACK_CHARS_PER_TOKEN + 1 if text else 0
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count tokens in text for the given model"""
+    tokenizer = get_tokenizer(model)
+    if tokenizer is None:
+        return estimate_tokens(text)
+    return len(tokenizer.encode(text, disallowed_special=()))
+
+
+def _snap_to_sentence(text: str) -> str:
+    """Cut text back to its last sentence end if that keeps most of it"""
+    last_end = None
+    for match in _SENTENCE_END.finditer(text):
+        last_end = match.end()
+    if last_end and last_end >= len(text) * _MIN_SENTENCE_FRACTION:
+        return text[:last_end].rstrip()
+    return text
+
+
+def truncate_to_tokens(
+    text: str,
+    max_tokens: int,
+    model: Optional[str] = None,
+    sentence_boundary: bool = True,
+) -> str:
+    """Return the longest prefix of text within max_tokens (optionally ending on a sentence)"""
+    if max_tokens <= 0 or not text:
+        return ""
+
+    tokenizer = get_tokenizer(model)
+    if tokenizer is None:
+        max_chars = (max_tokens - 1) * FALLBACK_CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        truncated = text[:max_chars]
+    else:
+        tokens = tokenizer.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        # Drop a trailing partial multi-byte character
+        truncated = tokenizer.decode(tokens[:max_tokens]).rstrip("�")
+
+    return _snap_to_sentence(truncated) if sentence_boundary else truncated
+
+
+def pack_texts(
+    texts: List[str],
+    max_tokens: int,
+    model: Optional[str] = None,
+    separator: str = "\n\n",
+) -> Tuple[str, int]:
+    """
+    Join as many texts as fit in max_tokens; the first text that does not fit
+    is truncated to the remaining budget. Returns (packed text, tokens used).
+    """
+    separator_tokens = count_tokens(separator, model) if separator else 0
+    parts: List[str] = []
+    used = 0
+
+    for text in texts:
+        cost = separator_tokens if parts else 0
+        remaining = max_tokens - used - cost
+        if remaining <= 0:
+            break
+
+        tokens = count_tokens(text, model)
+        if tokens <= remaining:
+            parts.append(text)
+            used += cost + tokens
+            continue
+
+        truncated = truncate_to_tokens(text, remaining, model)
+        if truncated:
+            parts.append(truncated)
+            used += cost + count_tokens(truncated, model)
+        break
+
+    return separator.join(parts), used